@@ -1,25 +1,897 @@
+import time
+STARTUP_TIME = time.perf_counter()  # Start of the startup benchmark (--benchmark-startup)
 import pygame
 import numpy as np
-from collections import defaultdict
-import tkinter as tk
-from tkinter import ttk, filedialog, messagebox
-import json
-import threading
+from collections import defaultdict, OrderedDict, deque
 import math
+import os
+import hashlib
+import sys
+# json, concurrent.futures, argparse, cProfile and subprocess are imported where they
+# are used, so they only cost startup time in runs that need them
+
+class TileIndex:
+    """Spatial index of live cells grouped into square tiles.
+    Lets region queries touch only the tiles overlapping the region."""
+    
+    TILE_SHIFT = 4  # Tiles are 16x16 cells
+    
+    def __init__(self, cells=()):
+        self.tiles = {}  # {(tile_x, tile_y): set of (x, y)}
+        for x, y in cells:
+            self.add(x, y)
+    
+    def add(self, x, y):
+        """Add a live cell to the index."""
+        key = (x >> self.TILE_SHIFT, y >> self.TILE_SHIFT)
+        tile = self.tiles.get(key)
+        if tile is None:
+            tile = self.tiles[key] = set()
+        tile.add((x, y))
+    
+    def remove(self, x, y):
+        """Remove a cell from the index if present."""
+        key = (x >> self.TILE_SHIFT, y >> self.TILE_SHIFT)
+        tile = self.tiles.get(key)
+        if tile is not None:
+            tile.discard((x, y))
+            if not tile:
+                del self.tiles[key]
+    
+    def add_many(self, xs, ys):
+        """Add cells given as NumPy coordinate arrays, one tile at a time."""
+        for key, tile_xs, tile_ys in self.group_by_tile(xs, ys):
+            tile = self.tiles.get(key)
+            if tile is None:
+                tile = self.tiles[key] = set()
+            tile.update(zip(tile_xs, tile_ys))
+    
+    def remove_many(self, xs, ys):
+        """Remove cells given as NumPy coordinate arrays, one tile at a time."""
+        for key, tile_xs, tile_ys in self.group_by_tile(xs, ys):
+            tile = self.tiles.get(key)
+            if tile is not None:
+                tile.difference_update(zip(tile_xs, tile_ys))
+                if not tile:
+                    del self.tiles[key]
+    
+    def group_by_tile(self, xs, ys):
+        """Yield (tile key, xs, ys) with the given coordinates grouped by tile."""
+        if len(xs) == 0:
+            return
+        tile_xs = xs >> self.TILE_SHIFT
+        tile_ys = ys >> self.TILE_SHIFT
+        order = np.lexsort((tile_ys, tile_xs))
+        tile_xs, tile_ys = tile_xs[order], tile_ys[order]
+        xs, ys = xs[order], ys[order]
+        # Split wherever the tile changes
+        breaks = np.flatnonzero((np.diff(tile_xs) != 0) | (np.diff(tile_ys) != 0)) + 1
+        starts = np.concatenate(([0], breaks))
+        ends = np.concatenate((breaks, [len(xs)]))
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            yield ((int(tile_xs[start]), int(tile_ys[start])),
+                   xs[start:end].tolist(), ys[start:end].tolist())
+    
+    def update(self, added, removed):
+        """Apply a batch of added and removed cells."""
+        for x, y in removed:
+            self.remove(x, y)
+        for x, y in added:
+            self.add(x, y)
+    
+    def clear(self):
+        """Remove all cells from the index."""
+        self.tiles.clear()
+    
+    def tiles_in_rect(self, min_x, min_y, max_x, max_y):
+        """Yield (tile key, cells) for occupied tiles overlapping the inclusive cell rect."""
+        shift = self.TILE_SHIFT
+        min_tx, min_ty = min_x >> shift, min_y >> shift
+        max_tx, max_ty = max_x >> shift, max_y >> shift
+        
+        # Walk whichever is smaller - the tile range or the occupied tiles
+        if (max_tx - min_tx + 1) * (max_ty - min_ty + 1) <= len(self.tiles):
+            for ty in range(min_ty, max_ty + 1):
+                for tx in range(min_tx, max_tx + 1):
+                    tile = self.tiles.get((tx, ty))
+                    if tile:
+                        yield (tx, ty), tile
+        else:
+            for (tx, ty), tile in self.tiles.items():
+                if min_tx <= tx <= max_tx and min_ty <= ty <= max_ty:
+                    yield (tx, ty), tile
+    
+    def cells_in_rect(self, min_x, min_y, max_x, max_y):
+        """Yield the live cells inside the inclusive cell rect."""
+        shift = self.TILE_SHIFT
+        for (tx, ty), tile in self.tiles_in_rect(min_x, min_y, max_x, max_y):
+            tile_x, tile_y = tx << shift, ty << shift
+            if (min_x <= tile_x and tile_x + (1 << shift) - 1 <= max_x and
+                    min_y <= tile_y and tile_y + (1 << shift) - 1 <= max_y):
+                # Tile lies completely inside the rect
+                yield from tile
+            else:
+                for x, y in tile:
+                    if min_x <= x <= max_x and min_y <= y <= max_y:
+                        yield (x, y)
+    
+    def count_in_rect(self, min_x, min_y, max_x, max_y):
+        """Count the live cells inside the inclusive cell rect."""
+        shift = self.TILE_SHIFT
+        count = 0
+        for (tx, ty), tile in self.tiles_in_rect(min_x, min_y, max_x, max_y):
+            tile_x, tile_y = tx << shift, ty << shift
+            if (min_x <= tile_x and tile_x + (1 << shift) - 1 <= max_x and
+                    min_y <= tile_y and tile_y + (1 << shift) - 1 <= max_y):
+                count += len(tile)
+            else:
+                count += sum(1 for x, y in tile if min_x <= x <= max_x and min_y <= y <= max_y)
+        return count
+    
+    def bounds(self):
+        """Return (min_x, min_y, max_x, max_y) of the indexed cells, or None if empty."""
+        if not self.tiles:
+            return None
+        txs = [tx for tx, ty in self.tiles]
+        tys = [ty for tx, ty in self.tiles]
+        min_tx, max_tx, min_ty, max_ty = min(txs), max(txs), min(tys), max(tys)
+        
+        # Only the tiles on the outer tile rows/columns can hold the extreme cells
+        return (
+            min(x for (tx, ty), tile in self.tiles.items() if tx == min_tx for x, y in tile),
+            min(y for (tx, ty), tile in self.tiles.items() if ty == min_ty for x, y in tile),
+            max(x for (tx, ty), tile in self.tiles.items() if tx == max_tx for x, y in tile),
+            max(y for (tx, ty), tile in self.tiles.items() if ty == max_ty for x, y in tile)
+        )
+
+
+def count_neighbors(cells):
+    """Return {(x, y): live neighbor count} for every cell next to a live one."""
+    neighbors = defaultdict(int)
+    for (x, y) in cells:
+        for dx in [-1, 0, 1]:
+            for dy in [-1, 0, 1]:
+                if dx == 0 and dy == 0:
+                    continue
+                neighbors[(x + dx, y + dy)] += 1
+    return neighbors
+
+
+def apply_rules(cells, neighbors, birth, survival):
+    """Apply the birth and survival counts to {(x, y): age} cells given their
+    count_neighbors(). Returns the next generation's cells and the born cells."""
+    new_cells = defaultdict(int)
+    births = []
+    for cell, count in neighbors.items():
+        if cell in cells:
+            # Cell is alive
+            if count in survival:
+                new_cells[cell] = cells[cell] + 1  # Increment age
+        else:
+            # Cell is dead
+            if count in birth:
+                new_cells[cell] = 1  # New born cell
+                births.append(cell)
+    return new_cells, births
+
+
+class SparseEngine:
+    """Cell storage and stepping as a dict of live cells plus a TileIndex.
+    Cost follows the number of live cells, which suits small or scattered
+    patterns anywhere on the unbounded grid."""
+    
+    name = "sparse"
+    
+    def __init__(self, cells=None):
+        self.cells = defaultdict(int)  # Sparse representation {(x, y): age}
+        self.index = TileIndex()  # Tiles of live cells, kept in sync with self.cells
+        self.view_cache = None  # Read-only (coords, ages) arrays until the cells change
+        if cells is not None:
+            self.load(cells)
+    
+    def __len__(self):
+        return len(self.cells)
+    
+    def load(self, cells):
+        """Replace all cells with a {(x, y): age} mapping or packed (coords, ages) arrays."""
+        if isinstance(cells, tuple):
+            coords, ages = cells
+            cells = zip(zip(coords[:, 0].tolist(), coords[:, 1].tolist()), ages.tolist())
+        self.cells = defaultdict(int, cells)
+        self.index = TileIndex(self.cells)
+        self.view_cache = None
+    
+    def snapshot(self, compact=False):
+        """Return a copy of the cells, packed into arrays if compact is set."""
+        return pack_cells(self.cells) if compact else dict(self.cells)
+    
+    def pack(self):
+        """Return the cells as (N x 2 int64 coords, int32 ages) arrays."""
+        return pack_cells(self.cells)
+    
+    def coords_view(self):
+        """Return the cells as read-only (coords, ages) arrays, shared between
+        callers until the cells change."""
+        if self.view_cache is None:
+            coords, ages = self.pack()
+            coords.flags.writeable = ages.flags.writeable = False
+            self.view_cache = coords, ages
+        return self.view_cache
+    
+    def to_numpy(self, bounds=None):
+        """Return the ages inside the inclusive (min_x, min_y, max_x, max_y) rect,
+        the live bounds by default, as a [y, x] array. Always a copy here."""
+        bounds = bounds or self.bounds()
+        if bounds is None:
+            return np.zeros((0, 0), dtype=np.int32)
+        return self.ages_in_rect(*bounds)
+    
+    def step(self, birth, survival, timer):
+        """Advance one generation. Returns the born and the dead cells."""
+        cells = self.cells
+        with timer.phase("step.neighbors"):
+            neighbors = count_neighbors(cells)
+        
+        with timer.phase("step.rules"):
+            new_cells, births = apply_rules(cells, neighbors, birth, survival)
+        
+        with timer.phase("step.index"):
+            # Update the tile index with just the cells that changed
+            deaths = [cell for cell in cells if cell not in new_cells]
+            self.index.update(births, deaths)
+            self.cells = new_cells
+            self.view_cache = None
+        return births, deaths
+    
+    def ages_at(self, coords):
+        """Return the ages of the cells at an N x 2 coordinate array (0 where dead)."""
+        if not self.cells:
+            return np.zeros(len(coords), dtype=np.int64)
+        get = self.cells.get
+        return np.fromiter((get(cell, 0) for cell in zip(coords[:, 0].tolist(), coords[:, 1].tolist())),
+                           dtype=np.int64, count=len(coords))
+    
+    def apply_changes(self, added, added_ages, removed):
+        """Add and remove cells given as N x 2 arrays. Returns the removed cells' ages."""
+        removed_ages = np.empty(len(removed), dtype=np.int64)
+        if len(removed):
+            pop = self.cells.pop
+            removed_ages[:] = [pop(cell) for cell in zip(removed[:, 0].tolist(), removed[:, 1].tolist())]
+            self.index.remove_many(removed[:, 0], removed[:, 1])
+        if len(added):
+            added_cells = zip(added[:, 0].tolist(), added[:, 1].tolist())
+            if np.isscalar(added_ages):
+                self.cells.update(dict.fromkeys(added_cells, added_ages))
+            else:
+                self.cells.update(zip(added_cells, np.asarray(added_ages).tolist()))
+            self.index.add_many(added[:, 0], added[:, 1])
+        self.view_cache = None
+        return removed_ages
+    
+    def clear(self):
+        """Remove all cells."""
+        self.cells.clear()
+        self.index.clear()
+        self.view_cache = None
+    
+    def bounds(self):
+        """Return (min_x, min_y, max_x, max_y) of the live cells, or None if empty."""
+        return self.index.bounds()
+    
+    def is_alive(self, x, y):
+        """Return True if the cell at the given position is alive."""
+        return (x, y) in self.cells
+    
+    def cells_in_rect(self, min_x, min_y, max_x, max_y):
+        """Yield ((x, y), age) for the live cells inside the inclusive rect."""
+        cells = self.cells
+        for cell in self.index.cells_in_rect(min_x, min_y, max_x, max_y):
+            yield cell, cells[cell]
+    
+    def coords_in_rect(self, min_x, min_y, max_x, max_y):
+        """Return the live cells inside the inclusive rect as an N x 2 array."""
+        return np.array(list(self.index.cells_in_rect(min_x, min_y, max_x, max_y)),
+                        dtype=np.int64).reshape(-1, 2)
+    
+    def ages_in_rect(self, min_x, min_y, max_x, max_y, out=None):
+        """Return the ages inside the inclusive rect as a [y, x] array (0 where dead),
+        filling `out` if given."""
+        if out is None:
+            out = np.zeros((max_y - min_y + 1, max_x - min_x + 1), dtype=np.int32)
+        else:
+            out.fill(0)
+        coords = self.coords_in_rect(min_x, min_y, max_x, max_y)
+        if len(coords):
+            out[coords[:, 1] - min_y, coords[:, 0] - min_x] = self.ages_at(coords)
+        return out
+    
+    def count_in_rect(self, min_x, min_y, max_x, max_y):
+        """Return the number of live cells inside the inclusive rect."""
+        return self.index.count_in_rect(min_x, min_y, max_x, max_y)
+    
+    def active_tiles(self):
+        """Return the number of occupied 16x16 tiles."""
+        return len(self.index.tiles)
+    
+    def memory_usage(self):
+        """Return estimated bytes for the cells and the index."""
+        return {
+            "cells": estimate_cells_bytes(self.cells),
+            "index": sys.getsizeof(self.index.tiles) + sum(sys.getsizeof(tile) for tile in self.index.tiles.values()),
+        }
+
+
+class DenseEngine:
+    """Cell storage and stepping as a NumPy array of ages covering the live
+    bounding box. Cost follows the box area, which suits dense soups."""
+    
+    name = "dense"
+    MARGIN = 16  # Empty cells kept around the live cells when the array grows
+    
+    def __init__(self, cells=None):
+        self.ages = np.zeros((0, 0), dtype=np.int32)  # Indexed [y, x], 0 where dead
+        self.left = 0  # Grid position of self.ages[0, 0]
+        self.top = 0
+        self.population = 0
+        self.cached_bounds = None
+        self.bounds_valid = True
+        self.view_cache = None  # Read-only (coords, ages) arrays until the cells change
+        self.tile_counts = np.zeros((0, 0), dtype=np.int32)  # Live cells per 16x16 tile, [tile_y, tile_x]
+        self.tile_left = 0  # Tile position of self.tile_counts[0, 0]
+        self.tile_top = 0
+        self.occupied_tiles = 0  # Tiles with a nonzero count, kept up to date by count_tiles
+        if cells is not None:
+            self.load(cells)
+    
+    def __len__(self):
+        return self.population
+    
+    def load(self, cells):
+        """Replace all cells with a {(x, y): age} mapping or packed (coords, ages) arrays."""
+        coords, ages = cells if isinstance(cells, tuple) else pack_cells(cells)
+        self.clear()
+        if len(coords):
+            self.reserve(*coords.min(axis=0).tolist(), *coords.max(axis=0).tolist())
+            self.ages[coords[:, 1] - self.top, coords[:, 0] - self.left] = ages
+            self.population = len(coords)
+            self.count_changes(coords, 1)
+    
+    def snapshot(self, compact=False):
+        """Return a copy of the cells as packed arrays."""
+        return self.pack()
+    
+    def pack(self):
+        """Return the cells as (N x 2 int64 coords, int32 ages) arrays."""
+        ys, xs = np.nonzero(self.ages)
+        coords = np.column_stack((xs + self.left, ys + self.top)).astype(np.int64)
+        return coords, self.ages[ys, xs].astype(np.int32)
+    
+    def coords_view(self):
+        """Return the cells as read-only (coords, ages) arrays, shared between
+        callers until the cells change."""
+        if self.view_cache is None:
+            coords, ages = self.pack()
+            coords.flags.writeable = ages.flags.writeable = False
+            self.view_cache = coords, ages
+        return self.view_cache
+    
+    def to_numpy(self, bounds=None):
+        """Return the ages inside the inclusive (min_x, min_y, max_x, max_y) rect,
+        the live bounds by default, as a [y, x] array.
+        
+        When the rect lies inside the engine's array this is a read-only view
+        that follows the cells as they step; it goes stale once the array is
+        regrown or shrunk, so copy it to keep a generation. Otherwise a copy."""
+        bounds = bounds or self.bounds()
+        if bounds is None:
+            return np.zeros((0, 0), dtype=np.int32)
+        min_x, min_y, max_x, max_y = bounds
+        height, width = self.ages.shape
+        x0, y0 = min_x - self.left, min_y - self.top
+        if 0 <= x0 and 0 <= y0 and max_x - self.left < width and max_y - self.top < height:
+            view = self.ages[y0:max_y - self.top + 1, x0:max_x - self.left + 1]
+            view.flags.writeable = False
+            return view
+        return self.ages_in_rect(min_x, min_y, max_x, max_y)
+    
+    def reserve(self, min_x, min_y, max_x, max_y):
+        """Grow the array (with some slack) so it covers the inclusive rect."""
+        height, width = self.ages.shape
+        if width and (self.left <= min_x and max_x < self.left + width and
+                      self.top <= min_y and max_y < self.top + height):
+            return
+        if width:
+            min_x, min_y = min(min_x, self.left), min(min_y, self.top)
+            max_x, max_y = max(max_x, self.left + width - 1), max(max_y, self.top + height - 1)
+        # Slack grows with the array so repeated growth stays amortized
+        slack_x = max(self.MARGIN, (max_x - min_x + 1) // 4)
+        slack_y = max(self.MARGIN, (max_y - min_y + 1) // 4)
+        left, top = min_x - slack_x, min_y - slack_y
+        ages = np.zeros((max_y - min_y + 1 + 2 * slack_y, max_x - min_x + 1 + 2 * slack_x), dtype=np.int32)
+        if width:
+            ages[self.top - top:self.top - top + height, self.left - left:self.left - left + width] = self.ages
+        self.ages, self.left, self.top = ages, left, top
+    
+    def shrink(self):
+        """Crop the array when it has become much larger than the live cells."""
+        bounds = self.bounds()
+        if bounds is None:
+            self.ages = np.zeros((0, 0), dtype=np.int32)
+            self.tile_counts = np.zeros((0, 0), dtype=np.int32)
+            return
+        min_x, min_y, max_x, max_y = bounds
+        width = max_x - min_x + 1 + 2 * self.MARGIN
+        height = max_y - min_y + 1 + 2 * self.MARGIN
+        if self.ages.size > 4 * width * height:
+            left, top = min_x - self.MARGIN, min_y - self.MARGIN
+            self.ages = self.ages[top - self.top:top - self.top + height,
+                                  left - self.left:left - self.left + width].copy()
+            self.left, self.top = left, top
+            self.crop_tiles()
+    
+    def crop_tiles(self):
+        """Crop the per-tile count grid to the tiles covering the cell array;
+        the tiles outside it hold no live cells."""
+        shift = TileIndex.TILE_SHIFT
+        height, width = self.ages.shape
+        left, top = self.left >> shift, self.top >> shift
+        right, bottom = (self.left + width - 1) >> shift, (self.top + height - 1) >> shift
+        x0, y0 = max(left - self.tile_left, 0), max(top - self.tile_top, 0)
+        self.tile_counts = self.tile_counts[y0:bottom - self.tile_top + 1, x0:right - self.tile_left + 1].copy()
+        self.tile_left += x0
+        self.tile_top += y0
+    
+    def step(self, birth, survival, timer):
+        """Advance one generation. Returns the born and the dead cells."""
+        bounds = self.bounds()
+        if bounds is None:
+            empty = np.empty((0, 2), dtype=np.int64)
+            return empty, empty
+        min_x, min_y, max_x, max_y = bounds
+        
+        with timer.phase("step.neighbors"):
+            # Only the live bounding box plus a one cell border can change
+            self.reserve(min_x - 1, min_y - 1, max_x + 1, max_y + 1)
+            x0, y0 = min_x - 1 - self.left, min_y - 1 - self.top
+            ages = self.ages[y0:max_y + 2 - self.top, x0:max_x + 2 - self.left]
+            alive = ages > 0
+            padded = np.pad(alive.view(np.uint8), 1)
+            counts = (padded[:-2, :-2] + padded[:-2, 1:-1] + padded[:-2, 2:] +
+                      padded[1:-1, :-2] + padded[1:-1, 2:] +
+                      padded[2:, :-2] + padded[2:, 1:-1] + padded[2:, 2:])
+        
+        with timer.phase("step.rules"):
+            # Rule lookup tables; like the sparse engine, cells without live neighbors are never born
+            birth_table = np.zeros(9, dtype=bool)
+            birth_table[[count for count in birth if 0 < count <= 8]] = True
+            survival_table = np.zeros(9, dtype=bool)
+            survival_table[[count for count in survival if count <= 8]] = True
+            born = birth_table[counts] & ~alive
+            survives = survival_table[counts] & alive
+            died = alive & ~survives
+            
+            born_ys, born_xs = np.nonzero(born)
+            died_ys, died_xs = np.nonzero(died)
+            ages += survives  # Increment age
+            ages[died] = 0
+            ages[born] = 1  # New born cells
+        
+        with timer.phase("step.index"):
+            self.population += len(born_xs) - len(died_xs)
+            # Births and deaths stay inside the reserved box, so one reserve covers both
+            self.reserve_tiles(min_x - 1, min_y - 1, max_x + 1, max_y + 1)
+            self.count_tiles(born_xs, born_ys, 1, min_x - 1, min_y - 1)
+            self.count_tiles(died_xs, died_ys, -1, min_x - 1, min_y - 1)
+            self.invalidate_bounds()
+            self.shrink()
+        births = np.column_stack((born_xs + min_x - 1, born_ys + min_y - 1))
+        deaths = np.column_stack((died_xs + min_x - 1, died_ys + min_y - 1))
+        return births, deaths
+    
+    def invalidate_bounds(self):
+        """Forget the cached bounds and coordinate view after the cells changed."""
+        self.bounds_valid = False
+        self.view_cache = None
+    
+    def bounds(self):
+        """Return (min_x, min_y, max_x, max_y) of the live cells, or None if empty."""
+        if not self.bounds_valid:
+            self.bounds_valid = True
+            self.cached_bounds = None
+            if self.population:
+                rows = np.flatnonzero(self.ages.any(axis=1))
+                columns = np.flatnonzero(self.ages.any(axis=0))
+                self.cached_bounds = (int(columns[0]) + self.left, int(rows[0]) + self.top,
+                                      int(columns[-1]) + self.left, int(rows[-1]) + self.top)
+        return self.cached_bounds
+    
+    def ages_at(self, coords):
+        """Return the ages of the cells at an N x 2 coordinate array (0 where dead)."""
+        ages = np.zeros(len(coords), dtype=np.int64)
+        height, width = self.ages.shape
+        xs, ys = coords[:, 0] - self.left, coords[:, 1] - self.top
+        inside = (xs >= 0) & (xs < width) & (ys >= 0) & (ys < height)
+        ages[inside] = self.ages[ys[inside], xs[inside]]
+        return ages
+    
+    def apply_changes(self, added, added_ages, removed):
+        """Add and remove cells given as N x 2 arrays. Returns the removed cells' ages."""
+        removed_ages = np.empty(len(removed), dtype=np.int64)
+        if len(removed):
+            ys, xs = removed[:, 1] - self.top, removed[:, 0] - self.left
+            removed_ages[:] = self.ages[ys, xs]
+            self.ages[ys, xs] = 0
+        if len(added):
+            self.reserve(*added.min(axis=0).tolist(), *added.max(axis=0).tolist())
+            self.ages[added[:, 1] - self.top, added[:, 0] - self.left] = added_ages
+        self.population += len(added) - len(removed)
+        self.count_changes(added, 1)
+        self.count_changes(removed, -1)
+        self.invalidate_bounds()
+        return removed_ages
+    
+    def clear(self):
+        """Remove all cells."""
+        self.ages = np.zeros((0, 0), dtype=np.int32)
+        self.population = 0
+        self.tile_counts = np.zeros((0, 0), dtype=np.int32)
+        self.tile_left = self.tile_top = 0
+        self.occupied_tiles = 0
+        self.invalidate_bounds()
+    
+    def reserve_tiles(self, min_x, min_y, max_x, max_y):
+        """Grow the per-tile count grid so it covers the inclusive cell rect."""
+        shift = TileIndex.TILE_SHIFT
+        min_tx, min_ty, max_tx, max_ty = min_x >> shift, min_y >> shift, max_x >> shift, max_y >> shift
+        height, width = self.tile_counts.shape
+        if (width and min_tx >= self.tile_left and min_ty >= self.tile_top and
+                max_tx < self.tile_left + width and max_ty < self.tile_top + height):
+            return
+        # Keep a few spare tiles on every side, like reserve does for the cells
+        margin = 4
+        if width:
+            min_tx, min_ty = min(min_tx, self.tile_left), min(min_ty, self.tile_top)
+            max_tx, max_ty = max(max_tx, self.tile_left + width - 1), max(max_ty, self.tile_top + height - 1)
+        left, top = min_tx - margin, min_ty - margin
+        counts = np.zeros((max_ty + margin - top + 1, max_tx + margin - left + 1), dtype=np.int32)
+        counts[self.tile_top - top:self.tile_top - top + height,
+               self.tile_left - left:self.tile_left - left + width] = self.tile_counts
+        self.tile_counts, self.tile_left, self.tile_top = counts, left, top
+    
+    def count_tiles(self, xs, ys, delta, x_offset=0, y_offset=0):
+        """Add delta to the per-tile counts of the cells at (xs + x_offset, ys + y_offset).
+        The tile grid must already cover the cells. Costs a pass over the changed
+        cells and the span of tiles they fall in, never over the whole box."""
+        if not len(xs):
+            return
+        shift = TileIndex.TILE_SHIFT
+        # Shift to positions relative to the tile grid in place, so no temporaries pile up
+        tile_xs = xs + (x_offset - (self.tile_left << shift))
+        tile_xs >>= shift
+        flat = ys + (y_offset - (self.tile_top << shift))
+        flat >>= shift
+        flat *= self.tile_counts.shape[1]
+        flat += tile_xs
+        # Count per tile over just the span of grid entries the cells fall in, then
+        # update and compare only the touched tiles
+        low = int(flat.min())
+        flat -= low
+        changes = np.bincount(flat)
+        keys = np.flatnonzero(changes)
+        counts = self.tile_counts.reshape(-1)
+        touched = counts[keys + low]
+        before = np.count_nonzero(touched)
+        touched += delta * changes[keys].astype(np.int32)
+        counts[keys + low] = touched
+        self.occupied_tiles += int(np.count_nonzero(touched)) - before
+    
+    def count_changes(self, coords, delta):
+        """Add delta to the per-tile counts of the cells in an N x 2 array."""
+        if len(coords):
+            self.reserve_tiles(*coords.min(axis=0).tolist(), *coords.max(axis=0).tolist())
+            self.count_tiles(coords[:, 0], coords[:, 1], delta)
+    
+    def clip(self, min_x, min_y, max_x, max_y):
+        """Return the part of the array inside the inclusive rect and its grid origin."""
+        height, width = self.ages.shape
+        x0, y0 = max(min_x - self.left, 0), max(min_y - self.top, 0)
+        x1, y1 = min(max_x - self.left + 1, width), min(max_y - self.top + 1, height)
+        if x0 >= x1 or y0 >= y1:
+            return self.ages[:0, :0], 0, 0
+        return self.ages[y0:y1, x0:x1], x0 + self.left, y0 + self.top
+    
+    def is_alive(self, x, y):
+        """Return True if the cell at the given position is alive."""
+        height, width = self.ages.shape
+        x, y = x - self.left, y - self.top
+        return 0 <= x < width and 0 <= y < height and self.ages[y, x] > 0
+    
+    def cells_in_rect(self, min_x, min_y, max_x, max_y):
+        """Yield ((x, y), age) for the live cells inside the inclusive rect."""
+        ages, left, top = self.clip(min_x, min_y, max_x, max_y)
+        ys, xs = np.nonzero(ages)
+        yield from zip(zip((xs + left).tolist(), (ys + top).tolist()), ages[ys, xs].tolist())
+    
+    def coords_in_rect(self, min_x, min_y, max_x, max_y):
+        """Return the live cells inside the inclusive rect as an N x 2 array."""
+        ages, left, top = self.clip(min_x, min_y, max_x, max_y)
+        ys, xs = np.nonzero(ages)
+        return np.column_stack((xs + left, ys + top)).astype(np.int64)
+    
+    def ages_in_rect(self, min_x, min_y, max_x, max_y, out=None):
+        """Return the ages inside the inclusive rect as a [y, x] array (0 where dead),
+        filling `out` if given."""
+        if out is None:
+            out = np.zeros((max_y - min_y + 1, max_x - min_x + 1), dtype=np.int32)
+        else:
+            out.fill(0)
+        ages, left, top = self.clip(min_x, min_y, max_x, max_y)
+        if ages.size:
+            height, width = ages.shape
+            out[top - min_y:top - min_y + height, left - min_x:left - min_x + width] = ages
+        return out
+    
+    def count_in_rect(self, min_x, min_y, max_x, max_y):
+        """Return the number of live cells inside the inclusive rect."""
+        return int(np.count_nonzero(self.clip(min_x, min_y, max_x, max_y)[0]))
+    
+    def active_tiles(self):
+        """Return the number of occupied 16x16 tiles (aligned like TileIndex tiles)."""
+        return self.occupied_tiles
+    
+    def memory_usage(self):
+        """Return estimated bytes for the cells and the per-tile counts."""
+        return {"cells": self.ages.nbytes, "index": self.tile_counts.nbytes}
+
+
+ENGINES = {engine.name: engine for engine in (SparseEngine, DenseEngine)}
+
+
+# Vectorized pattern generators, returning N x 2 int64 coordinate arrays that
+# can be placed in bulk with GameOfLife.set_cells() (see GameOfLife.generate)
+
+def cell_list(coords):
+    """Convert an N x 2 coordinate array to the [(x, y)] lists of the pattern library."""
+    return list(map(tuple, np.asarray(coords, dtype=np.int64).tolist()))
+
+
+def lattice(columns, rows, spacing_x, spacing_y=None):
+    """Return the offsets of a columns x rows lattice as an N x 2 array, column by column."""
+    spacing_y = spacing_x if spacing_y is None else spacing_y
+    xs, ys = np.meshgrid(np.arange(columns) * spacing_x, np.arange(rows) * spacing_y, indexing="ij")
+    return np.column_stack((xs.ravel(), ys.ravel())).astype(np.int64)
+
+
+def place_copies(cells, offsets):
+    """Return a copy of the cells at every offset as one N x 2 array, copy by copy."""
+    cells = np.asarray(cells, dtype=np.int64).reshape(-1, 2)
+    offsets = np.asarray(offsets, dtype=np.int64).reshape(-1, 2)
+    return (offsets[:, None, :] + cells[None, :, :]).reshape(-1, 2)
+
+
+def gun_array(gun, columns, rows, spacing=50):
+    """Return a columns x rows array of copies of a gun, spacing cells apart."""
+    return place_copies(gun, lattice(columns, rows, spacing))
+
+
+def spaceship_fleet(count, ship="Glider", direction="SE", spacing=10):
+    """Return count copies of a standard spaceship (see STANDARD_SPACESHIPS) in a
+    square formation, all flying in the same direction (one of
+    SpaceshipReaper.DIRECTIONS that the ship can fly in), so they never collide."""
+    heading = {name: vector for vector, name in SpaceshipReaper.DIRECTIONS.items()}.get(direction)
+    form = next((form for form, value in spaceship_shapes("B3/S23").items() if value == (ship, heading)), None)
+    if form is None:
+        raise ValueError(f"No {ship} flies {direction}")
+    columns = max(1, math.ceil(math.sqrt(count)))
+    return place_copies(form, lattice(columns, -(-count // columns), spacing)[:count])
+
+
+def random_soup(width, height, density=0.5, seed=None):
+    """Return a width x height random soup of the given density. The same seed
+    always gives the same soup."""
+    rng = np.random.default_rng(seed)
+    ys, xs = np.nonzero(rng.random((height, width), dtype=np.float32) < density)
+    return np.column_stack((xs, ys)).astype(np.int64)
+
+
+class ActivityHeatmap:
+    """Counts how often each cell flipped, stored per 16x16 tile (aligned like
+    TileIndex tiles) as uint16 counters: a cumulative count and a recent count
+    that halves every half_life generations. It is only fed each generation's
+    births and deaths, and a tile's decay is applied lazily when it is touched
+    or read, so the cost follows the number of changes, not the population."""
+    
+    RECENT_WEIGHT = 256  # Fixed-point weight of one flip in the recent counters
+    MAX_COUNT = 0xFFFF  # Counters saturate instead of wrapping
+    
+    def __init__(self, half_life=32):
+        self.half_life = half_life
+        self.tiles = {}  # {(tx, ty): (2, 16, 16) uint16 [cumulative, recent] counters indexed [y, x]}
+        self.decayed = {}  # {(tx, ty): generation the recent counters were last decayed to}
+        self.generation = 0
+        self.bounds = None  # Grid bounds of every tile touched so far
+    
+    def clear(self):
+        """Forget all activity."""
+        self.tiles.clear()
+        self.decayed.clear()
+        self.bounds = None
+    
+    def decay(self, key, recent, generation):
+        """Return the recent counters of a tile decayed to the given generation."""
+        elapsed = generation - self.decayed[key]
+        if not elapsed:
+            return recent
+        return (recent * 0.5 ** (elapsed / self.half_life)).astype(np.uint16)
+    
+    def record(self, births, deaths, generation):
+        """Count the flips of one generation (N x 2 arrays or (x, y) lists)."""
+        self.generation = generation
+        coords = np.concatenate([np.asarray(cells, dtype=np.int64).reshape(-1, 2) for cells in (births, deaths)])
+        if not len(coords):
+            return
+        shift = TileIndex.TILE_SHIFT
+        size, mask = 1 << shift, (1 << shift) - 1
+        
+        # Group the flips by tile and count them per cell of each tile
+        txs, tys = coords[:, 0] >> shift, coords[:, 1] >> shift
+        keys = (txs << 32) | (tys & 0xFFFFFFFF)
+        _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        cells = (coords[:, 1] & mask) * size + (coords[:, 0] & mask)
+        flips = np.bincount(inverse * size * size + cells, minlength=len(first) * size * size)
+        flips = flips.reshape(len(first), size, size)
+        
+        tiles, decayed = self.tiles, self.decayed
+        for key, counts in zip(zip(txs[first].tolist(), tys[first].tolist()), flips):
+            tile = tiles.get(key)
+            if tile is None:
+                tile = tiles[key] = np.zeros((2, size, size), dtype=np.uint16)
+                recent = tile[1]
+            else:
+                recent = self.decay(key, tile[1], generation)
+            decayed[key] = generation
+            tile[0] = np.minimum(tile[0] + counts, self.MAX_COUNT)
+            tile[1] = np.minimum(recent + counts * self.RECENT_WEIGHT, self.MAX_COUNT)
+        
+        min_tx, min_ty = txs.min() << shift, tys.min() << shift
+        max_tx, max_ty = (txs.max() << shift) + mask, (tys.max() << shift) + mask
+        if self.bounds:
+            min_tx, min_ty = min(min_tx, self.bounds[0]), min(min_ty, self.bounds[1])
+            max_tx, max_ty = max(max_tx, self.bounds[2]), max(max_ty, self.bounds[3])
+        self.bounds = (int(min_tx), int(min_ty), int(max_tx), int(max_ty))
+    
+    def levels_in_rect(self, min_x, min_y, max_x, max_y, recent=True):
+        """Return the activity inside the inclusive rect as a [y, x] uint8 array of
+        colormap levels on a log scale (0 = no flips, 255 = saturated counter)."""
+        counts = np.zeros((max_y - min_y + 1, max_x - min_x + 1), dtype=np.float32)
+        shift = TileIndex.TILE_SHIFT
+        size = 1 << shift
+        min_tx, min_ty, max_tx, max_ty = min_x >> shift, min_y >> shift, max_x >> shift, max_y >> shift
+        if (max_tx - min_tx + 1) * (max_ty - min_ty + 1) <= len(self.tiles):
+            keys = ((tx, ty) for tx in range(min_tx, max_tx + 1) for ty in range(min_ty, max_ty + 1))
+            keys = [key for key in keys if key in self.tiles]
+        else:
+            keys = [(tx, ty) for tx, ty in self.tiles if min_tx <= tx <= max_tx and min_ty <= ty <= max_ty]
+        for key in keys:
+            tile = self.tiles[key]
+            values = self.decay(key, tile[1], self.generation) if recent else tile[0]
+            # Clip the tile to the rect
+            left, top = key[0] << shift, key[1] << shift
+            x0, y0 = max(min_x - left, 0), max(min_y - top, 0)
+            x1, y1 = min(max_x - left + 1, size), min(max_y - top + 1, size)
+            counts[top + y0 - min_y:top + y1 - min_y, left + x0 - min_x:left + x1 - min_x] = values[y0:y1, x0:x1]
+        
+        # Log scale of the flips, so cells that flipped a few times stay visible next
+        # to hot spots; the recent counters are fixed point and saturate sooner
+        weight = self.RECENT_WEIGHT if recent else 1
+        if weight != 1:
+            counts /= weight
+        np.log2(counts + 1, out=counts)
+        counts *= 255 / np.log2(self.MAX_COUNT / weight + 1)
+        return counts.astype(np.uint8)
+
+
+class EventSubscription:
+    """A consumer's bounded queue of (generation, births, deaths) events published
+    by GameOfLife.step(), with births and deaths as read-only N x 2 int64 arrays.
+    
+    Events can be taken one at a time (get), all at once (drain) or by iterating,
+    which blocks until the next event and ends once the subscription is closed.
+    A consumer that falls more than capacity events behind loses the oldest ones,
+    counted in dropped, so a slow consumer never holds up or bloats the simulation."""
+    
+    def __init__(self, game, capacity=256):
+        import threading
+        self.game = game
+        self.events = deque(maxlen=capacity)
+        self.dropped = 0  # Events discarded because the queue was full
+        self.closed = False
+        self.condition = threading.Condition()
+    
+    def publish(self, event):
+        """Queue an event, dropping the oldest one if the queue is full."""
+        with self.condition:
+            if len(self.events) == self.events.maxlen:
+                self.dropped += 1
+            self.events.append(event)
+            self.condition.notify()
+    
+    def get(self, timeout=None):
+        """Return the oldest pending event, waiting up to timeout seconds (forever
+        if None). Returns None on timeout or once closed and empty."""
+        with self.condition:
+            self.condition.wait_for(lambda: self.events or self.closed, timeout)
+            return self.events.popleft() if self.events else None
+    
+    def drain(self):
+        """Return all pending events without waiting."""
+        with self.condition:
+            events = list(self.events)
+            self.events.clear()
+            return events
+    
+    def __iter__(self):
+        while True:
+            event = self.get()
+            if event is None:
+                return
+            yield event
+    
+    def close(self):
+        """Stop receiving events and wake up a waiting consumer."""
+        self.game.unsubscribe(self)
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+
 
 class GameOfLife:
     """Core game logic handling the cellular automaton simulation."""
     
+    # Modes for set_cells() and add_pattern()
+    OR = "or"  # Make the cells alive
+    XOR = "xor"  # Toggle the cells
+    AND_NOT = "and_not"  # Make the cells dead
+    REPLACE = "replace"  # Inside the cells' bounding box, make exactly these cells alive
+    PLACEMENT_MODES = (OR, XOR, AND_NOT, REPLACE)
+    
+    # Automatic engine selection, see select_engine()
+    ENGINE_MODES = ("auto",) + tuple(ENGINES)
+    ENGINE_STEP_COSTS = {"sparse": 1500.0, "dense": 15.0}  # Initial ns per live cell / per box cell
+    DENSE_STEP_OVERHEAD_NS = 60000  # Fixed cost of a dense step, whatever the size
+    DENSE_MAX_AREA = 16 * 1024 * 1024  # Never go dense beyond this many box cells
+    ENGINE_SWITCH_RATIO = 2.0  # The other engine has to look this much cheaper...
+    ENGINE_SWITCH_STEPS = 8  # ...for this many consecutive steps before migrating
+    
     def __init__(self, rules="B3/S23"):
-        self.cells = defaultdict(int)  # Sparse representation {(x, y): age}
+        self.engine = SparseEngine()  # Cell storage and stepping backend
+        self.engine_mode = "auto"  # "auto" or a fixed engine name from ENGINES
+        self.engine_votes = 0  # Consecutive steps in which the other engine looked cheaper
+        self.step_costs = dict(self.ENGINE_STEP_COSTS)  # Learned from the engines' recent steps
         self.generation = 0
         self.rules = self.parse_rules(rules)
         self.rule_string = rules
-        self.history = [dict()]  # For undo/redo functionality, start with empty state
-        self.history_position = 0
+        self.history = []  # Undo/redo entries, oldest first (see record())
+        self.history_position = 0  # Number of entries currently applied
+        self.edit_group = None  # Open entry collecting several edits, see begin_edit()
         self.max_history = 100
+        self.compact_snapshots = False  # Store step snapshots as packed arrays (see compact_history)
+        self.dirty_bounds = []  # Grid rects (min_x, min_y, max_x, max_y) changed since the last redraw
+        self.dirty_all = True
+        self.statistics = StatisticsTracker()  # Filled in by step()
+        self.heatmap = None  # ActivityHeatmap fed by step() while enabled
+        self.reaper = None  # SpaceshipReaper run by step() while enabled
+        self.subscribers = []  # EventSubscriptions receiving every generation's births and deaths
+        self.timer = PhaseTimer()  # Per-phase timings, disabled by default
         self.patterns = self.initialize_patterns()
         self.pattern_categories = self.categorize_patterns()
+        self.oriented_patterns = {}  # {(name, rotation, flip): cells}
         
     def initialize_patterns(self):
         """Initialize a dictionary of built-in patterns."""
@@ -271,39 +1143,22 @@ class GameOfLife:
         # NEW ADVANCED PATTERNS
         
         # Breeder 1 - First pattern with quadratic growth (simplified version)
-        patterns["Breeder 1"] = []
-        # Main puffer engine
+        # Main puffer engine, 5 copies 20 cells apart
         puffer_base = [(0, 0), (1, 0), (2, 0), (0, 1), (3, 1), (0, 2), (4, 2), (0, 3), (4, 3), (1, 4), (3, 4)]
-        for i in range(5):
-            for x, y in puffer_base:
-                patterns["Breeder 1"].append((x, y + i*20))
         
-        # Add gun mechanisms along the puffer's path
+        # Add gun mechanisms along the puffer's path, 3 copies 25 cells apart
         gun_base = [
             (10, 0), (11, 0), (10, 1), (11, 1),  # Block
             (20, 2), (21, 2), (19, 3), (23, 3), (18, 4), (24, 4),
             (18, 5), (24, 5), (21, 5), (19, 6), (23, 6), (20, 7), (21, 7), (22, 7)
         ]
-        for i in range(3):
-            for x, y in gun_base:
-                patterns["Breeder 1"].append((x, y + i*25))
+        patterns["Breeder 1"] = cell_list(np.concatenate((
+            place_copies(puffer_base, lattice(1, 5, 0, 20)),
+            place_copies(gun_base, lattice(1, 3, 0, 25)))))
         
         # Multi-Engine Spaceship Factory - Complex pattern that creates multiple HWSS
-        patterns["Multi-Engine Spaceship Factory"] = []
-        # First gun
-        gun1 = patterns["Glider Gun"]
-        for x, y in gun1:
-            patterns["Multi-Engine Spaceship Factory"].append((x, y))
-        
-        # Second gun at an offset
-        gun2 = patterns["Glider Gun"]
-        for x, y in gun2:
-            patterns["Multi-Engine Spaceship Factory"].append((x + 50, y + 20))
-        
-        # Third gun at another offset
-        gun3 = patterns["Glider Gun"]
-        for x, y in gun3:
-            patterns["Multi-Engine Spaceship Factory"].append((x + 25, y + 40))
+        # Three guns at different offsets
+        guns = place_copies(patterns["Glider Gun"], [(0, 0), (50, 20), (25, 40)])
         
         # Add reflectors and converters to turn gliders into spaceships
         reflector = [(0, 0), (1, 0), (2, 0), (0, 1), (3, 1), (0, 2), (3, 2), (1, 3), (2, 3)]
@@ -315,12 +1170,10 @@ class GameOfLife:
             (1, 4), (2, 4)
         ]
         
-        # Add reflectors at strategic positions
-        for i, pos in enumerate([(40, 10), (90, 30), (65, 50)]):
-            for x, y in reflector:
-                patterns["Multi-Engine Spaceship Factory"].append((x + pos[0], y + pos[1]))
-            for x, y in converter:
-                patterns["Multi-Engine Spaceship Factory"].append((x + pos[0] + 15, y + pos[1] + 5))
+        # Add reflectors at strategic positions, each with a converter next to it
+        positions = np.array([(40, 10), (90, 30), (65, 50)])
+        patterns["Multi-Engine Spaceship Factory"] = cell_list(np.concatenate((
+            guns, place_copies(reflector, positions), place_copies(converter, positions + (15, 5)))))
         
         # Simple Computer Memory - Sliding block memory
         patterns["Simple Computer Memory"] = []
@@ -440,18 +1293,12 @@ class GameOfLife:
             patterns["Quad-Gun"].append((-y + 40, x))
         
         # 3D Illusion - Pattern that creates an illusion of 3D movement
-        patterns["3D Illusion"] = []
-        
-        # Create concentric oscillators
-        for i in range(5):
-            radius = i * 5 + 5
-            for j in range(8):  # 8 points around circle
-                angle = j * 3.14159 / 4  # 45 degree increments
-                x = int(radius * math.cos(angle))
-                y = int(radius * math.sin(angle))
-                patterns["3D Illusion"].append((x + 25, y + 25))
-                patterns["3D Illusion"].append((x + 26, y + 25))
-                patterns["3D Illusion"].append((x + 25, y + 26))
+        # Create concentric oscillators: 5 rings of 8 points (45 degree increments)
+        radii = np.arange(5)[:, None] * 5 + 5
+        angles = np.arange(8) * 3.14159 / 4
+        points = np.column_stack((np.trunc(radii * np.cos(angles)).ravel(),
+                                  np.trunc(radii * np.sin(angles)).ravel()))
+        patterns["3D Illusion"] = cell_list(place_copies([(25, 25), (26, 25), (25, 26)], points))
         
         # Replicator - A pattern that replicates itself
         patterns["Replicator"] = []
@@ -468,15 +1315,8 @@ class GameOfLife:
             patterns["Replicator"].append((x, y))
         
         # Mega Gun Array - Large array of guns creating massive glider streams
-        patterns["Mega Gun Array"] = []
-        
         # Create a 3x3 grid of guns
-        for i in range(3):
-            for j in range(3):
-                gun_offset_x = i * 50
-                gun_offset_y = j * 50
-                for x, y in patterns["Glider Gun"]:
-                    patterns["Mega Gun Array"].append((x + gun_offset_x, y + gun_offset_y))
+        guns = gun_array(patterns["Glider Gun"], 3, 3, 50)
         
         # Add eaters at various positions to create interesting patterns
         eater_positions = [
@@ -484,10 +1324,8 @@ class GameOfLife:
             (45, 65), (145, 65),
             (45, 115), (95, 115), (145, 115)
         ]
-        
-        for pos in eater_positions:
-            for x, y in patterns["Glider Eater"]:
-                patterns["Mega Gun Array"].append((x + pos[0], y + pos[1]))
+        patterns["Mega Gun Array"] = cell_list(np.concatenate((
+            guns, place_copies(patterns["Glider Eater"], eater_positions))))
         
         # Universal Computer - Simplified version of a universal computer design
         patterns["Universal Computer"] = []
@@ -577,96 +1415,349 @@ class GameOfLife:
     
     def parse_rules(self, rule_string):
         """Parse rule string like B3/S23 into birth and survival conditions."""
-        birth = []
-        survival = []
-        
-        parts = rule_string.split('/')
-        if len(parts) == 2:
-            if parts[0].startswith('B'):
-                birth = [int(c) for c in parts[0][1:] if c.isdigit()]
-            if parts[1].startswith('S'):
-                survival = [int(c) for c in parts[1][1:] if c.isdigit()]
-        
-        return {"birth": birth, "survival": survival}
+        birth, survival = parse_rule_sets(rule_string)
+        return {"birth": sorted(birth), "survival": sorted(survival)}
     
     def step(self):
-        """Advance the simulation by one generation."""
-        # Save current state to history
-        if len(self.history) >= self.max_history:
-            self.history.pop(0)
-            self.history_position -= 1
-        
-        if self.history_position < len(self.history) - 1:
-            self.history = self.history[:self.history_position + 1]
-        
-        self.history.append(dict(self.cells))
-        self.history_position = len(self.history) - 1
+        """Advance the simulation by one generation.
+        Returns the born and the dead cells, as (x, y) lists or N x 2 arrays depending
+        on the engine. Cells removed by the reaper are included in the deaths."""
+        timer = self.timer
+        with timer.phase("step.history"):
+            # Save current state to history
+            if self.max_history:
+                self.record({
+                    "type": "step",
+                    "before": self.snapshot(),
+                    "generation": self.generation,
+                    "generation_after": self.generation + 1
+                })
+            old_bounds = self.get_bounds()
         
         # Calculate next generation
-        neighbors = defaultdict(int)
-        
-        # Count neighbors for all cells
-        for (x, y) in self.cells:
-            for dx in [-1, 0, 1]:
-                for dy in [-1, 0, 1]:
-                    if dx == 0 and dy == 0:
-                        continue
-                    neighbors[(x + dx, y + dy)] += 1
-        
-        # Apply rules
-        new_cells = defaultdict(int)
-        for cell, count in neighbors.items():
-            if cell in self.cells:
-                # Cell is alive
-                if count in self.rules["survival"]:
-                    new_cells[cell] = self.cells[cell] + 1  # Increment age
-            else:
-                # Cell is dead
-                if count in self.rules["birth"]:
-                    new_cells[cell] = 1  # New born cell
-        
-        self.cells = new_cells
+        start = time.perf_counter_ns()
+        births, deaths = self.engine.step(self.rules["birth"], self.rules["survival"], timer)
+        cost = time.perf_counter_ns() - start
         self.generation += 1
         
+        if self.reaper is not None and self.generation % self.reaper.check_every == 0:
+            with timer.phase("step.reap"):
+                reaped = self.reaper.reap(self)
+                if len(reaped):
+                    self.apply_changes(np.empty((0, 2), dtype=np.int64), 1, reaped)
+                    births, deaths = self.fold_reaped(births, deaths, reaped)
+        
+        with timer.phase("step.bookkeeping"):
+            # Every live cell ages, so the whole old and new extent has to be redrawn
+            new_bounds = self.get_bounds()
+            for bounds in (old_bounds, new_bounds):
+                if bounds:
+                    self.mark_dirty(*bounds)
+            
+            # The engines keep their occupied tile counts up to date while stepping
+            self.statistics.record(self.generation, len(self.engine), len(births), len(deaths),
+                                   new_bounds, self.engine.active_tiles(),
+                                   self.reaper.total if self.reaper else 0)
+            if self.heatmap is not None:
+                self.heatmap.record(births, deaths, self.generation)
+            
+            if self.engine_mode == "auto":
+                self.select_engine(cost, new_bounds)
+        
+        if self.subscribers:
+            with timer.phase("step.events"):
+                self.publish(births, deaths)
+        timer.tick("generation")
+        return births, deaths
+    
+    def subscribe(self, capacity=256):
+        """Return an EventSubscription that receives the births and deaths of every
+        following generation. Without subscribers step() does no extra work."""
+        subscription = EventSubscription(self, capacity)
+        self.subscribers.append(subscription)
+        return subscription
+    
+    def unsubscribe(self, subscription):
+        """Stop publishing events to a subscription."""
+        if subscription in self.subscribers:
+            self.subscribers.remove(subscription)
+    
+    @staticmethod
+    def fold_reaped(births, deaths, reaped):
+        """Return one generation's births and deaths as N x 2 arrays with the cells
+        the reaper removed counted as deaths (or, if born this generation, as never
+        born), so consumers can mirror the cells by applying them."""
+        births, deaths = (np.array(cells, dtype=np.int64).reshape(-1, 2) for cells in (births, deaths))
+        born_keys = (births[:, 0] << 32) | (births[:, 1] & 0xFFFFFFFF)
+        reaped_keys = (reaped[:, 0] << 32) | (reaped[:, 1] & 0xFFFFFFFF)
+        born = np.isin(reaped_keys, born_keys)
+        return births[~np.isin(born_keys, reaped_keys)], np.concatenate((deaths, reaped[~born]))
+    
+    def publish(self, births, deaths):
+        """Send one generation's changes (as returned by step()) to all subscribers."""
+        changes = [np.array(cells, dtype=np.int64).reshape(-1, 2) for cells in (births, deaths)]
+        for cells in changes:
+            cells.flags.writeable = False  # Shared by all subscribers
+        event = (self.generation, changes[0], changes[1])
+        for subscription in self.subscribers:
+            subscription.publish(event)
+    
+    def engine_work(self, name, bounds):
+        """Return the work one step costs the named engine: live cells for the
+        sparse engine, bounding box cells (plus border) for the dense one."""
+        if name == "sparse":
+            return len(self.engine)
+        min_x, min_y, max_x, max_y = bounds
+        return (max_x - min_x + 3) * (max_y - min_y + 3)
+    
+    def engine_bytes(self, name):
+        """Estimate the bytes the named engine needs for the current cells: the
+        dict and index entries per live cell for the sparse engine, four bytes
+        per cell of the bounding box (plus margins) for the dense one."""
+        if name == self.engine.name:
+            return sum(self.engine.memory_usage().values())
+        if name == "sparse":
+            return len(self.engine) * SPARSE_CELL_BYTES
+        bounds = self.get_bounds()
+        if bounds is None:
+            return 0
+        min_x, min_y, max_x, max_y = bounds
+        margin = 2 * DenseEngine.MARGIN
+        return (max_x - min_x + 1 + margin) * (max_y - min_y + 1 + margin) * np.dtype(np.int32).itemsize
+    
+    def select_engine(self, cost, bounds):
+        """Learn the active engine's step cost and migrate to the other engine
+        once it has looked clearly cheaper for several consecutive steps."""
+        if bounds is None:
+            self.engine_votes = 0
+            return
+        current = self.engine.name
+        other = "dense" if current == "sparse" else "sparse"
+        work = {name: self.engine_work(name, bounds) for name in ENGINES}
+        overhead = {"sparse": 0, "dense": self.DENSE_STEP_OVERHEAD_NS}
+        
+        # Moving average of the measured cost per unit of work
+        if work[current]:
+            measured = max(cost - overhead[current], 0) / work[current]
+            self.step_costs[current] += 0.2 * (measured - self.step_costs[current])
+        predicted = {name: overhead[name] + self.step_costs[name] * work[name] for name in ENGINES}
+        
+        if work["dense"] > self.DENSE_MAX_AREA:
+            cheaper = other == "sparse"
+        else:
+            cheaper = predicted[other] * self.ENGINE_SWITCH_RATIO < predicted[current]
+        self.engine_votes = self.engine_votes + 1 if cheaper else 0
+        if self.engine_votes >= self.ENGINE_SWITCH_STEPS:
+            self.migrate_engine(other)
+    
+    def migrate_engine(self, name):
+        """Move the cells into a new engine of the given name."""
+        if name != self.engine.name:
+            self.engine = ENGINES[name](self.engine.pack())
+        self.engine_votes = 0
+    
+    def set_engine(self, mode):
+        """Select "auto" or a fixed engine ("sparse" or "dense")."""
+        if mode not in self.ENGINE_MODES:
+            raise ValueError(f"Unknown engine: {mode}")
+        self.engine_mode = mode
+        if mode != "auto":
+            self.migrate_engine(mode)
+        self.engine_votes = 0
+    
+    def population(self):
+        """Return the number of live cells."""
+        return len(self.engine)
+    
+    def set_reaper(self, margin=None, region=None, check_every=8):
+        """Start removing escaping spaceships (see SpaceshipReaper) outside region,
+        by default the current live bounds grown by margin cells. With neither
+        given the reaper is switched off."""
+        if margin is None and region is None:
+            self.reaper = None
+            return
+        if region is None:
+            min_x, min_y, max_x, max_y = self.get_bounds() or (0, 0, 0, 0)
+            region = (min_x - margin, min_y - margin, max_x + margin, max_y + margin)
+        self.reaper = SpaceshipReaper(region, check_every)
+    
+    def set_heatmap(self, enabled):
+        """Start (or stop and forget) counting cell flips in an ActivityHeatmap."""
+        if not enabled:
+            self.heatmap = None
+        elif self.heatmap is None:
+            self.heatmap = ActivityHeatmap()
+            self.heatmap.generation = self.generation
+    
+    def record(self, entry):
+        """Add an undo entry, dropping any redo entries and the oldest entries
+        beyond max_history.
+        
+        Step entries hold a snapshot of the cells before the step ("before") and,
+        once undone, after it ("after"). Edit entries hold a list of compact
+        (added, removed, removed ages, added ages) arrays in "ops"; added ages
+        may be a plain 1 for freshly drawn cells."""
+        del self.history[self.history_position:]
+        self.history.append(entry)
+        if len(self.history) > self.max_history:
+            del self.history[:len(self.history) - self.max_history]
+        self.history_position = len(self.history)
+    
+    def begin_edit(self):
+        """Start collecting the following edits into a single undo entry."""
+        if self.edit_group is None:
+            self.edit_group = {"type": "edit", "ops": [], "generation": self.generation,
+                               "generation_after": self.generation}
+    
+    def end_edit(self):
+        """Finish the undo entry started by begin_edit()."""
+        group, self.edit_group = self.edit_group, None
+        if group and group["ops"]:
+            self.record(group)
+    
+    def record_edit(self, added, removed, removed_ages, added_ages=1):
+        """Record a single edit as an undo entry (or part of the open edit group)."""
+        if not len(added) and not len(removed):
+            return
+        op = (added, removed, removed_ages, added_ages)
+        if self.edit_group is not None:
+            self.edit_group["ops"].append(op)
+        else:
+            self.record({"type": "edit", "ops": [op], "generation": self.generation,
+                         "generation_after": self.generation})
+    
     def undo(self):
-        """Go back one generation."""
+        """Undo the last generation step or edit."""
         if self.history_position > 0:
             self.history_position -= 1
-            self.cells = defaultdict(int, self.history[self.history_position])
-            self.generation -= 1
+            entry = self.history[self.history_position]
+            if entry["type"] == "step":
+                entry["after"] = self.snapshot()
+                self.load_cells(entry["before"])
+            else:
+                for added, removed, removed_ages, added_ages in reversed(entry["ops"]):
+                    self.apply_changes(removed, removed_ages, added)
+            self.generation = entry["generation"]
             return True
         return False
     
     def redo(self):
-        """Go forward one generation if available."""
-        if self.history_position < len(self.history) - 1:
+        """Redo the next generation step or edit if available."""
+        if self.history_position < len(self.history):
+            entry = self.history[self.history_position]
             self.history_position += 1
-            self.cells = defaultdict(int, self.history[self.history_position])
-            self.generation += 1
+            if entry["type"] == "step":
+                self.load_cells(entry.pop("after"))
+            else:
+                for added, removed, removed_ages, added_ages in entry["ops"]:
+                    self.apply_changes(added, added_ages, removed)
+            self.generation = entry["generation_after"]
             return True
         return False
     
+    def snapshot(self):
+        """Return a copy of the cells for the history: a dict, or packed
+        (coords, ages) arrays once compact_snapshots is set."""
+        return self.engine.snapshot(self.compact_snapshots)
+    
+    def compact_history(self):
+        """Switch to packed step snapshots, converting the ones already recorded."""
+        self.compact_snapshots = True
+        for entry in self.history:
+            for key in ("before", "after"):
+                if isinstance(entry.get(key), dict):
+                    entry[key] = pack_cells(entry[key])
+    
+    def trim_history(self):
+        """Drop the oldest undo entries beyond max_history."""
+        excess = len(self.history) - self.max_history
+        if excess > 0:
+            del self.history[:excess]
+            self.history_position = max(0, self.history_position - excess)
+    
+    def drop_caches(self):
+        """Drop caches that are rebuilt on demand."""
+        self.oriented_patterns.clear()
+    
+    def memory_usage(self):
+        """Return estimated bytes held by the cells, index, history and statistics."""
+        history = 0
+        for entry in self.history:
+            if entry["type"] == "step":
+                history += sum(estimate_cells_bytes(entry[key]) for key in ("before", "after") if key in entry)
+            else:
+                history += sum(np.asarray(array).nbytes for op in entry["ops"] for array in op)
+        return {
+            **self.engine.memory_usage(),
+            "history": history,
+            "caches": sum(len(cells) for cells in self.oriented_patterns.values()) * CELL_OBJECT_BYTES,
+            "statistics": sum(buffer.nbytes for buffer in self.statistics.buffers.values()),
+        }
+    
+    def load_cells(self, cells):
+        """Replace all cells with the given {(x, y): age} mapping or packed
+        (coords, ages) snapshot."""
+        self.engine.load(cells)
+        self.mark_all_dirty()
+    
+    def apply_changes(self, added, added_ages, removed):
+        """Add and remove cells given as N x 2 coordinate arrays, without
+        recording history. Returns the ages of the removed cells."""
+        removed_ages = self.engine.apply_changes(added, added_ages, removed)
+        
+        changed = np.concatenate((added, removed))
+        if len(changed):
+            min_x, min_y = changed.min(axis=0).tolist()
+            max_x, max_y = changed.max(axis=0).tolist()
+            self.mark_dirty(min_x, min_y, max_x, max_y)
+        return removed_ages
+    
     def add_cell(self, x, y):
         """Add a live cell at the specified position."""
-        self.cells[(x, y)] = 1
+        if not self.is_alive(x, y):
+            self.apply_changes(np.array([[x, y]], dtype=np.int64), 1, np.empty((0, 2), dtype=np.int64))
     
     def remove_cell(self, x, y):
         """Remove a cell at the specified position."""
-        if (x, y) in self.cells:
-            del self.cells[(x, y)]
+        if self.is_alive(x, y):
+            self.apply_changes(np.empty((0, 2), dtype=np.int64), 1, np.array([[x, y]], dtype=np.int64))
     
     def clear(self):
         """Clear all cells from the grid."""
-        self.cells.clear()
-        self.generation = 0
-        # Add a new history entry for the clear state
-        self.history.append(dict())
-        self.history_position = len(self.history) - 1
+        # Add a history entry for the clear, holding the cleared cells
+        removed, removed_ages = self.engine.pack()
+        self.record({"type": "edit", "ops": [(np.empty((0, 2), dtype=np.int64), removed, removed_ages, 1)],
+                     "generation": self.generation, "generation_after": 0})
         
-    def add_pattern(self, pattern_name, center_x, center_y):
+        self.engine.clear()
+        self.generation = 0
+        if self.heatmap is not None:
+            self.heatmap.clear()
+        self.mark_all_dirty()
+        
+    def get_pattern(self, pattern_name, rotation=0, flip=False):
+        """Return the cells of a predefined pattern, mirrored horizontally if flip
+        is set and then rotated clockwise by rotation quarter turns."""
+        key = (pattern_name, rotation % 4, flip)
+        if key not in self.oriented_patterns:
+            pattern = self.patterns[pattern_name]
+            if flip:
+                pattern = [(-x, y) for x, y in pattern]
+            for _ in range(rotation % 4):
+                pattern = [(-y, x) for x, y in pattern]
+            self.oriented_patterns[key] = pattern
+        return self.oriented_patterns[key]
+    
+    def set_pattern(self, pattern_name, cells):
+        """Add or replace a pattern (e.g. the clipboard) in the pattern dictionary."""
+        self.patterns[pattern_name] = [(int(x), int(y)) for x, y in cells]
+        for key in [key for key in self.oriented_patterns if key[0] == pattern_name]:
+            del self.oriented_patterns[key]
+    
+    def add_pattern(self, pattern_name, center_x, center_y, rotation=0, flip=False, mode=OR):
         """Add a predefined pattern centered at the given coordinates."""
         if pattern_name in self.patterns:
-            pattern = self.patterns[pattern_name]
+            pattern = self.get_pattern(pattern_name, rotation, flip)
             
             # Calculate bounding box
             min_x = min(x for x, y in pattern)
@@ -679,53 +1770,1299 @@ class GameOfLife:
             offset_y = center_y - (min_y + max_y) // 2
             
             # Add pattern cells
-            for x, y in pattern:
-                self.add_cell(x + offset_x, y + offset_y)
+            self.set_cells(np.array(pattern, dtype=np.int64) + (offset_x, offset_y), mode)
             
             return True
         return False
     
+    def set_cells(self, coords, mode=OR):
+        """Apply a bulk edit to the cells at the given coordinates (an N x 2 array
+        or sequence of (x, y)) using one of the placement modes.
+        Returns (added, removed) as N x 2 coordinate arrays."""
+        coords = np.asarray(coords, dtype=np.int64).reshape(-1, 2)
+        empty = np.empty((0, 2), dtype=np.int64)
+        if len(coords) == 0 and mode != self.REPLACE:
+            return empty, empty
+        
+        # Drop duplicates by packing each coordinate pair into one integer
+        keys = (coords[:, 0] << 32) | (coords[:, 1] & 0xFFFFFFFF)
+        _, first = np.unique(keys, return_index=True)
+        first = np.sort(first)
+        keys, coords = keys[first], coords[first]
+        if len(self.engine):
+            alive = self.engine.ages_at(coords) > 0
+        else:
+            alive = np.zeros(len(coords), dtype=bool)  # Bulk insert into an empty universe
+        
+        if mode == self.OR:
+            added, removed = coords[~alive], empty
+        elif mode == self.XOR:
+            added, removed = coords[~alive], coords[alive]
+        elif mode == self.AND_NOT:
+            added, removed = empty, coords[alive]
+        elif mode == self.REPLACE:
+            added = coords[~alive]
+            if len(coords):
+                min_x, min_y = coords.min(axis=0).tolist()
+                max_x, max_y = coords.max(axis=0).tolist()
+                inside = self.engine.coords_in_rect(min_x, min_y, max_x, max_y)
+                inside_keys = (inside[:, 0] << 32) | (inside[:, 1] & 0xFFFFFFFF)
+                removed = inside[~np.isin(inside_keys, keys)]
+            else:
+                removed = empty
+        else:
+            raise ValueError(f"Unknown placement mode: {mode}")
+        
+        # Apply the changes to the engine
+        removed_ages = self.apply_changes(added, 1, removed)
+        self.record_edit(added, removed, removed_ages)
+        return added, removed
+    
+    def generate(self, kind, x=0, y=0, mode=OR, **params):
+        """Place a generated pattern with its origin at (x, y) through set_cells():
+        "soup" (random_soup), "guns" (gun_array of the library's Glider Gun) or
+        "fleet" (spaceship_fleet), with the generator's keyword parameters.
+        Returns (added, removed) as N x 2 coordinate arrays."""
+        if kind == "soup":
+            coords = random_soup(**params)
+        elif kind == "guns":
+            coords = gun_array(self.patterns["Glider Gun"], **params)
+        elif kind == "fleet":
+            coords = spaceship_fleet(**params)
+        else:
+            raise ValueError(f"Unknown generator: {kind}")
+        return self.set_cells(coords + (x, y), mode)
+    
+    def get_region(self, min_x, min_y, max_x, max_y):
+        """Return the inclusive rect as a boolean array indexed [y, x]."""
+        region = np.zeros((max_y - min_y + 1, max_x - min_x + 1), dtype=bool)
+        coords = self.region_coords(min_x, min_y, max_x, max_y)
+        region[coords[:, 1] - min_y, coords[:, 0] - min_x] = True
+        return region
+    
+    def region_coords(self, min_x, min_y, max_x, max_y):
+        """Return the live cells inside the inclusive rect as an N x 2 array."""
+        return self.engine.coords_in_rect(min_x, min_y, max_x, max_y)
+    
+    def clear_region(self, min_x, min_y, max_x, max_y):
+        """Kill every cell inside the inclusive rect."""
+        self.set_cells(self.region_coords(min_x, min_y, max_x, max_y), self.AND_NOT)
+    
+    def paste_region(self, region, left, top, mode=OR):
+        """Place a boolean [y, x] array with its top left corner at (left, top)."""
+        ys, xs = np.nonzero(region)
+        coords = np.column_stack((xs + left, ys + top))
+        if mode == self.REPLACE:
+            # Replace the whole array area, not just the bounding box of its live cells
+            self.begin_edit()
+            self.clear_region(left, top, left + region.shape[1] - 1, top + region.shape[0] - 1)
+            self.set_cells(coords, self.OR)
+            self.end_edit()
+        else:
+            self.set_cells(coords, mode)
+    
+    def transform_region(self, min_x, min_y, max_x, max_y, rotation=0, flip=False):
+        """Flip (horizontally) and then rotate (clockwise quarter turns) the contents
+        of the inclusive rect about its center. Returns the transformed rect."""
+        region = self.get_region(min_x, min_y, max_x, max_y)
+        if flip:
+            region = np.flip(region, axis=1)
+        region = np.rot90(region, -rotation)
+        
+        # Keep the center in place
+        height, width = region.shape
+        left = (min_x + max_x + 1 - width) // 2
+        top = (min_y + max_y + 1 - height) // 2
+        
+        self.begin_edit()
+        self.clear_region(min_x, min_y, max_x, max_y)
+        self.paste_region(region, left, top)
+        self.end_edit()
+        return (left, top, left + width - 1, top + height - 1)
+    
+    def move_region(self, min_x, min_y, max_x, max_y, dx, dy):
+        """Move the contents of the inclusive rect by (dx, dy)."""
+        coords = self.region_coords(min_x, min_y, max_x, max_y)
+        self.begin_edit()
+        self.set_cells(coords, self.AND_NOT)
+        self.set_cells(coords + (dx, dy), self.OR)
+        self.end_edit()
+    
+    def random_fill(self, min_x, min_y, max_x, max_y, density=0.35, seed=None):
+        """Replace the contents of the inclusive rect with random cells at the given density."""
+        rng = np.random.default_rng(seed)
+        region = rng.random((max_y - min_y + 1, max_x - min_x + 1)) < density
+        self.paste_region(region, min_x, min_y, self.REPLACE)
+    
     def set_rules(self, rule_string):
         """Set new rules for the simulation."""
         self.rules = self.parse_rules(rule_string)
         self.rule_string = rule_string
         return True
     
+    def get_bounds(self):
+        """Return (min_x, min_y, max_x, max_y) of the live cells, or None if empty."""
+        return self.engine.bounds()
+    
+    def is_alive(self, x, y):
+        """Return True if the cell at the given position is alive."""
+        return self.engine.is_alive(x, y)
+    
+    def cells_in_rect(self, min_x, min_y, max_x, max_y):
+        """Yield ((x, y), age) for the live cells inside the inclusive rect."""
+        return self.engine.cells_in_rect(min_x, min_y, max_x, max_y)
+    
+    def count_in_rect(self, min_x, min_y, max_x, max_y):
+        """Return the number of live cells inside the inclusive rect."""
+        return self.engine.count_in_rect(min_x, min_y, max_x, max_y)
+    
+    def ages_in_rect(self, min_x, min_y, max_x, max_y, out=None):
+        """Return the ages inside the inclusive rect as a [y, x] array (0 where dead)."""
+        return self.engine.ages_in_rect(min_x, min_y, max_x, max_y, out)
+    
+    def to_numpy(self, bounds=None):
+        """Return the ages inside the inclusive (min_x, min_y, max_x, max_y) rect,
+        the live bounds by default, as a [y, x] array (0 where dead). The dense
+        engine hands out a read-only view of its own array when it can."""
+        return self.engine.to_numpy(bounds)
+    
+    def coords_view(self):
+        """Return the live cells as read-only (N x 2 coords, ages) arrays."""
+        return self.engine.coords_view()
+    
+    def from_numpy(self, array, origin=(0, 0)):
+        """Replace the cells inside the array's rect, whose [0, 0] sits at the
+        grid position origin, with the array's nonzero entries. Boolean arrays
+        make newborn cells, other values are taken as ages.
+        Returns (added, removed) as N x 2 coordinate arrays."""
+        array = np.asarray(array)
+        if array.ndim != 2:
+            raise ValueError(f"Expected a 2D array, got {array.ndim} dimensions")
+        left, top = (int(value) for value in origin)
+        height, width = array.shape
+        ys, xs = np.nonzero(array)
+        added = np.column_stack((xs + left, ys + top)).astype(np.int64)
+        if array.dtype == bool:
+            ages = 1
+        else:
+            ages = np.maximum(array[ys, xs], 1).astype(np.int32)
+        if array.size:
+            removed = self.engine.coords_in_rect(left, top, left + width - 1, top + height - 1)
+        else:
+            removed = np.empty((0, 2), dtype=np.int64)
+        
+        removed_ages = self.apply_changes(added, ages, removed)
+        self.record_edit(added, removed, removed_ages, ages)
+        return added, removed
+    
+    def __array__(self, dtype=None, copy=None):
+        """Let np.asarray() and friends read the live bounds' ages directly."""
+        array = self.to_numpy()
+        if copy is False and array.base is None:
+            raise ValueError("The cells cannot be shared without a copy")
+        if copy:
+            array = array.copy()
+        return array if dtype is None else array.astype(dtype, copy=False)
+    
+    def as_buffer(self, bounds=None):
+        """Return the ages of to_numpy(bounds) as a memoryview, for consumers of the
+        buffer protocol. Works on every Python version, unlike memoryview(game)."""
+        return memoryview(self.to_numpy(bounds))
+    
+    def __buffer__(self, flags):
+        """Let memoryview(game) read the live bounds' ages; Python only calls
+        this from 3.12 on (PEP 688), earlier versions need as_buffer()."""
+        return self.as_buffer()
+    
+    def mark_dirty(self, min_x, min_y, max_x, max_y):
+        """Record a grid region whose cells changed since the last redraw."""
+        if self.dirty_all:
+            return
+        self.dirty_bounds.append((min_x, min_y, max_x, max_y))
+        if len(self.dirty_bounds) > 64:
+            # Too many small edits - collapse them into their union
+            self.dirty_bounds = [(
+                min(b[0] for b in self.dirty_bounds),
+                min(b[1] for b in self.dirty_bounds),
+                max(b[2] for b in self.dirty_bounds),
+                max(b[3] for b in self.dirty_bounds)
+            )]
+    
+    def mark_all_dirty(self):
+        """Record that every cell has to be redrawn."""
+        self.dirty_all = True
+        self.dirty_bounds = []
+    
+    def take_dirty(self):
+        """Return and reset the changed grid regions.
+        Returns None if everything changed."""
+        dirty = None if self.dirty_all else self.dirty_bounds
+        self.dirty_bounds = []
+        self.dirty_all = False
+        return dirty
+    
     # Additional methods for pattern manipulation, etc.
 
 
-class GameOfLifeUI:
-    """Main UI class handling the graphical interface and user interactions."""
+def parse_rule_sets(rule_string):
+    """Parse a B/S rule string into (birth, survival) sets of neighbor counts.
+    GameOfLife.parse_rules and the background classifiers all go through this."""
+    parts = rule_string.split('/')
+    birth = set()
+    survival = set()
+    if len(parts) == 2:
+        if parts[0].startswith('B'):
+            birth = {int(c) for c in parts[0][1:] if c.isdigit()}
+        if parts[1].startswith('S'):
+            survival = {int(c) for c in parts[1][1:] if c.isdigit()}
+    return birth, survival
+
+
+def next_generation(cells, birth, survival):
+    """Return the set of live cells one generation after the given set, stepped
+    exactly like the sparse engine steps the game."""
+    ages = dict.fromkeys(cells, 1)
+    return set(apply_rules(ages, count_neighbors(ages), birth, survival)[0])
+
+
+def pattern_hash(cells):
+    """Return a stable hash of a pattern's shape, independent of its position."""
+    min_x = min(x for x, y in cells)
+    min_y = min(y for x, y in cells)
+    normalized = sorted((x - min_x, y - min_y) for x, y in cells)
+    return hashlib.sha1(repr(normalized).encode()).hexdigest()
+
+
+def classify_pattern(cells, rule_string="B3/S23", max_generations=1000, max_population=20000):
+    """Evolve a pattern and classify its behavior.
+    Returns a dict with the pattern type ("still life", "oscillator", "spaceship",
+    "dies", "grows" or "unsettled") plus period, displacement, generation,
+    largest bounds and peak population where they apply."""
+    birth, survival = parse_rule_sets(rule_string)
+    current = set(cells)
+    seen = {}  # {(shape hash, population, width, height): (generation, min_x, min_y)}
+    peak_population = len(current)
+    max_width = max_height = 0
+    info = {"rule": rule_string}
     
-    def __init__(self):
-        # Initialize pygame
-        pygame.init()
-        self.screen = pygame.display.set_mode((1200, 800), pygame.RESIZABLE)
-        pygame.display.set_caption("Ultimate Game of Life")
-        
-        # Initialize game
-        self.game = GameOfLife()
-        
-        # Add some initial cells to make the grid not empty
-        self.game.add_pattern("Glider", 10, 10)
-        
-        # View settings
-        self.cell_size = 10
-        self.offset_x = 400
-        self.offset_y = 300
-        self.paused = True
-        self.simulation_speed = 10  # FPS
-        
-        # Mouse tracking
-        self.mouse_pos = (0, 0)
-        self.drawing = False
-        self.erasing = False
-        self.panning = False
-        self.pan_start = (0, 0)
+    for generation in range(max_generations + 1):
+        if not current:
+            info.update(type="dies", generation=generation)
+            break
+        
+        xs, ys = zip(*current)
+        min_x, min_y = min(xs), min(ys)
+        width, height = max(xs) - min_x + 1, max(ys) - min_y + 1
+        max_width, max_height = max(max_width, width), max(max_height, height)
+        peak_population = max(peak_population, len(current))
+        
+        # A repeated shape means the pattern is periodic
+        shape = frozenset((x - min_x, y - min_y) for x, y in current)
+        key = (hash(shape), len(current), width, height)
+        if key in seen:
+            first_generation, first_x, first_y = seen[key]
+            period = generation - first_generation
+            dx, dy = min_x - first_x, min_y - first_y
+            if dx or dy:
+                info.update(type="spaceship", period=period, dx=dx, dy=dy)
+            elif period == 1:
+                info.update(type="still life")
+            else:
+                info.update(type="oscillator", period=period)
+            if first_generation:
+                info["generation"] = first_generation
+            break
+        seen[key] = (generation, min_x, min_y)
+        
+        if len(current) > max_population:
+            info.update(type="grows", generation=generation)
+            break
+        current = next_generation(current, birth, survival)
+    else:
+        info.update(type="grows" if len(current) > 2 * len(cells) else "unsettled",
+                    generation=max_generations)
+    
+    info.update(width=max_width, height=max_height, peak_population=peak_population)
+    return info
+
+
+def describe_pattern_info(info):
+    """Return short description lines for a classify_pattern() result."""
+    kind = info["type"]
+    if kind == "still life":
+        summary = "Still life"
+    elif kind == "oscillator":
+        summary = f"Oscillator, period {info['period']}"
+    elif kind == "spaceship":
+        dx, dy, period = abs(info["dx"]), abs(info["dy"]), info["period"]
+        speed = math.gcd(max(dx, dy), period)
+        numerator, denominator = max(dx, dy) // speed, period // speed
+        speed_text = f"{'' if numerator == 1 else numerator}c/{denominator}"
+        direction = "orthogonal" if not (dx and dy) else "diagonal" if dx == dy else "oblique"
+        summary = f"Spaceship {speed_text} {direction}"
+    elif kind == "dies":
+        summary = f"Dies at gen {info['generation']}"
+    elif kind == "grows":
+        summary = f"Grows (gen {info['generation']})"
+    else:
+        summary = f"Unsettled at gen {info['generation']}"
+    
+    if kind in ("still life", "oscillator", "spaceship") and info.get("generation"):
+        summary += f" after {info['generation']}"
+    
+    details = f"{info['width']}x{info['height']}, peak {info['peak_population']}"
+    return summary, details
+
+
+class PatternAnalyzer:
+    """Classifies library patterns in a background process pool.
+    Results are cached on disk, keyed by pattern shape and rule."""
+    
+    CACHE_VERSION = 1
+    
+    def __init__(self, patterns, cache_path=None, on_result=None):
+        self.patterns = patterns  # {name: cells}
+        self.cache_path = cache_path or os.path.join(get_cache_dir(), "pattern_metadata.json")
+        self.on_result = on_result  # Called from a worker thread when a result arrives
+        self.cache = {}  # Read from disk by the first analyze(), after the first frame
+        self.loaded = False
+        self.results = deque()  # (cache key, info) pairs waiting to be collected
+        self.pending = set()  # Cache keys being computed
+        self.executor = None
+        self.version = 0  # Increases whenever new results have been collected
+        self.unsaved = False
+    
+    def load_cache(self):
+        """Load cached results from disk."""
+        return load_json_cache(self.cache_path, self.CACHE_VERSION, "patterns")
+    
+    def save_cache(self):
+        """Write cached results to disk."""
+        if save_json_cache(self.cache_path, self.CACHE_VERSION, "patterns", self.cache):
+            self.unsaved = False
+    
+    def cache_key(self, pattern_name, rule_string):
+        """Return the cache key of a library pattern under a rule."""
+        return f"{pattern_hash(self.patterns[pattern_name])}|{rule_string}"
+    
+    def get_info(self, pattern_name, rule_string):
+        """Return the classification of a pattern, or None if not known yet."""
+        if pattern_name not in self.patterns:
+            return None
+        return self.cache.get(self.cache_key(pattern_name, rule_string))
+    
+    def analyze(self, rule_string):
+        """Queue every library pattern that has no cached result for the rule."""
+        if not self.loaded:
+            self.cache.update(self.load_cache())
+            self.loaded = True
+            self.version += 1
+        for name in self.patterns:
+            key = self.cache_key(name, rule_string)
+            if key in self.cache or key in self.pending:
+                continue
+            if self.executor is None:
+                try:
+                    import concurrent.futures
+                    workers = max(1, min(4, (os.cpu_count() or 2) - 1))
+                    self.executor = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+                except (OSError, NotImplementedError, ImportError):
+                    return  # No process support - metadata just stays unknown
+            self.pending.add(key)
+            future = self.executor.submit(classify_pattern, self.patterns[name], rule_string)
+            future.add_done_callback(lambda future, key=key: self.finished(key, future))
+    
+    def finished(self, key, future):
+        """Collect a finished job (runs on an executor thread)."""
+        try:
+            info = future.result()
+        except Exception:
+            info = None  # Cancelled or failed - not cached, retried next run
+        self.results.append((key, info))
+        if self.on_result:
+            self.on_result()
+    
+    def poll(self):
+        """Move finished results into the cache. Returns True if anything new arrived."""
+        updated = False
+        while self.results:
+            key, info = self.results.popleft()
+            self.pending.discard(key)
+            if info is not None:
+                self.cache[key] = info
+                updated = True
+        if updated:
+            self.version += 1
+            self.unsaved = True
+            if not self.pending:
+                self.save_cache()
+        return updated
+    
+    def shutdown(self):
+        """Stop the worker processes, dropping queued jobs, and keep what finished."""
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+        self.poll()
+        if self.unsaved:
+            self.save_cache()
+
+
+def get_cache_dir():
+    """Return the directory used for caches that persist across runs."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "game_of_life")
+
+
+def load_json_cache(path, version, key):
+    """Return the `key` entry of a JSON cache file written by save_json_cache(),
+    or {} if the file is missing, unreadable or from another cache version."""
+    import json
+    try:
+        with open(path) as f:
+            data = json.load(f)
+        if data.get("version") == version:
+            return data[key]
+    except (OSError, ValueError, KeyError):
+        pass
+    return {}
+
+
+def save_json_cache(path, version, key, entries):
+    """Write entries to a versioned JSON cache file, replacing it in one step so
+    a crash never leaves a half-written file. Returns True on success."""
+    import json
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = path + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump({"version": version, key: entries}, f)
+        os.replace(temp_path, path)
+        return True
+    except OSError:
+        return False
+
+
+class FontCache:
+    """Creates fonts like pygame.font.SysFont, but remembers the font file each
+    request resolved to, so later runs skip scanning the system fonts."""
+    
+    CACHE_VERSION = 1
+    
+    def __init__(self, cache_path=None):
+        self.cache_path = cache_path or os.path.join(get_cache_dir(), "fonts.json")
+        self.cache = self.load_cache()  # {"name|bold": [font file or None for the default font, fake bold]}
+        self.unsaved = False
+    
+    def load_cache(self):
+        """Load resolved font files from disk."""
+        return load_json_cache(self.cache_path, self.CACHE_VERSION, "fonts")
+    
+    def save_cache(self):
+        """Write newly resolved font files to disk."""
+        if self.unsaved and save_json_cache(self.cache_path, self.CACHE_VERSION, "fonts", self.cache):
+            self.unsaved = False
+    
+    def get(self, name, size, bold=False):
+        """Return a font of the named family, falling back to pygame's default font."""
+        key = f"{name}|{int(bold)}"
+        entry = self.cache.get(key)
+        if entry is not None and (entry[0] is None or os.path.exists(entry[0])):
+            path, fake_bold = entry
+        else:
+            # Let SysFont do the lookup once and record what it picked
+            resolved = []
+            pygame.font.SysFont(name, size, bold=bold,
+                                constructor=lambda path, size, fake_bold, italic: resolved.extend((path, fake_bold)))
+            path, fake_bold = resolved
+            self.cache[key] = [path, fake_bold]
+            self.unsaved = True
+        font = pygame.font.Font(path, size)
+        font.set_bold(fake_bold)
+        return font
+
+
+# Rule classes found by explore_rules(), most interesting first
+RULE_CLASSES = ("explodes", "chaotic", "spaceships", "stabilizes", "dies")
+
+
+def rule_to_masks(rule_string):
+    """Return the (birth, survival) bit masks of a B/S rule string."""
+    birth, survival = parse_rule_sets(rule_string)
+    return sum(1 << count for count in birth), sum(1 << count for count in survival)
+
+
+def masks_to_rule(birth_mask, survival_mask):
+    """Return the B/S rule string of (birth, survival) bit masks."""
+    birth = "".join(str(count) for count in range(9) if birth_mask >> count & 1)
+    survival = "".join(str(count) for count in range(9) if survival_mask >> count & 1)
+    return f"B{birth}/S{survival}"
+
+
+def random_rule_masks(count, seed=None, exclude=()):
+    """Return `count` distinct random (birth, survival) masks as an N x 2 array,
+    none of them in `exclude` (a set of (birth, survival) pairs).
+    B0 rules are left out - like the engines, the explorer never births cells without neighbors."""
+    rng = np.random.default_rng(seed)
+    seen = set(exclude)
+    masks = []
+    while len(masks) < count and len(seen) < 2 ** 17:
+        birth, survival = (int(value) for value in rng.integers(0, 2 ** 9, size=2))
+        birth &= ~1
+        if (birth, survival) not in seen:
+            seen.add((birth, survival))
+            masks.append((birth, survival))
+    return np.array(masks, dtype=np.int64).reshape(-1, 2)
+
+
+def explore_rules(masks, size=60, soup_size=24, soups=2, density=0.35, generations=240, max_period=30, seed=0):
+    """Run the same seeded random soups under many rules at once and classify each rule.
+    
+    Every (rule, soup) pair is one board of a stacked uint8 array on a size x size torus;
+    all boards advance together through per-board rule lookup tables. Rules are classified
+    from the population and state hash traces. Returns one result dict per rule."""
+    masks = np.asarray(masks, dtype=np.int64).reshape(-1, 2)
+    rules = len(masks)
+    
+    # Lookup table per board, indexed by alive * 9 + neighbor count
+    counts = np.arange(9)
+    tables = np.concatenate(((masks[:, :1] >> counts) & 1, (masks[:, 1:] >> counts) & 1), axis=1)
+    tables[:, 0] = 0  # No births without neighbors
+    tables = np.repeat(tables.astype(np.uint8), soups, axis=0)
+    
+    # The same soups in the middle of every rule's boards
+    rng = np.random.default_rng(seed)
+    soup_boards = np.zeros((soups, size, size), dtype=np.uint8)
+    start = (size - soup_size) // 2
+    soup_boards[:, start:start + soup_size, start:start + soup_size] = rng.random((soups, soup_size, soup_size)) < density
+    boards = np.tile(soup_boards, (rules, 1, 1))
+    board_index = np.arange(len(boards))[:, None, None]
+    
+    # Random weights turn every board into a 64-bit hash
+    weights = rng.integers(1, 2 ** 63, size=size * size, dtype=np.uint64)
+    populations = np.zeros((generations + 1, len(boards)), dtype=np.int64)
+    hashes = np.zeros((generations + 1, len(boards)), dtype=np.uint64)
+    populations[0] = boards.sum(axis=(1, 2))
+    hashes[0] = (boards.reshape(len(boards), -1) * weights).sum(axis=1)
+    
+    previous = boards
+    for generation in range(1, generations + 1):
+        previous = boards
+        neighbors = np.zeros_like(boards)
+        for dy in (-1, 0, 1):
+            rolled = np.roll(boards, dy, axis=1) if dy else boards
+            for dx in (-1, 0, 1):
+                if dx or dy:
+                    neighbors += np.roll(rolled, dx, axis=2) if dx else rolled
+        boards = tables[board_index, boards * 9 + neighbors]
+        populations[generation] = boards.sum(axis=(1, 2))
+        hashes[generation] = (boards.reshape(len(boards), -1) * weights).sum(axis=1)
+    
+    # Smallest period with which the state (or just the population) repeats at the end
+    max_period = min(max_period, generations // 3)
+    period = np.zeros(len(boards), dtype=np.int64)
+    population_period = np.zeros(len(boards), dtype=np.int64)
+    for p in range(max_period, 0, -1):
+        period[hashes[-1] == hashes[-1 - p]] = p
+        window = populations[-max_period:]
+        population_period[(window == populations[-max_period - p:len(populations) - p]).all(axis=0)] = p
+    
+    final = populations[-1]
+    board_classes = np.full(len(boards), RULE_CLASSES.index("chaotic"))
+    board_classes[(population_period > 0) & (period == 0)] = RULE_CLASSES.index("spaceships")
+    board_classes[period > 0] = RULE_CLASSES.index("stabilizes")
+    board_classes[final > 3 * populations[0]] = RULE_CLASSES.index("explodes")
+    board_classes[final == 0] = RULE_CLASSES.index("dies")
+    activity = (boards != previous).sum(axis=(1, 2)) / (size * size)
+    
+    results = []
+    for rule in range(rules):
+        soups_of_rule = slice(rule * soups, (rule + 1) * soups)
+        results.append({
+            "rule": masks_to_rule(*masks[rule].tolist()),
+            "class": RULE_CLASSES[int(board_classes[soups_of_rule].min())],
+            "period": int(period[soups_of_rule].max()),
+            "population": int(final[soups_of_rule].mean()),
+            "growth": float((final[soups_of_rule] / np.maximum(populations[0][soups_of_rule], 1)).mean()),
+            "activity": float(activity[soups_of_rule].mean()),
+            "thumbnail": np.packbits(boards[rule * soups].astype(bool)).tobytes(),
+            "size": size,
+        })
+    return results
+
+
+class RuleExplorer:
+    """Surveys random outer-totalistic rules in a background process pool
+    and keeps the results for the rule gallery."""
+    
+    SORT_KEYS = {
+        "class": lambda result: (RULE_CLASSES.index(result["class"]), -result["activity"]),
+        "population": lambda result: -result["population"],
+        "activity": lambda result: -result["activity"],
+        "rule": lambda result: result["rule"],
+    }
+    
+    def __init__(self, on_result=None, batch_size=64, seed=None):
+        self.on_result = on_result  # Called from a worker thread when a batch finishes
+        self.batch_size = batch_size
+        self.results = []  # Classified rules, unsorted
+        self.finished_batches = deque()
+        self.requested = 0  # Rules submitted so far
+        self.requested_masks = set()  # (birth, survival) of every rule submitted, finished or not
+        self.executor = None
+        self.version = 0  # Increases whenever new results have been collected
+        # Fresh entropy by default, so each session surveys different rules
+        self.seed = np.random.SeedSequence().entropy if seed is None else seed
+    
+    def explore(self, count):
+        """Queue `count` more random rules (never repeating one already requested)."""
+        if self.executor is None:
+            try:
+                import concurrent.futures
+                workers = max(1, min(4, (os.cpu_count() or 2) - 1))
+                self.executor = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+            except (OSError, NotImplementedError, ImportError):
+                return False
+        masks = random_rule_masks(count, seed=self.seed, exclude=self.requested_masks)
+        for start in range(0, len(masks), self.batch_size):
+            future = self.executor.submit(explore_rules, masks[start:start + self.batch_size])
+            future.add_done_callback(self.finished)
+        # Only advance once the batches are queued, so a failed attempt can be retried as is
+        self.seed += 1
+        self.requested_masks.update(map(tuple, masks.tolist()))
+        self.requested += len(masks)
+        return True
+    
+    def finished(self, future):
+        """Collect a finished batch (runs on an executor thread)."""
+        try:
+            self.finished_batches.append(future.result())
+        except Exception:
+            self.finished_batches.append([])  # Cancelled or failed
+        if self.on_result:
+            self.on_result()
+    
+    def poll(self):
+        """Move finished batches into the results. Returns True if anything new arrived."""
+        updated = False
+        while self.finished_batches:
+            batch = self.finished_batches.popleft()
+            self.results.extend(batch)
+            updated = updated or bool(batch)
+        if updated:
+            self.version += 1
+        return updated
+    
+    def sorted_results(self, key="class"):
+        """Return the results ordered by one of SORT_KEYS."""
+        return sorted(self.results, key=self.SORT_KEYS[key])
+    
+    def shutdown(self):
+        """Stop the worker processes, dropping queued batches."""
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+
+# Collision outcome classes, most interesting first
+COLLISION_CLASSES = ("annihilation", "spaceship", "still life", "oscillator", "unsettled", "no reaction")
+
+# The 8 rotations/reflections as (a, b, c, d): (x, y) -> (a * x + b * y, c * x + d * y)
+ORIENTATIONS = ((1, 0, 0, 1), (0, -1, 1, 0), (-1, 0, 0, -1), (0, 1, -1, 0),
+                (-1, 0, 0, 1), (0, 1, 1, 0), (1, 0, 0, -1), (0, -1, -1, 0))
+
+
+def canonical_cells(cells):
+    """Return a pattern as a sorted coordinate tuple, normalized over translation
+    and the 8 rotations/reflections, so equivalent patterns compare equal."""
+    if not cells:
+        return ()
+    forms = []
+    for a, b, c, d in ORIENTATIONS:
+        moved = [(a * x + b * y, c * x + d * y) for x, y in cells]
+        min_x = min(x for x, y in moved)
+        min_y = min(y for x, y in moved)
+        forms.append(tuple(sorted((x - min_x, y - min_y) for x, y in moved)))
+    return min(forms)
+
+
+def canonical_hash(cells):
+    """Return a stable hash of a pattern that ignores position and orientation."""
+    return hashlib.sha1(repr(canonical_cells(cells)).encode()).hexdigest()
+
+
+def split_objects(cells, gap=2):
+    """Split a set of cells into groups whose cells are within `gap` of each other."""
+    remaining = set(cells)
+    objects = []
+    while remaining:
+        stack = [remaining.pop()]
+        group = []
+        while stack:
+            x, y = stack.pop()
+            group.append((x, y))
+            for dx in range(-gap, gap + 1):
+                for dy in range(-gap, gap + 1):
+                    neighbor = (x + dx, y + dy)
+                    if neighbor in remaining:
+                        remaining.remove(neighbor)
+                        stack.append(neighbor)
+        objects.append(group)
+    return objects
+
+
+_library_shapes = {}  # {rule: {canonical hash: pattern name}}, per process
+
+
+def library_shapes(rule_string):
+    """Return the canonical hashes of every phase of the small periodic library
+    patterns under a rule, for naming collision products."""
+    if rule_string not in _library_shapes:
+        birth, survival = parse_rule_sets(rule_string)
+        shapes = {}
+        for name, cells in GameOfLife().patterns.items():
+            if len(cells) > 64:
+                continue
+            info = classify_pattern(cells, rule_string, max_generations=64, max_population=256)
+            if info["type"] not in ("still life", "oscillator", "spaceship"):
+                continue
+            current = set(cells)
+            for _ in range(info.get("generation", 0)):
+                current = next_generation(current, birth, survival)
+            for _ in range(info.get("period", 1)):
+                shapes.setdefault(canonical_hash(current), name)
+                current = next_generation(current, birth, survival)
+        _library_shapes[rule_string] = shapes
+    return _library_shapes[rule_string]
+
+
+# The spaceships the reaper recognizes, in one phase
+STANDARD_SPACESHIPS = {
+    "Glider": [(1, 0), (2, 1), (0, 2), (1, 2), (2, 2)],
+    "LWSS": [(1, 0), (4, 0), (0, 1), (0, 2), (4, 2), (0, 3), (1, 3), (2, 3), (3, 3)],
+    "MWSS": [(3, 0), (1, 1), (5, 1), (0, 2), (0, 3), (5, 3), (0, 4), (1, 4), (2, 4), (3, 4), (4, 4)],
+    "HWSS": [(3, 0), (4, 0), (1, 1), (6, 1), (0, 2), (0, 3), (6, 3),
+             (0, 4), (1, 4), (2, 4), (3, 4), (4, 4), (5, 4)],
+}
+_spaceship_shapes = {}  # {rule: {translated cells: (ship name, (dx, dy) direction)}}, per process
+
+
+def spaceship_shapes(rule_string):
+    """Return every phase and orientation of the standard spaceships under a rule,
+    as cells translated to (0, 0), with the direction each one travels in."""
+    if rule_string not in _spaceship_shapes:
+        birth, survival = parse_rule_sets(rule_string)
+        shapes = {}
+        for name, cells in STANDARD_SPACESHIPS.items():
+            for a, b, c, d in ORIENTATIONS:
+                phases = [{(a * x + b * y, c * x + d * y) for x, y in cells}]
+                for _ in range(8):
+                    phases.append(next_generation(phases[-1], birth, survival))
+                forms = [translated_cells(cells) for cells in phases]
+                # The ship repeats itself shifted after its period (not a ship under every rule)
+                period = next((period for period in range(1, 9) if forms[period] == forms[0]), None)
+                if period is None:
+                    continue
+                dx = min(x for x, y in phases[period]) - min(x for x, y in phases[0])
+                dy = min(y for x, y in phases[period]) - min(y for x, y in phases[0])
+                if dx or dy:
+                    direction = ((dx > 0) - (dx < 0), (dy > 0) - (dy < 0))
+                    for form in forms[:period]:
+                        shapes.setdefault(form, (name, direction))
+        _spaceship_shapes[rule_string] = shapes
+    return _spaceship_shapes[rule_string]
+
+
+def translated_cells(cells):
+    """Return cells as a sorted coordinate tuple moved so the minimum is at (0, 0)."""
+    if not cells:
+        return ()
+    min_x = min(x for x, y in cells)
+    min_y = min(y for x, y in cells)
+    return tuple(sorted((x - min_x, y - min_y) for x, y in cells))
+
+
+class SpaceshipReaper:
+    """Removes standard spaceships (see STANDARD_SPACESHIPS) that have left a region
+    and fly away from it, so they can never return, and tallies them as emitted
+    per direction. Keeps long gun runs at a constant population and step cost.
+    
+    Only the cells outside the region are looked at, via the engine's rect
+    queries, and only every check_every generations. A ship is reaped when it is
+    isolated (no other cells within 2 cells of it), so objects that are still
+    interacting are left alone; whatever it would have hit further out is not."""
+    
+    DIRECTIONS = {(0, -1): "N", (1, -1): "NE", (1, 0): "E", (1, 1): "SE",
+                  (0, 1): "S", (-1, 1): "SW", (-1, 0): "W", (-1, -1): "NW"}
+    
+    def __init__(self, region, check_every=8):
+        self.region = region  # Inclusive (min_x, min_y, max_x, max_y) grid rect left alone
+        self.check_every = check_every
+        self.emitted = {}  # {(ship name, direction name): count}
+        self.total = 0
+    
+    def outside_cells(self, game):
+        """Return the live cells outside the region as an N x 2 array."""
+        bounds = game.get_bounds()
+        min_x, min_y, max_x, max_y = self.region
+        if bounds is None or (min_x <= bounds[0] and min_y <= bounds[1] and
+                              bounds[2] <= max_x and bounds[3] <= max_y):
+            return np.empty((0, 2), dtype=np.int64)
+        left, top, right, bottom = bounds
+        strips = [(left, top, min_x - 1, bottom), (max_x + 1, top, right, bottom),
+                  (max(left, min_x), top, min(right, max_x), min_y - 1),
+                  (max(left, min_x), max_y + 1, min(right, max_x), bottom)]
+        return np.concatenate([game.engine.coords_in_rect(*strip) for strip in strips
+                               if strip[0] <= strip[2] and strip[1] <= strip[3]])
+    
+    def escaping(self, bounds, direction):
+        """Return True if a ship within bounds moving in direction never re-enters the region."""
+        min_x, min_y, max_x, max_y = self.region
+        dx, dy = direction
+        return ((dx > 0 and bounds[0] > max_x) or (dx < 0 and bounds[2] < min_x) or
+                (dy > 0 and bounds[1] > max_y) or (dy < 0 and bounds[3] < min_y))
+    
+    def reap(self, game):
+        """Find and count the escaping ships. Returns their cells as an N x 2 array
+        (the caller removes them)."""
+        coords = self.outside_cells(game)
+        if not len(coords):
+            return coords
+        shapes = spaceship_shapes(game.rule_string)
+        largest = max(len(form) for form in shapes) if shapes else 0
+        reaped = []
+        for cells in split_objects(zip(coords[:, 0].tolist(), coords[:, 1].tolist())):
+            if len(cells) > largest:
+                continue
+            ship = shapes.get(translated_cells(cells))
+            if ship is None:
+                continue
+            name, direction = ship
+            bounds = (min(x for x, y in cells), min(y for x, y in cells),
+                      max(x for x, y in cells), max(y for x, y in cells))
+            # Nothing else close enough to interact, including cells inside the region
+            isolated = game.count_in_rect(bounds[0] - 2, bounds[1] - 2, bounds[2] + 2, bounds[3] + 2) == len(cells)
+            if isolated and self.escaping(bounds, direction):
+                key = (name, self.DIRECTIONS[direction])
+                self.emitted[key] = self.emitted.get(key, 0) + 1
+                self.total += 1
+                reaped.extend(cells)
+        return np.array(reaped, dtype=np.int64).reshape(-1, 2)
+    
+    def describe(self):
+        """Return the tally as text, e.g. "12 emitted: Glider SE 12"."""
+        counts = ", ".join(f"{name} {direction} {count}" for (name, direction), count in sorted(self.emitted.items()))
+        return f"{self.total} emitted" + (f": {counts}" if counts else "")
+
+
+def collide(first, second, rule_string="B3/S23", max_generations=512, max_period=30, max_population=2000):
+    """Run two separated objects until the result settles and classify it.
+    Returns a dict with the outcome class (see COLLISION_CLASSES), a hash of the
+    products that ignores their position, orientation and phase, the product names,
+    and the generation it settled at."""
+    birth, survival = parse_rule_sets(rule_string)
+    current = set(first) | set(second)
+    apart = [set(first), set(second)]  # The same objects without each other
+    populations = []
+    settled = None
+    for generation in range(max_generations + 1):
+        populations.append(len(current))
+        if not current or len(current) > max_population:
+            break
+        if generation >= 16 and generation % 4 == 0:
+            # Settled once the population repeats for three periods and every
+            # remaining object is periodic on its own
+            period = next((period for period in range(1, max_period + 1)
+                           if len(populations) >= 3 * period
+                           and populations[-2 * period:] == populations[-3 * period:-period]), None)
+            if period:
+                products = [classify_pattern(cells, rule_string, max_generations=2 * period + 8,
+                                             max_population=max_population)
+                            for cells in split_objects(current)]
+                if all(info["type"] in ("still life", "oscillator", "spaceship") for info in products):
+                    settled = products
+                    break
+        current = next_generation(current, birth, survival)
+        apart = [next_generation(cells, birth, survival) for cells in apart]
+    
+    if not current:
+        outcome, products, shapes = "annihilation", [], []
+    elif settled is None:
+        outcome, products, shapes = "unsettled", [], [canonical_hash(current)]
+    else:
+        if current == apart[0] | apart[1]:
+            outcome = "no reaction"
+        else:
+            types = {info["type"] for info in settled}
+            outcome = ("spaceship" if "spaceship" in types else
+                       "oscillator" if "oscillator" in types else "still life")
+        names = library_shapes(rule_string)
+        products = []
+        shapes = []
+        for cells, info in zip(split_objects(current), settled):
+            # The smallest hash over all phases identifies the object in any phase
+            phases = [set(cells)]
+            for _ in range(info.get("period", 1) - 1):
+                phases.append(next_generation(phases[-1], birth, survival))
+            hashes = [canonical_hash(phase) for phase in phases]
+            shapes.append(min(hashes))
+            products.append(next((names[shape] for shape in hashes if shape in names),
+                                 f"{info['type']} ({len(cells)} cells)"))
+        products.sort()
+    outcome_hash = hashlib.sha1(f"{outcome}|{'|'.join(sorted(shapes))}".encode()).hexdigest()
+    return {"class": outcome, "outcome": outcome_hash, "products": products,
+            "generation": generation, "population": len(current)}
+
+
+def run_collisions(jobs, rule_string, max_generations):
+    """Run a batch of (key, first cells, second cells) collisions in a worker process."""
+    return [(key, collide(first, second, rule_string, max_generations)) for key, first, second in jobs]
+
+
+class CollisionSearch:
+    """Collides two library patterns at every offset and phase in a process pool.
+    Outcomes are stored in an SQLite index keyed by the canonical starting
+    configuration, so repeated, overlapping or mirrored searches hit the cache."""
+    
+    def __init__(self, rule_string="B3/S23", max_generations=512, index_path=None, batch_size=32):
+        import sqlite3
+        self.rule_string = rule_string
+        self.max_generations = max_generations
+        self.batch_size = batch_size
+        self.index_path = index_path or os.path.join(get_cache_dir(), "collisions.sqlite3")
+        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+        self.db = sqlite3.connect(self.index_path)
+        self.db.execute("CREATE TABLE IF NOT EXISTS collisions (key TEXT PRIMARY KEY, class TEXT, "
+                        "outcome TEXT, products TEXT, generation INTEGER, population INTEGER)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS collisions_outcome ON collisions (outcome)")
+        self.hits = 0  # Configurations answered from the index by the last search
+    
+    def phases(self, cells, count):
+        """Return the first `count` generations of a pattern."""
+        birth, survival = parse_rule_sets(self.rule_string)
+        phases = [set(cells)]
+        for _ in range(count - 1):
+            phases.append(next_generation(phases[-1], birth, survival))
+        return phases
+    
+    def configurations(self, first, second, radius):
+        """Yield (phase, dx, dy, first cells, second cells) for every placement of the
+        first pattern around the second in which the two do not touch yet."""
+        periods = [classify_pattern(cells, self.rule_string, max_generations=64).get("period", 1)
+                   for cells in (first, second)]
+        phase_count = min(64, periods[0] * periods[1] // math.gcd(*periods))
+        second = set(second)
+        for phase, cells in enumerate(self.phases(first, phase_count)):
+            if not cells:
+                continue
+            min_x = min(x for x, y in cells)
+            min_y = min(y for x, y in cells)
+            for dx in range(-radius, radius + 1):
+                for dy in range(-radius, radius + 1):
+                    moved = {(x - min_x + dx, y - min_y + dy) for x, y in cells}
+                    # At least two dead cells between the objects, so they start independent
+                    if any((x + ox, y + oy) in second for x, y in moved
+                           for ox in range(-2, 3) for oy in range(-2, 3)):
+                        continue
+                    yield phase, dx, dy, moved, second
+    
+    def cache_key(self, first, second):
+        """Return the index key of a starting configuration."""
+        return f"{canonical_hash(first | second)}|{self.rule_string}|{self.max_generations}"
+    
+    def lookup(self, key):
+        """Return the indexed result of a configuration, or None."""
+        row = self.db.execute("SELECT class, outcome, products, generation, population "
+                              "FROM collisions WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        return {"class": row[0], "outcome": row[1], "products": row[2].split(" + ") if row[2] else [],
+                "generation": row[3], "population": row[4]}
+    
+    def store(self, key, result):
+        """Add a result to the index (committed by the caller)."""
+        self.db.execute("INSERT OR REPLACE INTO collisions VALUES (?, ?, ?, ?, ?, ?)",
+                        (key, result["class"], result["outcome"], " + ".join(result["products"]),
+                         result["generation"], result["population"]))
+    
+    def search(self, first, second, radius=8, workers=None, progress=None):
+        """Collide two cell lists at every offset within `radius` and every phase.
+        Returns one result per configuration with phase, dx and dy added,
+        ranked by outcome class."""
+        import concurrent.futures
+        results = []
+        jobs = {}  # {cache key: [(phase, dx, dy)]} still to be run
+        pending = []
+        for phase, dx, dy, moved, placed in self.configurations(first, second, radius):
+            key = self.cache_key(moved, placed)
+            if key in jobs:
+                jobs[key].append((phase, dx, dy))
+                continue
+            result = self.lookup(key)
+            if result is not None:
+                results.append(dict(result, phase=phase, dx=dx, dy=dy))
+                continue
+            jobs[key] = [(phase, dx, dy)]
+            pending.append((key, sorted(moved), sorted(placed)))
+        self.hits = len(results)
+        
+        # Configurations that are mirror images of each other share a key and run once
+        if pending:
+            workers = workers or max(1, (os.cpu_count() or 2) - 1)
+            with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(run_collisions, pending[start:start + self.batch_size],
+                                           self.rule_string, self.max_generations)
+                           for start in range(0, len(pending), self.batch_size)]
+                done = 0
+                for future in concurrent.futures.as_completed(futures):
+                    for key, result in future.result():
+                        self.store(key, result)
+                        results.extend(dict(result, phase=phase, dx=dx, dy=dy) for phase, dx, dy in jobs[key])
+                        done += 1
+                    self.db.commit()
+                    if progress:
+                        progress(done, len(pending))
+        return self.rank(results)
+    
+    def rank(self, results):
+        """Order results by outcome class, then by how quickly they settled."""
+        return sorted(results, key=lambda result: (COLLISION_CLASSES.index(result["class"]),
+                                                   result["generation"], result["phase"],
+                                                   result["dx"], result["dy"]))
+    
+    def close(self):
+        """Close the index."""
+        self.db.close()
+
+
+def interpolate_color(color1, color2, progress):
+    """Linearly interpolate between two RGB colors."""
+    r = int(color1[0] + (color2[0] - color1[0]) * progress)
+    g = int(color1[1] + (color2[1] - color1[1]) * progress)
+    b = int(color1[2] + (color2[2] - color1[2]) * progress)
+    return (r, g, b)
+
+
+class Animation:
+    """A time-based effect advanced by the AnimationScheduler.
+    on_update receives the progress (0 to 1) every frame."""
+    
+    def __init__(self, duration, on_update, on_complete=None, loop=False, ambient=False, pausable=False):
+        self.duration = duration  # milliseconds
+        self.on_update = on_update
+        self.on_complete = on_complete
+        self.loop = loop  # Restart from 0 instead of finishing
+        self.ambient = ambient  # Doesn't need frames on its own (won't keep the app awake)
+        self.pausable = pausable  # Frozen while the simulation is paused
+        self.elapsed = 0
+    
+    def advance(self, dt):
+        """Advance by dt milliseconds. Returns True when the animation has finished."""
+        self.elapsed += dt
+        if self.loop:
+            self.on_update((self.elapsed % self.duration) / self.duration)
+            return False
+        progress = min(1.0, self.elapsed / self.duration)
+        self.on_update(progress)
+        return progress >= 1.0
+
+
+class AnimationScheduler:
+    """Runs animations between frames of the main loop so they never block it."""
+    
+    def __init__(self):
+        self.animations = {}  # {name: Animation}
+        self.last_time = None
+    
+    def start(self, name, animation):
+        """Start an animation, replacing any running animation with the same name."""
+        self.animations[name] = animation
+    
+    def stop(self, name):
+        """Stop an animation without completing it."""
+        self.animations.pop(name, None)
+    
+    def update(self, now, simulation_paused=False):
+        """Advance all animations to the time now (milliseconds)."""
+        dt = 0 if self.last_time is None else now - self.last_time
+        self.last_time = now
+        
+        for name, animation in list(self.animations.items()):
+            if animation.pausable and simulation_paused:
+                continue
+            if animation.advance(dt):
+                # Don't drop a replacement started from on_update
+                if self.animations.get(name) is animation:
+                    del self.animations[name]
+                if animation.on_complete:
+                    animation.on_complete()
+    
+    def is_busy(self):
+        """Return True if any animation needs frames to be rendered."""
+        return any(not animation.ambient for animation in self.animations.values())
+
+
+class TextCache:
+    """Small LRU cache of rendered text surfaces."""
+    
+    def __init__(self, max_size=256):
+        self.max_size = max_size
+        self.surfaces = OrderedDict()  # {(font id, text, color): Surface}
+    
+    def render(self, font, text, color):
+        """Return the rendered text, reusing a cached surface when possible."""
+        key = (id(font), text, tuple(color))
+        surface = self.surfaces.get(key)
+        if surface is None:
+            surface = font.render(text, True, color)
+            self.surfaces[key] = surface
+            if len(self.surfaces) > self.max_size:
+                self.surfaces.popitem(last=False)
+        else:
+            self.surfaces.move_to_end(key)
+        return surface
+    
+    def clear(self):
+        """Drop all cached surfaces."""
+        self.surfaces.clear()
+
+
+PATTERN_INFO_EVENT = pygame.USEREVENT + 1  # Background pattern analysis has new results
+RULE_EXPLORER_EVENT = pygame.USEREVENT + 2  # Background rule exploration has new results
+
+
+# Color themes of the UI, also used for exported images
+COLOR_THEMES = {
+    "Default": {
+        "bg": (30, 30, 30),
+        "grid": (50, 50, 50),
+        "button": (80, 80, 80),
+        "button_highlight": (100, 100, 160),
+        "button_active": (100, 160, 100),
+        "text": (255, 255, 255),
+        "text_highlight": (255, 255, 100),
+        "sidebar_bg": (40, 40, 45),
+        "cell_new": (200, 220, 255),
+        "cell_young": (100, 150, 255),
+        "cell_adult": (120, 100, 220),
+        "cell_old_base": (80, 60, 160),
+        "cell_glow": (100, 220, 120)
+    },
+    "Light": {
+        "bg": (240, 240, 240),
+        "grid": (180, 180, 180),
+        "button": (200, 200, 200),
+        "button_highlight": (180, 180, 220),
+        "button_active": (150, 200, 150),
+        "text": (20, 20, 20),
+        "text_highlight": (0, 0, 100),
+        "sidebar_bg": (220, 220, 225),
+        "cell_new": (50, 100, 255),
+        "cell_young": (80, 120, 220),
+        "cell_adult": (100, 70, 200),
+        "cell_old_base": (130, 90, 200),
+        "cell_glow": (50, 180, 50)
+    },
+    "High Contrast": {
+        "bg": (0, 0, 0),
+        "grid": (40, 40, 40),
+        "button": (60, 60, 60),
+        "button_highlight": (90, 90, 160),
+        "button_active": (90, 150, 90),
+        "text": (255, 255, 255),
+        "text_highlight": (255, 255, 0),
+        "sidebar_bg": (30, 30, 35),
+        "cell_new": (255, 255, 255),
+        "cell_young": (200, 200, 255),
+        "cell_adult": (150, 100, 255),
+        "cell_old_base": (180, 120, 255),
+        "cell_glow": (100, 255, 100)
+    },
+    "Neon": {
+        "bg": (10, 10, 20),
+        "grid": (30, 30, 50),
+        "button": (50, 50, 70),
+        "button_highlight": (80, 50, 130),
+        "button_active": (50, 130, 80),
+        "text": (220, 220, 255),
+        "text_highlight": (255, 255, 0),
+        "sidebar_bg": (20, 20, 35),
+        "cell_new": (0, 255, 255),
+        "cell_young": (0, 200, 255),
+        "cell_adult": (0, 100, 255),
+        "cell_old_base": (80, 0, 255),
+        "cell_glow": (0, 255, 100)
+    }
+}
+
+
+def age_color(theme, age, pulse_phase=0.0):
+    """Return the color of a cell of the given age in a theme."""
+    if age <= 1:  # New cells
+        return theme["cell_new"]
+    elif age <= 5:  # Young cells
+        return theme["cell_young"]
+    elif age <= 15:  # Medium age cells
+        return theme["cell_adult"]
+    else:  # Old cells with improved visibility
+        # Calculate a better color that doesn't get too dark
+        base_color = theme["cell_old_base"]
+        # Add slight pulsation based on age (and the animated pulse phase)
+        # to make older cells more distinct
+        pulse = ((age % 10) / 10 + pulse_phase) % 1.0  # Creates a value between 0 and 1
+        r = min(255, base_color[0] + int(pulse * 30))
+        g = min(255, base_color[1] + int(pulse * 20))
+        b = min(255, base_color[2] + int(pulse * 40))
+        return (r, g, b)
+
+
+class GameOfLifeUI:
+    """Main UI class handling the graphical interface and user interactions."""
+    
+    HEATMAP_MODES = ("off", "recent", "total")
+    DENSITY_BLOCK_PIXELS = 8  # Smallest block drawn by the density rendering
+    
+    def __init__(self):
+        # Initialize pygame
+        pygame.init()
+        self.screen = pygame.display.set_mode((1200, 800), pygame.RESIZABLE)
+        pygame.display.set_caption("Ultimate Game of Life")
+        
+        # Initialize game
+        self.game = GameOfLife()
+        
+        # Add some initial cells to make the grid not empty
+        self.game.add_pattern("Glider", 10, 10)
+        
+        # View settings
+        self.cell_size = 10
+        self.offset_x = 400
+        self.offset_y = 300
+        self.paused = True
+        self.simulation_speed = 10  # FPS
+        
+        # Mouse tracking
+        self.mouse_pos = (0, 0)
+        self.drawing = False
+        self.erasing = False
+        self.panning = False
+        self.pan_start = (0, 0)
         
         # Pattern placement mode
         self.placing_pattern = False
         self.selected_pattern = None
+        self.pattern_rotation = 0  # Clockwise quarter turns
+        self.pattern_flip = False
+        self.placement_mode = GameOfLife.OR
+        
+        # Last grid cell of a drawing/erasing stroke, to fill gaps between motion events
+        self.stroke_cell = None
+        
+        # Rectangular selection (inclusive grid bounds) and clipboard ([y, x] boolean array)
+        self.selection = None
+        self.selecting = False
+        self.selection_anchor = (0, 0)
+        self.clipboard = None
         
         # UI constants - use consistent spacing values
         self.UI_BUTTON_HEIGHT = 30
@@ -739,68 +3076,7 @@ class GameOfLifeUI:
         self.patterns_per_page = 8  # Number of patterns visible at once
         
         # Color themes
-        self.color_themes = {
-            "Default": {
-                "bg": (30, 30, 30),
-                "grid": (50, 50, 50),
-                "button": (80, 80, 80),
-                "button_highlight": (100, 100, 160),
-                "button_active": (100, 160, 100),
-                "text": (255, 255, 255),
-                "text_highlight": (255, 255, 100),
-                "sidebar_bg": (40, 40, 45),
-                "cell_new": (200, 220, 255),
-                "cell_young": (100, 150, 255),
-                "cell_adult": (120, 100, 220),
-                "cell_old_base": (80, 60, 160),
-                "cell_glow": (100, 220, 120)
-            },
-            "Light": {
-                "bg": (240, 240, 240),
-                "grid": (180, 180, 180),
-                "button": (200, 200, 200),
-                "button_highlight": (180, 180, 220),
-                "button_active": (150, 200, 150),
-                "text": (20, 20, 20),
-                "text_highlight": (0, 0, 100),
-                "sidebar_bg": (220, 220, 225),
-                "cell_new": (50, 100, 255),
-                "cell_young": (80, 120, 220),
-                "cell_adult": (100, 70, 200),
-                "cell_old_base": (130, 90, 200),
-                "cell_glow": (50, 180, 50)
-            },
-            "High Contrast": {
-                "bg": (0, 0, 0),
-                "grid": (40, 40, 40),
-                "button": (60, 60, 60),
-                "button_highlight": (90, 90, 160),
-                "button_active": (90, 150, 90),
-                "text": (255, 255, 255),
-                "text_highlight": (255, 255, 0),
-                "sidebar_bg": (30, 30, 35),
-                "cell_new": (255, 255, 255),
-                "cell_young": (200, 200, 255),
-                "cell_adult": (150, 100, 255),
-                "cell_old_base": (180, 120, 255),
-                "cell_glow": (100, 255, 100)
-            },
-            "Neon": {
-                "bg": (10, 10, 20),
-                "grid": (30, 30, 50),
-                "button": (50, 50, 70),
-                "button_highlight": (80, 50, 130),
-                "button_active": (50, 130, 80),
-                "text": (220, 220, 255),
-                "text_highlight": (255, 255, 0),
-                "sidebar_bg": (20, 20, 35),
-                "cell_new": (0, 255, 255),
-                "cell_young": (0, 200, 255),
-                "cell_adult": (0, 100, 255),
-                "cell_old_base": (80, 0, 255),
-                "cell_glow": (0, 255, 100)
-            }
-        }
+        self.color_themes = COLOR_THEMES
         
         # Current color theme
         self.current_theme = "Default"
@@ -813,7 +3089,14 @@ class GameOfLifeUI:
             400, 300
         )
         
+        # Animations (theme fades, age pulse, ...) advanced once per frame by the main loop
+        self.animations = AnimationScheduler()
+        self.pulse_phase = 0.0
+        self.animations.start("age_pulse", Animation(2000, self.set_pulse_phase,
+                                                     loop=True, ambient=True, pausable=True))
+        
         # Colors - will be set from theme
+        self.theme_colors = dict(self.color_themes[self.current_theme])
         self.COLOR_BG = (30, 30, 30)
         self.COLOR_GRID = (50, 50, 50)
         self.COLOR_BUTTON = (80, 80, 80)
@@ -833,10 +3116,66 @@ class GameOfLifeUI:
         }
         
         # UI elements
-        self.font = pygame.font.SysFont('Arial', 16)
-        self.font_bold = pygame.font.SysFont('Arial', 16, bold=True)
-        self.font_small = pygame.font.SysFont('Arial', 14)
-        self.font_title = pygame.font.SysFont('Arial', 18, bold=True)
+        fonts = FontCache()  # Font files are looked up once and remembered across runs
+        self.font = fonts.get('Arial', 16)
+        self.font_bold = fonts.get('Arial', 16, bold=True)
+        self.font_small = fonts.get('Arial', 14)
+        self.font_title = fonts.get('Arial', 18, bold=True)
+        fonts.save_cache()
+        
+        # Retained UI - static chrome is drawn once and reused until it changes
+        self.text_cache = TextCache()
+        self.ui_surface = None
+        self.ui_regions = []
+        self.ui_state_key = None
+        self.settings_surface = None
+        
+        # Dirty-rectangle tracking - only changed regions are redrawn and presented
+        self.full_redraw = True
+        self.view_key = None
+        self.last_status_texts = None
+        self.last_cursor_rect = None
+        self.last_selection_rect = None
+        
+        # Activity heatmap overlay (H): "off", "recent" or "total" flips per cell
+        self.heatmap_mode = "off"
+        self.heatmap_colormap = None  # (theme colors, lookup table) built on first use
+        self.heatmap_generation = 0  # Generation the overlay was last drawn for
+        
+        # Statistics sparklines, redrawn only when new samples arrive
+        self.show_statistics = True
+        self.statistics_surface = None
+        self.statistics_key = None
+        
+        # Timing overlay (F3), trace capture (F4) and cProfile capture (F5)
+        self.timer = self.game.timer
+        self.show_timings = False
+        self.timing_texts = ()
+        self.timing_texts_time = 0
+        self.timing_surface = None
+        self.last_timing_rect = None
+        
+        # Render quality, lowered while frames take longer than the budget
+        self.governor = FrameGovernor()
+        self.last_frame_full = False  # Whether the last render() redrew the whole window
+        
+        # Memory accounting, checked every few generations against the budget
+        self.memory_budget = MemoryBudget()
+        self.memory_usage = {}
+        self.memory_warning = None
+        self.memory_notice = None  # Budget actions applied at the last check, shown in the help line
+        
+        # Rule explorer gallery (B), filled by a background process pool
+        self.rule_explorer = RuleExplorer(
+            on_result=lambda: pygame.event.post(pygame.event.Event(RULE_EXPLORER_EVENT))
+        )
+        self.show_explorer = False
+        self.explorer_sort = "class"
+        self.explorer_scroll = 0
+        self.explorer_surface = None
+        self.explorer_key = None
+        self.explorer_rows = []  # (screen rect, rule string) of the visible gallery rows
+        self.explorer_buttons = {}  # {action: screen rect}
         
         # Main buttons
         self.btn_pause = pygame.Rect(10, 10, 80, 30)
@@ -862,7 +3201,7 @@ class GameOfLifeUI:
             self.sidebar_rect.x + 5, 
             self.sidebar_rect.y + 80,  # Leave space for category tabs
             self.UI_SIDEBAR_WIDTH - 10,
-            self.sidebar_rect.height - 120
+            self.sidebar_rect.height - 150
         )
         
         # Scroll buttons
@@ -886,7 +3225,7 @@ class GameOfLifeUI:
             self.sidebar_rect.x + 5,
             self.pattern_area.bottom + 10,
             self.UI_SIDEBAR_WIDTH - 10,
-            80
+            110
         )
         
         # Help text area - positioned at bottom right instead of bottom left
@@ -896,12 +3235,22 @@ class GameOfLifeUI:
             590, 30
         )
         
-        # Setup temporary surface for pattern preview
-        self.preview_surface = pygame.Surface((self.screen.get_width(), self.screen.get_height()), pygame.SRCALPHA)
+        # Rendered pattern previews, reused while the mouse moves
+        self.preview_sprites = OrderedDict()  # {(pattern, rotation, flip, cell_size, color): Surface}
+        self.max_preview_sprites = 32
+        self.preview_surface = None  # Full-window fallback for previews too big for a sprite
         
         # Apply the current theme colors - after all UI elements are initialized
         self.apply_theme(self.current_theme)
         
+        # Pattern metadata (period, speed, ...) is computed by background processes;
+        # finished results wake up the main loop through PATTERN_INFO_EVENT.
+        # Nothing is read or started until finish_startup(), after the first frame
+        self.pattern_analyzer = PatternAnalyzer(
+            self.game.patterns,
+            on_result=lambda: pygame.event.post(pygame.event.Event(PATTERN_INFO_EVENT))
+        )
+        
         # Main loop
         self.clock = pygame.time.Clock()
         self.running = True
@@ -910,59 +3259,45 @@ class GameOfLifeUI:
         """Apply the selected color theme with a smooth transition"""
         if theme_name in self.color_themes:
             new_theme = self.color_themes[theme_name]
+            self.current_theme = theme_name
             
             # During initial setup, just set the colors directly without animation
             if hasattr(self, 'running') and self.running:
-                # This is a user-triggered change, not initial setup
-                old_theme = self.color_themes[self.current_theme]
-                
-                # Create a transition animation
-                start_time = pygame.time.get_ticks()
-                transition_duration = 300  # milliseconds
+                # This is a user-triggered change - fade from whatever is on screen now,
+                # which may itself be partway through another transition
+                old_colors = dict(self.theme_colors)
                 
-                # Function to interpolate between colors
-                def interpolate_color(color1, color2, progress):
-                    r = int(color1[0] + (color2[0] - color1[0]) * progress)
-                    g = int(color1[1] + (color2[1] - color1[1]) * progress)
-                    b = int(color1[2] + (color2[2] - color1[2]) * progress)
-                    return (r, g, b)
+                def update(progress):
+                    self.set_theme_colors({
+                        key: interpolate_color(old_colors[key], color, progress)
+                        for key, color in new_theme.items()
+                    })
                 
-                # Animate the transition
-                while True:
-                    current_time = pygame.time.get_ticks()
-                    elapsed = current_time - start_time
-                    
-                    if elapsed >= transition_duration:
-                        # Transition complete
-                        break
-                    
-                    # Calculate transition progress (0 to 1)
-                    progress = elapsed / transition_duration
-                    
-                    # Interpolate colors
-                    self.COLOR_BG = interpolate_color(old_theme["bg"], new_theme["bg"], progress)
-                    self.COLOR_GRID = interpolate_color(old_theme["grid"], new_theme["grid"], progress)
-                    self.COLOR_BUTTON = interpolate_color(old_theme["button"], new_theme["button"], progress)
-                    self.COLOR_BUTTON_HIGHLIGHT = interpolate_color(old_theme["button_highlight"], new_theme["button_highlight"], progress)
-                    self.COLOR_BUTTON_ACTIVE = interpolate_color(old_theme["button_active"], new_theme["button_active"], progress)
-                    self.COLOR_TEXT = interpolate_color(old_theme["text"], new_theme["text"], progress)
-                    self.COLOR_TEXT_HIGHLIGHT = interpolate_color(old_theme["text_highlight"], new_theme["text_highlight"], progress)
-                    self.COLOR_SIDEBAR_BG = interpolate_color(old_theme["sidebar_bg"], new_theme["sidebar_bg"], progress)
-                    
-                    # Render a frame
-                    self.render()
-                    self.clock.tick(60)  # Cap at 60fps for the transition
-            
-            # Set final colors
-            self.current_theme = theme_name
-            self.COLOR_BG = new_theme["bg"]
-            self.COLOR_GRID = new_theme["grid"]
-            self.COLOR_BUTTON = new_theme["button"]
-            self.COLOR_BUTTON_HIGHLIGHT = new_theme["button_highlight"]
-            self.COLOR_BUTTON_ACTIVE = new_theme["button_active"]
-            self.COLOR_TEXT = new_theme["text"]
-            self.COLOR_TEXT_HIGHLIGHT = new_theme["text_highlight"]
-            self.COLOR_SIDEBAR_BG = new_theme["sidebar_bg"]
+                self.animations.start("theme", Animation(300, update))
+            else:
+                self.set_theme_colors(new_theme)
+    
+    def set_theme_colors(self, colors):
+        """Set the colors used for drawing from a theme color dictionary."""
+        self.theme_colors = dict(colors)
+        self.COLOR_BG = colors["bg"]
+        self.COLOR_GRID = colors["grid"]
+        self.COLOR_BUTTON = colors["button"]
+        self.COLOR_BUTTON_HIGHLIGHT = colors["button_highlight"]
+        self.COLOR_BUTTON_ACTIVE = colors["button_active"]
+        self.COLOR_TEXT = colors["text"]
+        self.COLOR_TEXT_HIGHLIGHT = colors["text_highlight"]
+        self.COLOR_SIDEBAR_BG = colors["sidebar_bg"]
+    
+    def set_pulse_phase(self, progress):
+        """Update the age pulse of old cells (driven by the animation scheduler)."""
+        # Quantize so old cells are only redrawn a few times per cycle
+        phase = int(progress * 10) / 10
+        if phase != self.pulse_phase:
+            self.pulse_phase = phase
+            bounds = self.game.get_bounds()
+            if bounds:
+                self.game.mark_dirty(*bounds)
     
     def create_category_tabs(self):
         """Create tabs for each pattern category"""
@@ -1006,18 +3341,87 @@ class GameOfLifeUI:
     
     def run(self):
         """Main application loop."""
+        # Get the first frame on screen before starting background work
+        self.render()
+        self.finish_startup()
+        
+        last_step_time = pygame.time.get_ticks()
         while self.running:
-            self.handle_events()
+            if self.is_idle():
+                # Nothing is changing on its own - sleep until the next input event
+                self.handle_events(pygame.event.wait())
+            else:
+                self.handle_events()
             
-            if not self.paused:
+            now = pygame.time.get_ticks()
+            self.animations.update(now, self.paused)
+            
+            # The simulation advances at its own speed, independent of the frame rate
+            stepped = False
+            if not self.paused and now - last_step_time >= 1000 / self.simulation_speed:
                 self.game.step()
+                last_step_time = now
+                stepped = True
+                self.check_memory_budget()
+            
+            # Frames showing a new generation or the whole view feed the quality governor
+            start = time.perf_counter()
+            if self.render() and (stepped or self.last_frame_full):
+                self.governor.record((time.perf_counter() - start) * 1000)
+            self.timer.end_frame()
             
-            self.render()
-            self.clock.tick(self.simulation_speed)
+            # Run at a smooth frame rate only while something is animating
+            self.clock.tick(60 if self.animations.is_busy() else self.simulation_speed)
+        
+        self.timer.finish_profile()
+        self.pattern_analyzer.shutdown()
+        self.rule_explorer.shutdown()
+    
+    def finish_startup(self):
+        """Run the initialization that the first frame does not need."""
+        self.pattern_analyzer.analyze(self.game.rule_string)  # Reads the metadata cache, starts workers
+    
+    def check_memory_budget(self, force=False):
+        """Measure memory use and apply the budget actions, pausing if still over budget."""
+        if not (force or self.memory_budget.due(self.game.generation)):
+            return
+        usage, applied, warning = self.memory_budget.enforce(self.game, self.get_memory_usage, self.drop_caches)
+        self.memory_usage = usage
+        self.memory_notice = f"Memory budget: applied {', '.join(applied).replace('_', ' ')}" if applied else None
+        if warning:
+            self.paused = True
+        self.memory_warning = warning
+    
+    def get_memory_usage(self):
+        """Return estimated bytes for the simulation plus the UI caches and render buffers."""
+        usage = self.game.memory_usage()
+        usage["caches"] += (sum(surface_bytes(surface) for surface in self.text_cache.surfaces.values())
+                            + sum(surface_bytes(surface) for surface in self.preview_sprites.values()))
+        usage["render"] = sum(surface_bytes(surface) for surface in (
+            self.screen, self.ui_surface, self.settings_surface, self.statistics_surface,
+            self.timing_surface, self.preview_surface))
+        return usage
+    
+    def drop_caches(self):
+        """Drop the UI caches that are rebuilt on demand."""
+        self.text_cache.clear()
+        self.preview_sprites.clear()
+        self.preview_surface = None
+        self.invalidate_ui()
+        self.full_redraw = True
     
-    def handle_events(self):
+    def is_idle(self):
+        """Return True if the window only needs to change in response to input."""
+        return (self.paused and not (self.drawing or self.erasing or self.panning or self.selecting)
+                and not self.animations.is_busy())
+    
+    def handle_events(self, first_event=None):
         """Process user input events."""
-        for event in pygame.event.get():
+        events = pygame.event.get()
+        if first_event is not None:
+            events.insert(0, first_event)
+        
+        for event in events:
             if event.type == pygame.QUIT:
                 self.running = False
             
@@ -1038,6 +3442,16 @@ class GameOfLifeUI:
             
             elif event.type == pygame.VIDEORESIZE:
                 self.handle_video_resize(event)
+            
+            elif event.type == PATTERN_INFO_EVENT:
+                self.pattern_analyzer.poll()
+            
+            elif event.type == RULE_EXPLORER_EVENT:
+                self.rule_explorer.poll()
+            
+            elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                # Window contents were lost (uncovered, restored, etc.)
+                self.full_redraw = True
     
     def handle_mouse_button_down(self, event):
         """Handle mouse button press events."""
@@ -1045,6 +3459,11 @@ class GameOfLifeUI:
             # Check if buttons were clicked
             mouse_pos = pygame.mouse.get_pos()
             
+            # The rule explorer takes all clicks while it is open
+            if self.show_explorer:
+                self.handle_explorer_click(mouse_pos)
+                return
+            
             # If settings panel is open, check for interactions with it first
             if self.show_settings:
                 # Check if close button was clicked
@@ -1111,6 +3530,7 @@ class GameOfLifeUI:
                     for rule_name, btn_rect in self.rule_buttons.items():
                         if btn_rect.collidepoint(mouse_pos):
                             self.game.set_rules(self.rule_presets[rule_name])
+                            self.pattern_analyzer.analyze(self.game.rule_string)
                             rule_clicked = True
                             break
                     
@@ -1119,15 +3539,24 @@ class GameOfLifeUI:
                         pattern_clicked = self.check_pattern_button_click(mouse_pos)
                         
                         if not pattern_clicked:
-                            if self.placing_pattern and self.selected_pattern:
+                            if pygame.key.get_mods() & pygame.KMOD_SHIFT:
+                                # Start a new selection rectangle
+                                self.selecting = True
+                                self.selection_anchor = self.get_grid_pos(mouse_pos)
+                                self.selection = self.selection_anchor * 2
+                            elif self.placing_pattern and self.selected_pattern:
                                 # Place the selected pattern
                                 grid_x = (mouse_pos[0] - self.offset_x) // self.cell_size
                                 grid_y = (mouse_pos[1] - self.offset_y) // self.cell_size
-                                self.game.add_pattern(self.selected_pattern, grid_x, grid_y)
+                                self.game.add_pattern(self.selected_pattern, grid_x, grid_y,
+                                                      self.pattern_rotation, self.pattern_flip,
+                                                      self.placement_mode)
                                 # Don't cancel placement mode - allow placing multiple patterns
                             else:
                                 # Start drawing cells - regardless of paused state
                                 self.drawing = True
+                                self.stroke_cell = None
+                                self.game.begin_edit()  # The whole stroke is one undo step
                                 self.handle_cell_drawing(mouse_pos)
         
         elif event.button == 3:  # Right click
@@ -1138,6 +3567,8 @@ class GameOfLifeUI:
             else:
                 # Start erasing cells
                 self.erasing = True
+                self.stroke_cell = None
+                self.game.begin_edit()  # The whole stroke is one undo step
                 self.handle_cell_erasing(pygame.mouse.get_pos())
         
         elif event.button == 2:  # Middle click
@@ -1168,8 +3599,11 @@ class GameOfLifeUI:
         """Handle mouse button release events."""
         if event.button == 1:
             self.drawing = False
+            self.selecting = False
+            self.game.end_edit()
         elif event.button == 3:
             self.erasing = False
+            self.game.end_edit()
         elif event.button == 2:
             self.panning = False
     
@@ -1180,6 +3614,12 @@ class GameOfLifeUI:
             self.handle_cell_drawing(event.pos)
         elif self.erasing:
             self.handle_cell_erasing(event.pos)
+        elif self.selecting:
+            # Stretch the selection from the anchor to the cursor
+            anchor_x, anchor_y = self.selection_anchor
+            grid_x, grid_y = self.get_grid_pos(event.pos)
+            self.selection = (min(anchor_x, grid_x), min(anchor_y, grid_y),
+                              max(anchor_x, grid_x), max(anchor_y, grid_y))
         elif self.panning:
             # Handle panning the view
             current_pos = pygame.mouse.get_pos()
@@ -1192,15 +3632,44 @@ class GameOfLifeUI:
     def handle_key_down(self, event):
         """Handle keyboard input events."""
         if event.key == pygame.K_ESCAPE:
-            # If settings panel is open, close it
+            # If settings panel or rule explorer is open, close it
             if self.show_settings:
                 self.show_settings = False
+            elif self.show_explorer:
+                self.show_explorer = False
             # Otherwise cancel pattern placement
             elif self.placing_pattern:
                 self.placing_pattern = False
                 self.selected_pattern = None
+            # Otherwise drop the selection
+            else:
+                self.selection = None
+        elif event.key in (pygame.K_c, pygame.K_x, pygame.K_v) and pygame.key.get_mods() & pygame.KMOD_CTRL:
+            self.handle_clipboard_key(event.key)
+        elif self.selection and not self.placing_pattern and self.handle_selection_key(event):
+            pass
+        elif event.key == pygame.K_r and self.placing_pattern:
+            self.pattern_rotation = (self.pattern_rotation + 1) % 4
+        elif event.key == pygame.K_f and self.placing_pattern:
+            self.pattern_flip = not self.pattern_flip
+        elif event.key == pygame.K_m and self.placing_pattern:
+            # Cycle through the placement modes
+            modes = GameOfLife.PLACEMENT_MODES
+            self.placement_mode = modes[(modes.index(self.placement_mode) + 1) % len(modes)]
         elif event.key == pygame.K_SPACE:
             self.paused = not self.paused
+        elif event.key == pygame.K_t:
+            self.show_statistics = not self.show_statistics
+        elif event.key == pygame.K_b:
+            self.toggle_explorer()
+        elif event.key == pygame.K_h:
+            self.cycle_heatmap()
+        elif event.key == pygame.K_e:
+            # Cycle auto -> sparse -> dense engine
+            modes = GameOfLife.ENGINE_MODES
+            self.game.set_engine(modes[(modes.index(self.game.engine_mode) + 1) % len(modes)])
+        elif event.key in (pygame.K_F3, pygame.K_F4, pygame.K_F5):
+            self.handle_timing_key(event.key)
         elif event.key == pygame.K_s:
             # Use 'S' key for stepping instead of right arrow
             self.game.step()
@@ -1218,9 +3687,109 @@ class GameOfLifeUI:
         elif event.key == pygame.K_RIGHT:
             self.offset_x -= 20
     
+    def handle_timing_key(self, key):
+        """Toggle the timing overlay (F3), start/export a trace (F4) or profile frames (F5)."""
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        if key == pygame.K_F3:
+            self.show_timings = not self.show_timings
+            if not self.timer.tracing:
+                self.timer.set_enabled(self.show_timings)
+        elif key == pygame.K_F4:
+            if self.timer.tracing:
+                path = f"trace_{stamp}.json"
+                count = self.timer.export_trace(path)
+                self.timer.tracing = False
+                self.timer.set_enabled(self.show_timings)
+                print(f"Wrote {count} trace events to {path}")
+            else:
+                self.timer.start_trace()
+        elif key == pygame.K_F5:
+            self.timer.start_profile(120, f"profile_{stamp}.prof")
+    
+    def cycle_heatmap(self):
+        """Cycle the activity heatmap overlay: off -> recent -> total -> off.
+        Flips are only counted while the overlay is shown."""
+        modes = self.HEATMAP_MODES
+        self.heatmap_mode = modes[(modes.index(self.heatmap_mode) + 1) % len(modes)]
+        self.game.set_heatmap(self.heatmap_mode != "off")
+        self.full_redraw = True
+    
+    def toggle_explorer(self):
+        """Open or close the rule explorer, starting a first survey when empty."""
+        self.show_explorer = not self.show_explorer
+        if self.show_explorer and not self.rule_explorer.requested:
+            self.rule_explorer.explore(256)
+    
+    def handle_explorer_click(self, mouse_pos):
+        """Handle a click inside the open rule explorer."""
+        for action, rect in self.explorer_buttons.items():
+            if rect.collidepoint(mouse_pos):
+                if action == "close":
+                    self.show_explorer = False
+                elif action == "more":
+                    self.rule_explorer.explore(256)
+                else:
+                    self.explorer_sort = action
+                    self.explorer_scroll = 0
+                return
+        
+        # Clicking a gallery row applies its rule
+        for rect, rule in self.explorer_rows:
+            if rect.collidepoint(mouse_pos):
+                self.game.set_rules(rule)
+                self.pattern_analyzer.analyze(self.game.rule_string)
+                return
+    
+    def handle_clipboard_key(self, key):
+        """Copy (Ctrl+C), cut (Ctrl+X) or paste (Ctrl+V)."""
+        if key in (pygame.K_c, pygame.K_x) and self.selection:
+            self.clipboard = self.game.get_region(*self.selection)
+            if key == pygame.K_x:
+                self.game.clear_region(*self.selection)
+        elif key == pygame.K_v and self.clipboard is not None and self.clipboard.any():
+            # Paste through the normal pattern placement mode
+            ys, xs = np.nonzero(self.clipboard)
+            self.game.set_pattern("Clipboard", zip(xs.tolist(), ys.tolist()))
+            for sprite_key in [k for k in self.preview_sprites if k[0] == "Clipboard"]:
+                del self.preview_sprites[sprite_key]
+            self.selected_pattern = "Clipboard"
+            self.placing_pattern = True
+            self.pattern_analyzer.analyze(self.game.rule_string)
+    
+    def handle_selection_key(self, event):
+        """Apply a key to the current selection. Returns True if the key was used."""
+        min_x, min_y, max_x, max_y = self.selection
+        moves = {pygame.K_UP: (0, -1), pygame.K_DOWN: (0, 1), pygame.K_LEFT: (-1, 0), pygame.K_RIGHT: (1, 0)}
+        
+        if event.key in (pygame.K_DELETE, pygame.K_BACKSPACE):
+            self.game.clear_region(*self.selection)
+        elif event.key == pygame.K_r:
+            self.selection = self.game.transform_region(*self.selection, rotation=1)
+        elif event.key == pygame.K_f:
+            self.selection = self.game.transform_region(*self.selection, flip=True)
+        elif event.key == pygame.K_g:
+            self.game.random_fill(*self.selection, density=0.35)
+        elif event.key in moves and pygame.key.get_mods() & pygame.KMOD_SHIFT:
+            # Nudge the selected cells (and the selection) by one cell
+            dx, dy = moves[event.key]
+            self.game.move_region(*self.selection, dx, dy)
+            self.selection = (min_x + dx, min_y + dy, max_x + dx, max_y + dy)
+        else:
+            return False
+        return True
+    
+    def get_grid_pos(self, pos):
+        """Return the grid cell under a screen position."""
+        return (int((pos[0] - self.offset_x) // self.cell_size),
+                int((pos[1] - self.offset_y) // self.cell_size))
+    
     def handle_mouse_wheel(self, event):
         """Handle mouse wheel events."""
-        if self.pattern_area.collidepoint(pygame.mouse.get_pos()):
+        if self.show_explorer:
+            # Scroll the rule gallery
+            max_scroll = max(0, len(self.rule_explorer.results) - len(self.explorer_rows))
+            self.explorer_scroll = min(max_scroll, max(0, self.explorer_scroll - event.y))
+        elif self.pattern_area.collidepoint(pygame.mouse.get_pos()):
             # Scroll pattern list
             self.pattern_scroll_y = max(0, self.pattern_scroll_y - event.y)
             # Use pattern_categories instead of non-existent pattern_names
@@ -1236,13 +3805,13 @@ class GameOfLifeUI:
         """Handle window resize events."""
         width, height = event.size
         self.screen = pygame.display.set_mode((width, height), pygame.RESIZABLE)
-        self.preview_surface = pygame.Surface((width, height), pygame.SRCALPHA)
+        self.preview_surface = None
         
         # Update sidebar position and size
         self.sidebar_rect.height = height - 100
         
         # Update pattern area size
-        self.pattern_area.height = self.sidebar_rect.height - 120
+        self.pattern_area.height = self.sidebar_rect.height - 150
         
         # Update scroll button positions
         self.pattern_scroll_down.y = self.pattern_area.bottom - 20
@@ -1279,35 +3848,85 @@ class GameOfLifeUI:
             # Decrease cell size (zoom out)
             self.cell_size = max(2, self.cell_size - 1)
         
-        # Adjust offset to keep zoom centered on mouse
-        self.offset_x = self.mouse_pos[0] - zoom_center_x * self.cell_size
-        self.offset_y = self.mouse_pos[1] - zoom_center_y * self.cell_size
+        # Adjust offset to keep zoom centered on mouse (whole pixels, as the
+        # grid rect queries need integer cell coordinates)
+        self.offset_x = round(self.mouse_pos[0] - zoom_center_x * self.cell_size)
+        self.offset_y = round(self.mouse_pos[1] - zoom_center_y * self.cell_size)
     
     def handle_cell_drawing(self, pos):
-        """Add a live cell at the current mouse position."""
-        grid_x = (pos[0] - self.offset_x) // self.cell_size
-        grid_y = (pos[1] - self.offset_y) // self.cell_size
-        self.game.add_cell(grid_x, grid_y)
+        """Add live cells along the stroke up to the current mouse position."""
+        self.game.set_cells(self.get_stroke_cells(pos), GameOfLife.OR)
     
     def handle_cell_erasing(self, pos):
-        """Remove a cell at the current mouse position."""
-        grid_x = (pos[0] - self.offset_x) // self.cell_size
-        grid_y = (pos[1] - self.offset_y) // self.cell_size
-        self.game.remove_cell(grid_x, grid_y)
+        """Remove cells along the stroke up to the current mouse position."""
+        self.game.set_cells(self.get_stroke_cells(pos), GameOfLife.AND_NOT)
+    
+    def get_stroke_cells(self, pos):
+        """Return the grid cells on the line from the previous stroke position to pos,
+        so fast mouse movements don't leave gaps."""
+        grid_x, grid_y = self.get_grid_pos(pos)
+        start_x, start_y = self.stroke_cell or (grid_x, grid_y)
+        self.stroke_cell = (grid_x, grid_y)
+        
+        steps = max(abs(grid_x - start_x), abs(grid_y - start_y)) + 1
+        xs = np.rint(np.linspace(start_x, grid_x, steps)).astype(np.int64)
+        ys = np.rint(np.linspace(start_y, grid_y, steps)).astype(np.int64)
+        return np.column_stack((xs, ys))
     
     def render(self):
-        """Render the current state of the simulation."""
-        # Clear screen with background color
-        self.screen.fill(self.COLOR_BG)
+        """Render the changed parts of the window and present them.
+        Returns True if anything was redrawn."""
+        dirty_rects = self.collect_dirty_rects()
+        self.last_frame_full = dirty_rects is None
+        
+        if dirty_rects is None:
+            # Redraw everything
+            self.screen.set_clip(None)
+            self.draw_scene()
+            with self.timer.phase("display"):
+                pygame.display.flip()
+            return True
+        
+        if not dirty_rects:
+            return False
+        
+        # Redraw only the changed regions, each one with all layers composited
+        for rect in dirty_rects:
+            self.screen.set_clip(rect)
+            self.draw_scene()
+        self.screen.set_clip(None)
         
-        # Draw grid
-        self.render_grid()
+        # Update display
+        with self.timer.phase("display"):
+            pygame.display.update(dirty_rects)
+        return True
+    
+    def draw_scene(self):
+        """Draw all layers into the current clip area of the screen."""
+        timer = self.timer
+        with timer.phase("render_grid"):
+            # Clear screen with background color
+            self.screen.fill(self.COLOR_BG)
+            
+            # Draw grid
+            self.render_grid()
         
         # Draw cells
-        self.render_cells()
+        with timer.phase("render_cells"):
+            self.render_cells()
+        
+        # Activity heatmap on top of the cells
+        if self.heatmap_mode != "off":
+            with timer.phase("render_heatmap"):
+                self.render_heatmap()
+        
+        # Draw the selection rectangle
+        if self.selection:
+            pygame.draw.rect(self.screen, self.COLOR_TEXT_HIGHLIGHT, self.get_selection_rect(), 1)
         
         # Draw UI elements
-        self.render_ui()
+        with timer.phase("render_ui"):
+            self.render_ui()
         
         # Show pattern preview if placing a pattern
         if self.placing_pattern and self.selected_pattern:
@@ -1321,40 +3940,183 @@ class GameOfLifeUI:
             pygame.draw.rect(self.screen, (70, 70, 70), 
                            (screen_x, screen_y, self.cell_size, self.cell_size), 1)
         
-        # Update display
-        pygame.display.flip()
+        # Timing overlay on top of everything
+        if self.show_timings:
+            self.render_timing_overlay()
     
-    def render_cells(self):
-        """Render all active cells in the grid."""
-        # Optimize by only rendering cells in the visible area
-        visible_width = self.screen.get_width()
-        visible_height = self.screen.get_height()
-        
-        # Calculate grid bounds that are visible
-        min_visible_x = (0 - self.offset_x) // self.cell_size - 1
-        min_visible_y = (0 - self.offset_y) // self.cell_size - 1
-        max_visible_x = (visible_width - self.offset_x) // self.cell_size + 1
-        max_visible_y = (visible_height - self.offset_y) // self.cell_size + 1
-        
-        for (x, y), age in self.game.cells.items():
-            # Skip cells outside visible area for performance
-            if not (min_visible_x <= x <= max_visible_x and min_visible_y <= y <= max_visible_y):
-                continue
-                
-            screen_x = x * self.cell_size + self.offset_x
-            screen_y = y * self.cell_size + self.offset_y
-            
-            # Determine cell color based on age
-            color = self.get_cell_color(age)
-            
-            # Draw the cell - with a subtle glow effect for newer cells
+    def get_view_key(self):
+        """Return a key describing everything that forces a full redraw when changed."""
+        return (
+            self.screen.get_size(),
+            self.offset_x, self.offset_y, self.cell_size,
+            self.current_theme, tuple(self.theme_colors.values()),
+            self.show_settings, self.show_explorer, self.heatmap_mode,
+            self.governor.tier,
+        )
+    
+    def get_preview_bounds(self):
+        """Return the grid bounds (min_x, min_y, max_x, max_y) the selected pattern
+        would cover if placed at the cursor, or None when not placing."""
+        if not (self.placing_pattern and self.selected_pattern in self.game.patterns):
+            return None
+        pattern = self.game.get_pattern(self.selected_pattern, self.pattern_rotation, self.pattern_flip)
+        min_x = min(x for x, y in pattern)
+        max_x = max(x for x, y in pattern)
+        min_y = min(y for x, y in pattern)
+        max_y = max(y for x, y in pattern)
+        grid_x = (self.mouse_pos[0] - self.offset_x) // self.cell_size
+        grid_y = (self.mouse_pos[1] - self.offset_y) // self.cell_size
+        left = grid_x - (min_x + max_x) // 2 + min_x
+        top = grid_y - (min_y + max_y) // 2 + min_y
+        return (left, top, left + max_x - min_x, top + max_y - min_y)
+    
+    def get_cursor_rect(self):
+        """Return the screen area of the cursor highlight or pattern preview."""
+        preview_bounds = self.get_preview_bounds()
+        if preview_bounds:
+            # Leave room for the two pixel bounding box glow
+            return self.grid_to_screen_rect(preview_bounds).inflate(2, 2)
+        if self.panning:
+            return None
+        grid_x = (self.mouse_pos[0] - self.offset_x) // self.cell_size
+        grid_y = (self.mouse_pos[1] - self.offset_y) // self.cell_size
+        return pygame.Rect(grid_x * self.cell_size + self.offset_x,
+                           grid_y * self.cell_size + self.offset_y,
+                           self.cell_size, self.cell_size)
+    
+    def get_selection_rect(self):
+        """Return the screen rect of the selection, or None if nothing is selected."""
+        if not self.selection:
+            return None
+        min_x, min_y, max_x, max_y = self.selection
+        return pygame.Rect(int(min_x * self.cell_size + self.offset_x),
+                           int(min_y * self.cell_size + self.offset_y),
+                           (max_x - min_x + 1) * self.cell_size,
+                           (max_y - min_y + 1) * self.cell_size)
+    
+    def grid_to_screen_rect(self, bounds):
+        """Convert grid bounds (min_x, min_y, max_x, max_y) to a screen rect."""
+        min_x, min_y, max_x, max_y = bounds
+        # Newer cells glow one pixel past their edges
+        return pygame.Rect(
+            int(min_x * self.cell_size + self.offset_x) - 1,
+            int(min_y * self.cell_size + self.offset_y) - 1,
+            (max_x - min_x + 1) * self.cell_size + 2,
+            (max_y - min_y + 1) * self.cell_size + 2
+        )
+    
+    def collect_dirty_rects(self):
+        """Gather the screen regions that changed since the last presented frame.
+        Returns None if the whole window has to be redrawn."""
+        full_redraw = self.full_redraw
+        self.full_redraw = False
+        
+        view_key = self.get_view_key()
+        if view_key != self.view_key:
+            self.view_key = view_key
+            full_redraw = True
+        
+        rects = []
+        
+        # Cells changed by the simulation or by editing
+        cell_bounds = self.game.take_dirty()
+        if cell_bounds is None:
+            full_redraw = True
+        elif not full_redraw:
+            rects.extend(self.grid_to_screen_rect(bounds) for bounds in cell_bounds)
+        
+        # Recent activity fades everywhere it was seen, not just where cells changed
+        heatmap = self.game.heatmap
+        if heatmap and heatmap.bounds and self.game.generation != self.heatmap_generation:
+            self.heatmap_generation = self.game.generation
+            if self.heatmap_mode == "recent":
+                rects.append(self.grid_to_screen_rect(heatmap.bounds))
+        
+        # UI chrome invalidated by selection, scroll, etc.
+        old_regions = self.ui_regions
+        if self.refresh_ui_cache():
+            rects.extend(old_regions)
+            rects.extend(self.ui_regions)
+        
+        # Status strings
+        status_texts = self.get_status_texts()
+        if status_texts != self.last_status_texts:
+            self.last_status_texts = status_texts
+            rects.append(self.get_status_rect())
+        
+        # Statistics panel
+        if self.refresh_statistics_panel():
+            rects.append(self.get_statistics_rect())
+        
+        # Rule explorer gallery
+        if self.show_explorer and self.refresh_explorer_surface():
+            rects.append(self.get_explorer_rect())
+        
+        # Selection rectangle
+        selection_rect = self.get_selection_rect()
+        if selection_rect != self.last_selection_rect:
+            rects.extend(rect for rect in (self.last_selection_rect, selection_rect) if rect)
+            self.last_selection_rect = selection_rect
+        
+        # Timing overlay
+        if self.refresh_timing_texts():
+            timing_rect = self.get_timing_rect()
+            rects.extend(rect for rect in (self.last_timing_rect, timing_rect) if rect)
+            self.last_timing_rect = timing_rect
+        
+        # Cursor highlight or pattern preview
+        cursor_rect = self.get_cursor_rect()
+        if cursor_rect != self.last_cursor_rect:
+            rects.extend(rect for rect in (self.last_cursor_rect, cursor_rect) if rect)
+            self.last_cursor_rect = cursor_rect
+        
+        if full_redraw:
+            return None
+        
+        screen_rect = self.screen.get_rect()
+        rects = [rect.clip(screen_rect) for rect in rects]
+        rects = [rect for rect in rects if rect.width > 0 and rect.height > 0]
+        if len(rects) > 16:
+            rects = [rects[0].unionall(rects[1:])]
+        
+        # Redrawing most of the window piecewise is slower than a full redraw
+        if sum(rect.width * rect.height for rect in rects) > screen_rect.width * screen_rect.height // 2:
+            return None
+        return rects
+    
+    def render_cells(self):
+        """Render all active cells in the grid."""
+        if not self.governor.enabled("cells"):
+            self.render_density()
+            return
+        glow = self.governor.enabled("glow")
+        pulse = self.governor.enabled("pulse")
+        
+        # Optimize by only rendering cells in the visible (clip) area
+        area = self.screen.get_clip()
+        
+        # Calculate grid bounds that are visible
+        min_visible_x = (area.left - self.offset_x) // self.cell_size - 1
+        min_visible_y = (area.top - self.offset_y) // self.cell_size - 1
+        max_visible_x = (area.right - self.offset_x) // self.cell_size + 1
+        max_visible_y = (area.bottom - self.offset_y) // self.cell_size + 1
+        
+        # Only the tiles overlapping the visible area are visited
+        for (x, y), age in self.game.cells_in_rect(min_visible_x, min_visible_y, max_visible_x, max_visible_y):
+            screen_x = x * self.cell_size + self.offset_x
+            screen_y = y * self.cell_size + self.offset_y
+            
+            # Determine cell color based on age
+            color = self.get_cell_color(age)
+            
+            # Draw the cell - with a subtle glow effect for newer cells
             if age <= 3:  # Newer cells get a glow effect
                 # Draw inner cell
                 pygame.draw.rect(self.screen, color, 
                                (screen_x, screen_y, self.cell_size, self.cell_size))
                 
                 # Draw glow if cell size is large enough
-                if self.cell_size >= 6:
+                if glow and self.cell_size >= 6:
                     glow_color = (*color[:3], 80)  # Semi-transparent
                     glow_size = self.cell_size + 2
                     glow_pos = (screen_x - 1, screen_y - 1)
@@ -1371,20 +4133,78 @@ class GameOfLifeUI:
                                (screen_x, screen_y, self.cell_size, self.cell_size))
                 
                 # Add a subtle pulse effect to older cells to keep them visible
-                if age > 15 and age % 20 < 10 and self.cell_size >= 4:
+                if pulse and age > 15 and age % 20 < 10 and self.cell_size >= 4:
                     # Create a subtle border for older cells
                     border_color = (*color[:3], 150)
                     pygame.draw.rect(self.screen, border_color, 
                                    (screen_x, screen_y, self.cell_size, self.cell_size), 1)
     
+    def render_density(self):
+        """Draw the visible (clip) area as blocks of cells shaded by the fraction
+        that is alive, in one array operation and one blit. Used by the lowest
+        quality tier, when drawing every cell no longer fits the frame budget."""
+        area = self.screen.get_clip()
+        size = self.cell_size
+        block = -(-self.DENSITY_BLOCK_PIXELS // size)  # Cells per block side
+        # Blocks stay aligned to the grid, so partial redraws line up
+        min_x = (area.left - self.offset_x) // size // block * block
+        min_y = (area.top - self.offset_y) // size // block * block
+        max_x = ((area.right - 1 - self.offset_x) // size // block + 1) * block - 1
+        max_y = ((area.bottom - 1 - self.offset_y) // size // block + 1) * block - 1
+        
+        ages = self.game.ages_in_rect(min_x, min_y, max_x, max_y)
+        rows, columns = ages.shape[0] // block, ages.shape[1] // block
+        density = (ages > 0).reshape(rows, block, columns, block).mean(axis=(1, 3))
+        if not density.any():
+            return
+        density = np.sqrt(density)  # Sparse blocks would be barely visible otherwise
+        background = np.array(self.COLOR_BG, dtype=np.float64)
+        color = np.array(self.theme_colors["cell_young"], dtype=np.float64)
+        rgb = np.ascontiguousarray((background + density[..., None] * (color - background)).astype(np.uint8))
+        surface = pygame.image.frombuffer(rgb, (columns, rows), "RGB")
+        surface = pygame.transform.scale(surface, (columns * block * size, rows * block * size))
+        self.screen.blit(surface, (min_x * size + self.offset_x, min_y * size + self.offset_y))
+    
+    def render_heatmap(self):
+        """Blend the activity heatmap over the visible (clip) area: the levels of all
+        visible cells are looked up in the colormap as one array and blitted as a
+        single scaled translucent surface instead of cell by cell."""
+        heatmap = self.game.heatmap
+        if heatmap is None or heatmap.bounds is None:
+            return
+        area = self.screen.get_clip()
+        size = self.cell_size
+        min_x = max((area.left - self.offset_x) // size, heatmap.bounds[0])
+        min_y = max((area.top - self.offset_y) // size, heatmap.bounds[1])
+        max_x = min((area.right - 1 - self.offset_x) // size, heatmap.bounds[2])
+        max_y = min((area.bottom - 1 - self.offset_y) // size, heatmap.bounds[3])
+        if min_x > max_x or min_y > max_y:
+            return
+        
+        levels = heatmap.levels_in_rect(min_x, min_y, max_x, max_y, self.heatmap_mode == "recent")
+        if not levels.any():
+            return
+        colors = tuple(self.theme_colors.values())  # Follows theme transitions too
+        if self.heatmap_colormap is None or self.heatmap_colormap[0] != colors:
+            self.heatmap_colormap = (colors, build_heat_colormap(self.theme_colors))
+        rgba = np.ascontiguousarray(self.heatmap_colormap[1][levels])
+        height, width = levels.shape
+        overlay = pygame.image.frombuffer(rgba, (width, height), "RGBA")
+        if size > 1:
+            overlay = pygame.transform.scale(overlay, (width * size, height * size))
+        self.screen.blit(overlay, (min_x * size + self.offset_x, min_y * size + self.offset_y))
+    
     def render_grid(self):
         """Draw the grid lines."""
-        if self.cell_size >= 5:  # Only draw grid when zoomed in enough
-            # Calculate visible grid bounds
-            start_x = int((0 - self.offset_x) // self.cell_size)
-            start_y = int((0 - self.offset_y) // self.cell_size)
-            end_x = int((self.screen.get_width() - self.offset_x) // self.cell_size) + 1
-            end_y = int((self.screen.get_height() - self.offset_y) // self.cell_size) + 1
+        labels = self.governor.enabled("labels")
+        if self.cell_size >= 5 and self.governor.enabled("grid"):  # Only draw grid when zoomed in enough
+            # Calculate visible grid bounds, limited to the clip area being redrawn
+            # (starting a bit early so coordinate labels reaching into the area are drawn)
+            area = self.screen.get_clip()
+            start_x = int((area.left - 40 - self.offset_x) // self.cell_size)
+            start_y = int((area.top - 20 - self.offset_y) // self.cell_size)
+            end_x = int((area.right - self.offset_x) // self.cell_size) + 1
+            end_y = int((area.bottom - self.offset_y) // self.cell_size) + 1
             
             # Make coordinate axes colors based on theme
             axes_color = (self.COLOR_GRID[0] + 30, self.COLOR_GRID[1] + 30, self.COLOR_GRID[2] + 30)
@@ -1395,12 +4215,12 @@ class GameOfLifeUI:
                 # Make coordinate axes slightly brighter
                 line_color = axes_color if x == 0 else self.COLOR_GRID
                 pygame.draw.line(self.screen, line_color, 
-                               (screen_x, 0), (screen_x, self.screen.get_height()))
+                               (screen_x, area.top), (screen_x, area.bottom))
                 
                 # Show coordinate labels when zoomed in enough
-                if self.cell_size >= 20 and x % 5 == 0 and x != 0:
+                if labels and self.cell_size >= 20 and x % 5 == 0 and x != 0:
                     # Draw coordinate number
-                    coord_text = self.font_small.render(str(x), True, self.COLOR_TEXT)
+                    coord_text = self.text_cache.render(self.font_small, str(x), self.COLOR_TEXT)
                     self.screen.blit(coord_text, (screen_x + 2, self.offset_y + 2))
             
             # Draw horizontal lines
@@ -1409,12 +4229,12 @@ class GameOfLifeUI:
                 # Make coordinate axes slightly brighter
                 line_color = axes_color if y == 0 else self.COLOR_GRID
                 pygame.draw.line(self.screen, line_color, 
-                               (0, screen_y), (self.screen.get_width(), screen_y))
+                               (area.left, screen_y), (area.right, screen_y))
                 
                 # Show coordinate labels when zoomed in enough
-                if self.cell_size >= 20 and y % 5 == 0 and y != 0:
+                if labels and self.cell_size >= 20 and y % 5 == 0 and y != 0:
                     # Draw coordinate number
-                    coord_text = self.font_small.render(str(y), True, self.COLOR_TEXT)
+                    coord_text = self.text_cache.render(self.font_small, str(y), self.COLOR_TEXT)
                     self.screen.blit(coord_text, (self.offset_x + 2, screen_y + 2))
             
             # Draw origin point if visible
@@ -1430,176 +4250,389 @@ class GameOfLifeUI:
                                 marker_size, marker_size))
                 
                 # Add "0,0" label when zoomed in enough
-                if self.cell_size >= 20:
-                    origin_text = self.font_small.render("0,0", True, self.COLOR_TEXT)
+                if labels and self.cell_size >= 20:
+                    origin_text = self.text_cache.render(self.font_small, "0,0", self.COLOR_TEXT)
                     self.screen.blit(origin_text, (origin_x + marker_size, origin_y + marker_size))
     
     def get_cell_color(self, age):
         """Calculate cell color based on age."""
-        theme = self.color_themes[self.current_theme]
-        if age <= 1:  # New cells
-            return theme["cell_new"]
-        elif age <= 5:  # Young cells
-            return theme["cell_young"]
-        elif age <= 15:  # Medium age cells
-            return theme["cell_adult"]
-        else:  # Old cells with improved visibility
-            # Calculate a better color that doesn't get too dark
-            base_color = theme["cell_old_base"]
-            # Add slight pulsation based on age to make older cells more distinct
-            pulse = (age % 10) / 10  # Creates a value between 0 and 0.9
-            r = min(255, base_color[0] + int(pulse * 30))
-            g = min(255, base_color[1] + int(pulse * 20))
-            b = min(255, base_color[2] + int(pulse * 40))
-            return (r, g, b)
+        return age_color(self.theme_colors, age, self.pulse_phase)
     
     def render_pattern_preview(self):
         """Render a preview of the pattern being placed."""
         if not self.selected_pattern or self.selected_pattern not in self.game.patterns:
             return
-            
-        pattern = self.game.patterns[self.selected_pattern]
-        theme = self.color_themes[self.current_theme]
         
-        # Calculate grid position
-        grid_x = (self.mouse_pos[0] - self.offset_x) // self.cell_size
-        grid_y = (self.mouse_pos[1] - self.offset_y) // self.cell_size
+        bounds = self.get_preview_bounds()
+        screen_x = bounds[0] * self.cell_size + self.offset_x
+        screen_y = bounds[1] * self.cell_size + self.offset_y
+        
+        sprite = self.get_preview_sprite()
+        if sprite is not None:
+            # The whole preview is a single blit
+            self.screen.blit(sprite, (screen_x - 2, screen_y - 2))
+            return
         
-        # Calculate bounding box
+        # Too big for a sprite - draw the visible cells through a window-sized surface
+        if self.preview_surface is None:
+            self.preview_surface = pygame.Surface(self.screen.get_size(), pygame.SRCALPHA)
+        self.preview_surface.fill((0, 0, 0, 0))
+        pattern = self.game.get_pattern(self.selected_pattern, self.pattern_rotation, self.pattern_flip)
+        self.draw_pattern_preview(self.preview_surface, pattern, screen_x, screen_y)
+        self.screen.blit(self.preview_surface, (0, 0))
+    
+    def get_preview_sprite(self):
+        """Return the cached preview sprite for the selected pattern and orientation,
+        rendering it on first use. Returns None if it would be too large."""
+        glow_color = tuple(self.theme_colors["cell_glow"])
+        key = (self.selected_pattern, self.pattern_rotation, self.pattern_flip, self.cell_size, glow_color)
+        sprite = self.preview_sprites.get(key)
+        if sprite is not None:
+            self.preview_sprites.move_to_end(key)
+            return sprite
+        
+        pattern = self.game.get_pattern(self.selected_pattern, self.pattern_rotation, self.pattern_flip)
         min_x = min(x for x, y in pattern)
         max_x = max(x for x, y in pattern)
         min_y = min(y for x, y in pattern)
         max_y = max(y for x, y in pattern)
-        
-        # Calculate center offset
-        offset_x = grid_x - (min_x + max_x) // 2
-        offset_y = grid_y - (min_y + max_y) // 2
-        
-        # Clear the preview surface
-        self.preview_surface.fill((0, 0, 0, 0))
+        width = (max_x - min_x + 1) * self.cell_size + 4
+        height = (max_y - min_y + 1) * self.cell_size + 4
+        if width * height > 4096 * 4096:
+            return None
+        
+        sprite = pygame.Surface((width, height), pygame.SRCALPHA)
+        self.draw_pattern_preview(sprite, pattern, 2, 2)
+        
+        self.preview_sprites[key] = sprite
+        if len(self.preview_sprites) > self.max_preview_sprites:
+            self.preview_sprites.popitem(last=False)
+        return sprite
+    
+    def draw_pattern_preview(self, surface, pattern, left, top):
+        """Draw pattern cells and their bounding box onto a transparent surface,
+        with the top left of the bounding box at (left, top)."""
+        min_x = min(x for x, y in pattern)
+        max_x = max(x for x, y in pattern)
+        min_y = min(y for x, y in pattern)
+        max_y = max(y for x, y in pattern)
+        glow_color = self.theme_colors["cell_glow"]
         
         # Draw a bounding box for the pattern
         bounding_width = (max_x - min_x + 1) * self.cell_size
         bounding_height = (max_y - min_y + 1) * self.cell_size
-        bounding_x = (min_x + offset_x) * self.cell_size + self.offset_x
-        bounding_y = (min_y + offset_y) * self.cell_size + self.offset_y
         
         # Draw the bounding box with a nice gradient effect
         for i in range(2):
             # Gradient from theme color to transparent
             alpha = 120 - i * 40
-            glow_color = theme["cell_glow"]
             color = (glow_color[0], glow_color[1], glow_color[2], alpha)
             border_rect = pygame.Rect(
-                bounding_x - i, 
-                bounding_y - i,
+                left - i, 
+                top - i,
                 bounding_width + i*2,
                 bounding_height + i*2
             )
-            pygame.draw.rect(self.preview_surface, color, border_rect, 1)
+            pygame.draw.rect(surface, color, border_rect, 1)
         
-        # Draw pattern preview cells with semi-transparency
+        # Draw pattern preview cells with semi-transparency - using theme glow color
+        cell_color = (glow_color[0], glow_color[1], glow_color[2], 180)
+        border_color = (int(glow_color[0] * 0.7), int(glow_color[1] * 0.7), int(glow_color[2] * 0.7), 255)
+        surface_rect = surface.get_rect()
         for x, y in pattern:
-            screen_x = (x + offset_x) * self.cell_size + self.offset_x
-            screen_y = (y + offset_y) * self.cell_size + self.offset_y
+            cell_rect = pygame.Rect(
+                left + (x - min_x) * self.cell_size,
+                top + (y - min_y) * self.cell_size,
+                self.cell_size, self.cell_size
+            )
             
-            # Skip rendering cells outside view
-            if (screen_x + self.cell_size < 0 or screen_x > self.screen.get_width() or
-                screen_y + self.cell_size < 0 or screen_y > self.screen.get_height()):
+            # Skip rendering cells outside the surface
+            if not surface_rect.colliderect(cell_rect):
                 continue
             
-            # Draw preview cells - using theme glow color with transparency
-            glow_color = theme["cell_glow"]
-            cell_color = (glow_color[0], glow_color[1], glow_color[2], 180)
-            border_color = (glow_color[0] * 0.7, glow_color[1] * 0.7, glow_color[2] * 0.7, 255)
-            
-            pygame.draw.rect(self.preview_surface, cell_color, 
-                           (screen_x, screen_y, self.cell_size, self.cell_size))
-            pygame.draw.rect(self.preview_surface, border_color, 
-                           (screen_x, screen_y, self.cell_size, self.cell_size), 1)
-        
-        # Blit the preview surface onto the main screen
-        self.screen.blit(self.preview_surface, (0, 0))
+            pygame.draw.rect(surface, cell_color, cell_rect)
+            pygame.draw.rect(surface, border_color, cell_rect, 1)
+    
+    def get_ui_state_key(self):
+        """Return a key describing everything the cached UI chrome depends on."""
+        return (
+            self.screen.get_size(),
+            self.current_theme,
+            self.COLOR_BUTTON, self.COLOR_BUTTON_HIGHLIGHT, self.COLOR_BUTTON_ACTIVE,
+            self.COLOR_TEXT, self.COLOR_TEXT_HIGHLIGHT, self.COLOR_SIDEBAR_BG,
+            self.selected_category, self.pattern_scroll_y,
+            self.selected_pattern, self.placing_pattern,
+            self.pattern_rotation, self.pattern_flip, self.placement_mode,
+            self.paused, self.simulation_speed, self.game.rule_string,
+            self.show_settings, self.pattern_analyzer.version, self.selection is not None,
+            self.memory_warning, self.memory_notice,
+        )
+    
+    def invalidate_ui(self):
+        """Force the cached UI chrome to be redrawn on the next frame."""
+        self.ui_state_key = None
+    
+    def refresh_ui_cache(self):
+        """Rebuild the cached UI chrome if anything it depends on changed.
+        Returns True if it was rebuilt."""
+        state_key = self.get_ui_state_key()
+        if state_key == self.ui_state_key:
+            return False
+        self.build_ui_surface()
+        self.ui_state_key = state_key
+        return True
+    
+    def get_status_texts(self):
+        """Return the status strings that change from frame to frame."""
+        grid_x = (self.mouse_pos[0] - self.offset_x) // self.cell_size
+        grid_y = (self.mouse_pos[1] - self.offset_y) // self.cell_size
+        cursor_text = f"Cursor: ({grid_x}, {grid_y})"
+        preview_bounds = self.get_preview_bounds()
+        if preview_bounds:
+            # Number of live cells the pattern would be placed over
+            covered = self.game.count_in_rect(*preview_bounds)
+            if covered:
+                cursor_text += f" covers {covered}"
+        elif self.game.is_alive(grid_x, grid_y):
+            cursor_text += " live"
+        engine_text = f"Engine: {self.game.engine.name}"
+        if self.game.engine_mode == "auto":
+            engine_text += " (auto)"
+        heatmap_text = f"Heatmap: {self.heatmap_mode}" if self.heatmap_mode != "off" else ""
+        return (
+            f"Generation: {self.game.generation}",
+            f"Population: {self.game.population()}",
+            cursor_text,
+            engine_text,
+            f"Quality: {self.governor.name}",
+            heatmap_text
+        )
+    
+    def get_status_rect(self):
+        """Return the screen area covered by the dynamic status strings."""
+        return pygame.Rect(self.screen.get_width() - 300, 50, 200, 160)
     
     def render_ui(self):
         """Render UI elements."""
+        # Static chrome only gets redrawn when something it depends on changed
+        self.refresh_ui_cache()
+        
+        for region in self.ui_regions:
+            self.screen.blit(self.ui_surface, region.topleft, region)
+        
+        # Draw the status values that change from frame to frame
+        generation_text, population_text, cursor_text, engine_text, quality_text, heatmap_text = self.get_status_texts()
+        status_x = self.screen.get_width() - 300
+        status_y = 50
+        status_spacing = 20
+        
+        text = self.text_cache.render
+        self.screen.blit(text(self.font, generation_text, self.COLOR_TEXT), (status_x, status_y))
+        self.screen.blit(text(self.font, population_text, self.COLOR_TEXT), (status_x, status_y + status_spacing))
+        self.screen.blit(text(self.font, cursor_text, self.COLOR_TEXT), (status_x, status_y + status_spacing * 3))
+        self.screen.blit(text(self.font, engine_text, self.COLOR_TEXT), (status_x, status_y + status_spacing * 5))
+        self.screen.blit(text(self.font, quality_text, self.COLOR_TEXT), (status_x, status_y + status_spacing * 6))
+        if heatmap_text:
+            self.screen.blit(text(self.font, heatmap_text, self.COLOR_TEXT), (status_x, status_y + status_spacing * 7))
+        
+        # Draw the statistics sparklines
+        if self.show_statistics:
+            self.refresh_statistics_panel()
+            self.screen.blit(self.statistics_surface, self.get_statistics_rect())
+        
+        # If settings menu is open, draw it on top
+        if self.show_settings:
+            self.render_settings_panel()
+        elif self.show_explorer:
+            self.refresh_explorer_surface()
+            self.screen.blit(self.explorer_surface, (0, 0))
+    
+    def get_timing_texts(self):
+        """Return the lines of the timing overlay."""
+        timer = self.timer
+        lines = [f"FPS: {timer.rate('frame'):.1f} | Generations/s: {timer.rate('generation'):.1f}"]
+        lines.extend(f"{name}: {ms:.2f} ms/frame" for name, ms in timer.averages().items())
+        
+        # Estimated memory, re-measured with every overlay refresh
+        self.memory_usage = self.get_memory_usage()
+        lines.append(f"Memory: {format_bytes(sum(self.memory_usage.values()))} estimated")
+        lines.extend(f"memory.{name}: {format_bytes(size)}" for name, size in self.memory_usage.items())
+        if timer.tracing:
+            lines.append(f"Tracing {len(timer.trace_events)} spans - F4 to export")
+        if timer.profiler is not None:
+            lines.append(f"Profiling - {timer.profile_frames} frames left")
+        return tuple(lines)
+    
+    def get_timing_rect(self):
+        """Return the screen area of the timing overlay, or None while it is hidden."""
+        if not self.timing_texts:
+            return None
+        return pygame.Rect(self.screen.get_width() // 2 - 150, 50, 300, 8 + 16 * len(self.timing_texts))
+    
+    def refresh_timing_texts(self):
+        """Update the timing overlay a few times per second.
+        Returns True if its contents changed."""
+        now = pygame.time.get_ticks()
+        if not self.show_timings:
+            texts = ()
+        elif self.timing_texts and now - self.timing_texts_time < 250:
+            return False
+        else:
+            self.timing_texts_time = now
+            texts = self.get_timing_texts()
+        if texts == self.timing_texts:
+            return False
+        self.timing_texts = texts
+        
+        if texts:
+            rect = self.get_timing_rect()
+            self.timing_surface = pygame.Surface(rect.size, pygame.SRCALPHA)
+            self.timing_surface.fill((0, 0, 0, 170))
+            for i, line in enumerate(texts):
+                self.timing_surface.blit(self.text_cache.render(self.font_small, line, self.COLOR_TEXT), (8, 4 + i * 16))
+        return True
+    
+    def render_timing_overlay(self):
+        """Draw the per-phase timing overlay."""
+        if self.timing_surface is not None and self.timing_texts:
+            self.screen.blit(self.timing_surface, self.get_timing_rect())
+    
+    def get_statistics_rect(self):
+        """Return the screen area of the statistics panel."""
+        return pygame.Rect(self.screen.get_width() - 300, 310, 290, 130)
+    
+    def refresh_statistics_panel(self):
+        """Redraw the statistics panel if new samples arrived or it was toggled.
+        Returns True if its screen area changed."""
+        key = (self.show_statistics, self.game.statistics.version, self.screen.get_width(),
+               self.COLOR_SIDEBAR_BG, self.COLOR_TEXT, tuple(self.theme_colors.values()))
+        if key == self.statistics_key:
+            return False
+        self.statistics_key = key
+        if self.show_statistics:
+            self.build_statistics_surface()
+        return True
+    
+    def build_statistics_surface(self):
+        """Draw sparklines of the most recent statistics samples."""
+        rect = self.get_statistics_rect()
+        if self.statistics_surface is None or self.statistics_surface.get_size() != rect.size:
+            self.statistics_surface = pygame.Surface(rect.size)
+        surface = self.statistics_surface
+        surface.fill(self.COLOR_SIDEBAR_BG)
+        pygame.draw.rect(surface, (60, 60, 65), surface.get_rect(), 1)  # Border
+        text = self.text_cache.render
+        tracker = self.game.statistics
+        surface.blit(text(self.font_small, "Statistics (T to hide)", self.COLOR_TEXT_HIGHLIGHT), (8, 4))
+        
+        # One row per plot: label, series with their colors
+        plot_x, plot_width = 110, rect.width - 118
+        rows = [
+            ("Population", [("population", self.theme_colors["cell_adult"])]),
+            ("Births/Deaths", [("births", self.theme_colors["cell_new"]), ("deaths", (230, 80, 80))]),
+            ("Density", [("density", self.theme_colors["cell_glow"])]),
+        ]
+        for row, (label, series) in enumerate(rows):
+            top = 26 + row * 34
+            plot_rect = pygame.Rect(plot_x, top, plot_width, 28)
+            pygame.draw.rect(surface, (45, 45, 50), plot_rect)
+            latest = tracker.series(series[0][0], 1)
+            value = "-" if not len(latest) else (f"{latest[0]:.3f}" if latest.dtype.kind == "f" else str(latest[0]))
+            surface.blit(text(self.font_small, label, self.COLOR_TEXT), (8, top))
+            surface.blit(text(self.font_small, value, self.COLOR_TEXT), (8, top + 14))
+            
+            # Rows sharing a plot share its vertical scale
+            values = [tracker.series(name, plot_width).astype(np.float64) for name, _ in series]
+            if not len(values[0]):
+                continue
+            low = min(v.min() for v in values)
+            high = max(v.max() for v in values)
+            scale = (plot_rect.height - 3) / (high - low) if high > low else 0.0
+            for v, (name, color) in zip(values, series):
+                if len(v) < 2:
+                    continue
+                xs = plot_rect.right - len(v) + np.arange(len(v))
+                ys = plot_rect.bottom - 2 - (v - low) * scale
+                pygame.draw.lines(surface, color, False, np.column_stack((xs, ys)).tolist())
+    
+    def build_ui_surface(self):
+        """Draw the static UI chrome into the cached UI surface."""
+        width, height = self.screen.get_size()
+        if self.ui_surface is None or self.ui_surface.get_size() != (width, height):
+            self.ui_surface = pygame.Surface((width, height), pygame.SRCALPHA)
+        surface = self.ui_surface
+        surface.fill((0, 0, 0, 0))
+        text = self.text_cache.render
+        
         # Draw main buttons
-        pygame.draw.rect(self.screen, self.COLOR_BUTTON, self.btn_pause)
-        pygame.draw.rect(self.screen, self.COLOR_BUTTON, self.btn_step)
-        pygame.draw.rect(self.screen, self.COLOR_BUTTON, self.btn_clear)
-        pygame.draw.rect(self.screen, self.COLOR_BUTTON, self.btn_settings)
+        pygame.draw.rect(surface, self.COLOR_BUTTON, self.btn_pause)
+        pygame.draw.rect(surface, self.COLOR_BUTTON, self.btn_step)
+        pygame.draw.rect(surface, self.COLOR_BUTTON, self.btn_clear)
+        pygame.draw.rect(surface, self.COLOR_BUTTON, self.btn_settings)
         
         # Draw button text
         pause_text = "Resume" if self.paused else "Pause"
-        self.screen.blit(self.font.render(pause_text, True, self.COLOR_TEXT), (self.btn_pause.x + 10, self.btn_pause.y + 5))
-        self.screen.blit(self.font.render("Step", True, self.COLOR_TEXT), (self.btn_step.x + 10, self.btn_step.y + 5))
-        self.screen.blit(self.font.render("Clear", True, self.COLOR_TEXT), (self.btn_clear.x + 10, self.btn_clear.y + 5))
-        self.screen.blit(self.font.render("Settings", True, self.COLOR_TEXT), (self.btn_settings.x + 10, self.btn_settings.y + 5))
+        surface.blit(text(self.font, pause_text, self.COLOR_TEXT), (self.btn_pause.x + 10, self.btn_pause.y + 5))
+        surface.blit(text(self.font, "Step", self.COLOR_TEXT), (self.btn_step.x + 10, self.btn_step.y + 5))
+        surface.blit(text(self.font, "Clear", self.COLOR_TEXT), (self.btn_clear.x + 10, self.btn_clear.y + 5))
+        surface.blit(text(self.font, "Settings", self.COLOR_TEXT), (self.btn_settings.x + 10, self.btn_settings.y + 5))
         
         # Draw speed control buttons
-        pygame.draw.rect(self.screen, self.COLOR_BUTTON, self.btn_speed_up)
-        pygame.draw.rect(self.screen, self.COLOR_BUTTON, self.btn_speed_down)
-        self.screen.blit(self.font.render("+", True, self.COLOR_TEXT), (self.btn_speed_up.x + 10, self.btn_speed_up.y + 5))
-        self.screen.blit(self.font.render("-", True, self.COLOR_TEXT), (self.btn_speed_down.x + 10, self.btn_speed_down.y + 5))
-        self.screen.blit(self.font.render(f"Speed: {self.simulation_speed}", True, self.COLOR_TEXT), 
-                       (self.btn_speed_up.x + 80, self.btn_speed_up.y +5))
-        
-        # Draw status info
-        generation_text = f"Generation: {self.game.generation}"
-        population_text = f"Population: {len(self.game.cells)}"
-        rule_text = f"Rule: {self.game.rule_string}"
-        
-        # Calculate cursor position in grid coordinates
-        grid_x = (self.mouse_pos[0] - self.offset_x) // self.cell_size
-        grid_y = (self.mouse_pos[1] - self.offset_y) // self.cell_size
-        cursor_text = f"Cursor: ({grid_x}, {grid_y})"
-        theme_text = f"Theme: {self.current_theme}"
-        
-        # Create status info panel
-        status_x = self.screen.get_width() - 300
+        pygame.draw.rect(surface, self.COLOR_BUTTON, self.btn_speed_up)
+        pygame.draw.rect(surface, self.COLOR_BUTTON, self.btn_speed_down)
+        surface.blit(text(self.font, "+", self.COLOR_TEXT), (self.btn_speed_up.x + 10, self.btn_speed_up.y + 5))
+        surface.blit(text(self.font, "-", self.COLOR_TEXT), (self.btn_speed_down.x + 10, self.btn_speed_down.y + 5))
+        speed_surface = text(self.font, f"Speed: {self.simulation_speed}", self.COLOR_TEXT)
+        speed_pos = (self.btn_speed_up.x + 80, self.btn_speed_up.y + 5)
+        surface.blit(speed_surface, speed_pos)
+        toolbar_rect = self.btn_pause.unionall([
+            self.btn_step, self.btn_clear, self.btn_settings,
+            self.btn_speed_up, self.btn_speed_down,
+            speed_surface.get_rect(topleft=speed_pos)
+        ])
+        
+        # Draw the status lines that only change with rule or theme
+        status_x = width - 300
         status_y = 50
         status_spacing = 20
-        
-        self.screen.blit(self.font.render(generation_text, True, self.COLOR_TEXT), (status_x, status_y))
-        self.screen.blit(self.font.render(population_text, True, self.COLOR_TEXT), (status_x, status_y + status_spacing))
-        self.screen.blit(self.font.render(rule_text, True, self.COLOR_TEXT), (status_x, status_y + status_spacing * 2))
-        self.screen.blit(self.font.render(cursor_text, True, self.COLOR_TEXT), (status_x, status_y + status_spacing * 3))
-        self.screen.blit(self.font.render(theme_text, True, self.COLOR_TEXT), (status_x, status_y + status_spacing * 4))
+        surface.blit(text(self.font, f"Rule: {self.game.rule_string}", self.COLOR_TEXT), (status_x, status_y + status_spacing * 2))
+        surface.blit(text(self.font, f"Theme: {self.current_theme}", self.COLOR_TEXT), (status_x, status_y + status_spacing * 4))
+        status_rect = pygame.Rect(status_x, status_y, 170, status_spacing * 6)
         
         # Draw pattern selection panel background
-        pygame.draw.rect(self.screen, self.COLOR_SIDEBAR_BG, self.sidebar_rect)
-        pygame.draw.rect(self.screen, (60, 60, 65), self.sidebar_rect, 1)  # Border
+        pygame.draw.rect(surface, self.COLOR_SIDEBAR_BG, self.sidebar_rect)
+        pygame.draw.rect(surface, (60, 60, 65), self.sidebar_rect, 1)  # Border
         
         # Draw the title for the sidebar
-        title_surface = self.font_title.render("Pattern Library", True, self.COLOR_TEXT_HIGHLIGHT)
-        self.screen.blit(title_surface, (self.sidebar_rect.x + 10, self.sidebar_rect.y + 10))
+        title_surface = text(self.font_title, "Pattern Library", self.COLOR_TEXT_HIGHLIGHT)
+        surface.blit(title_surface, (self.sidebar_rect.x + 10, self.sidebar_rect.y + 10))
         
         # Draw category tabs
         for tab in self.category_tabs:
             # Highlight the selected category
             if tab["name"] == self.selected_category:
-                pygame.draw.rect(self.screen, self.COLOR_BUTTON_ACTIVE, tab["rect"])
+                pygame.draw.rect(surface, self.COLOR_BUTTON_ACTIVE, tab["rect"])
             else:
-                pygame.draw.rect(self.screen, self.COLOR_BUTTON, tab["rect"])
+                pygame.draw.rect(surface, self.COLOR_BUTTON, tab["rect"])
             
             # Draw tab text - truncate if needed
             tab_text = tab["name"]
             if len(tab_text) > 12:  # Truncate long category names
                 tab_text = tab_text[:10] + ".."
                 
-            text = self.font_small.render(tab_text, True, self.COLOR_TEXT)
-            text_rect = text.get_rect(center=tab["rect"].center)
-            self.screen.blit(text, text_rect)
+            tab_surface = text(self.font_small, tab_text, self.COLOR_TEXT)
+            text_rect = tab_surface.get_rect(center=tab["rect"].center)
+            surface.blit(tab_surface, text_rect)
         
         # Draw pattern area
-        pygame.draw.rect(self.screen, (50, 50, 55), self.pattern_area)
-        pygame.draw.rect(self.screen, (60, 60, 65), self.pattern_area, 1)  # Border
+        pygame.draw.rect(surface, (50, 50, 55), self.pattern_area)
+        pygame.draw.rect(surface, (60, 60, 65), self.pattern_area, 1)  # Border
         
         # Draw scroll buttons
-        pygame.draw.rect(self.screen, (60, 60, 60), self.pattern_scroll_up)
-        pygame.draw.rect(self.screen, (60, 60, 60), self.pattern_scroll_down)
-        self.screen.blit(self.font.render("▲", True, self.COLOR_TEXT), (self.pattern_scroll_up.x + 5, self.pattern_scroll_up.y))
-        self.screen.blit(self.font.render("▼", True, self.COLOR_TEXT), (self.pattern_scroll_down.x + 5, self.pattern_scroll_down.y))
+        pygame.draw.rect(surface, (60, 60, 60), self.pattern_scroll_up)
+        pygame.draw.rect(surface, (60, 60, 60), self.pattern_scroll_down)
+        surface.blit(text(self.font, "▲", self.COLOR_TEXT), (self.pattern_scroll_up.x + 5, self.pattern_scroll_up.y))
+        surface.blit(text(self.font, "▼", self.COLOR_TEXT), (self.pattern_scroll_down.x + 5, self.pattern_scroll_down.y))
         
         # Draw pattern buttons for the selected category
         if self.selected_category in self.game.pattern_categories:
@@ -1627,103 +4660,226 @@ class GameOfLifeUI:
                 
                 # Highlight selected pattern
                 if self.selected_pattern == pattern_name:
-                    pygame.draw.rect(self.screen, self.COLOR_BUTTON_HIGHLIGHT, btn_rect)
+                    pygame.draw.rect(surface, self.COLOR_BUTTON_HIGHLIGHT, btn_rect)
                 else:
-                    pygame.draw.rect(self.screen, self.COLOR_BUTTON, btn_rect)
+                    pygame.draw.rect(surface, self.COLOR_BUTTON, btn_rect)
                 
                 # Draw button text
-                text = self.font.render(pattern_name, True, self.COLOR_TEXT)
-                text_rect = text.get_rect(centery=btn_rect.centery, x=btn_rect.x + 10)
-                self.screen.blit(text, text_rect)
+                name_surface = text(self.font, pattern_name, self.COLOR_TEXT)
+                text_rect = name_surface.get_rect(centery=btn_rect.centery, x=btn_rect.x + 10)
+                surface.blit(name_surface, text_rect)
         
         # Draw pattern information box
         if self.selected_pattern:
-            pygame.draw.rect(self.screen, (45, 45, 50), self.pattern_info_rect)
-            pygame.draw.rect(self.screen, (60, 60, 65), self.pattern_info_rect, 1)
+            pygame.draw.rect(surface, (45, 45, 50), self.pattern_info_rect)
+            pygame.draw.rect(surface, (60, 60, 65), self.pattern_info_rect, 1)
             
             # Pattern name
-            name_text = self.font_bold.render(self.selected_pattern, True, self.COLOR_TEXT_HIGHLIGHT)
-            self.screen.blit(name_text, (self.pattern_info_rect.x + 10, self.pattern_info_rect.y + 10))
+            name_text = text(self.font_bold, self.selected_pattern, self.COLOR_TEXT_HIGHLIGHT)
+            surface.blit(name_text, (self.pattern_info_rect.x + 10, self.pattern_info_rect.y + 10))
             
             # Pattern category
             for category, patterns in self.game.pattern_categories.items():
                 if self.selected_pattern in patterns:
-                    category_text = self.font_small.render(f"Category: {category}", True, self.COLOR_TEXT)
-                    self.screen.blit(category_text, (self.pattern_info_rect.x + 10, self.pattern_info_rect.y + 30))
+                    category_text = text(self.font_small, f"Category: {category}", self.COLOR_TEXT)
+                    surface.blit(category_text, (self.pattern_info_rect.x + 10, self.pattern_info_rect.y + 30))
                     break
             
+            # Pattern behavior, computed in the background
+            info = self.pattern_analyzer.get_info(self.selected_pattern, self.game.rule_string)
+            info_lines = describe_pattern_info(info) if info else ("Analyzing...",)
+            for i, line in enumerate(info_lines):
+                info_text = text(self.font_small, line, self.COLOR_TEXT)
+                surface.blit(info_text, (self.pattern_info_rect.x + 10, self.pattern_info_rect.y + 48 + i * 16))
+            
             # Pattern instructions
             if self.placing_pattern:
-                inst_text = self.font_small.render("Click to place, ESC/Right-click to cancel", True, self.COLOR_TEXT)
-                self.screen.blit(inst_text, (self.pattern_info_rect.x + 10, self.pattern_info_rect.y + 50))
+                inst_text = text(self.font_small, "Click to place, ESC/Right-click to cancel", self.COLOR_TEXT)
+                surface.blit(inst_text, (self.pattern_info_rect.x + 10, self.pattern_info_rect.y + 84))
         
         # Draw rule selection label
-        self.screen.blit(self.font.render("Rules:", True, self.COLOR_TEXT), 
-                       (self.screen.get_width() - 130, 100))
+        surface.blit(text(self.font, "Rules:", self.COLOR_TEXT), (width - 130, 100))
+        rules_rect = pygame.Rect(width - 130, 100, 120, 20)
         
         # Draw rule buttons
         for rule_name, btn_rect in self.rule_buttons.items():
             # Highlight active rule
             if self.rule_presets[rule_name] == self.game.rule_string:
-                pygame.draw.rect(self.screen, self.COLOR_BUTTON_HIGHLIGHT, btn_rect)
+                pygame.draw.rect(surface, self.COLOR_BUTTON_HIGHLIGHT, btn_rect)
             else:
-                pygame.draw.rect(self.screen, self.COLOR_BUTTON, btn_rect)
+                pygame.draw.rect(surface, self.COLOR_BUTTON, btn_rect)
             
             # Draw button text
-            text = self.font.render(rule_name, True, self.COLOR_TEXT)
-            text_rect = text.get_rect(center=btn_rect.center)
-            self.screen.blit(text, text_rect)
+            rule_surface = text(self.font, rule_name, self.COLOR_TEXT)
+            text_rect = rule_surface.get_rect(center=btn_rect.center)
+            surface.blit(rule_surface, text_rect)
+            rules_rect.union_ip(btn_rect)
         
         # Draw help text and pattern placement mode indicator at bottom right
-        self.help_text_rect.x = self.screen.get_width() - 600  # Update position in case of resize
-        self.help_text_rect.y = self.screen.get_height() - 40  # Update position in case of resize
+        self.help_text_rect.x = width - 600  # Update position in case of resize
+        self.help_text_rect.y = height - 40  # Update position in case of resize
+        regions = [toolbar_rect, status_rect, self.sidebar_rect, rules_rect, self.help_text_rect]
         
         if self.placing_pattern:
             mode_text = f"PLACING: {self.selected_pattern}"
-            self.screen.blit(self.font_bold.render(mode_text, True, (100, 255, 100)), 
-                           (self.screen.get_width() // 2 - 100, 15))
-            help_text = "Left-click: Place pattern | Right-click or ESC: Cancel | Arrow keys: Pan"
+            if self.pattern_rotation or self.pattern_flip:
+                mode_text += f" ({self.pattern_rotation * 90}°{', flipped' if self.pattern_flip else ''})"
+            if self.placement_mode != GameOfLife.OR:
+                mode_text += f" [{self.placement_mode.upper()}]"
+            mode_surface = text(self.font_bold, mode_text, (100, 255, 100))
+            mode_pos = (width // 2 - 100, 15)
+            surface.blit(mode_surface, mode_pos)
+            regions.append(mode_surface.get_rect(topleft=mode_pos))
+            help_text = "Left-click: Place | R: Rotate | F: Flip | M: Mode | Right-click or ESC: Cancel"
+        elif self.selection:
+            help_text = "Ctrl+C/X/V: Copy/Cut/Paste | Del: Clear | R/F: Rotate/Flip | G: Fill | Shift+Arrow: Move"
         else:
-            help_text = "Left-click: Add cells | Right-click: Remove cells | Space: Pause/Resume | S: Step | Arrow: Pan"
+            help_text = "Left-click: Add cells | Right-click: Remove cells | Shift-drag: Select | Space: Pause/Resume | S: Step"
+        
+        # Render help text in the dedicated area, unless memory ran out or the budget had to act
+        help_color = (200, 200, 200)
+        if self.memory_warning:
+            help_text = f"{self.memory_warning} - simulation paused"
+            help_color = (255, 120, 100)
+        elif self.memory_notice:
+            help_text = self.memory_notice
+            help_color = (255, 200, 100)
+        surface.blit(text(self.font, help_text, help_color), 
+                     (self.help_text_rect.x, self.help_text_rect.y))
         
-        # Render help text in the dedicated area
-        self.screen.blit(self.font.render(help_text, True, (200, 200, 200)), 
-                       (self.help_text_rect.x, self.help_text_rect.y))
+        if self.selected_pattern:
+            regions.append(self.pattern_info_rect)
+        
+        # Only these parts of the cached surface get blitted each frame
+        self.ui_regions = [region.clip(surface.get_rect()) for region in regions]
         
-        # If settings menu is open, draw it on top
         if self.show_settings:
-            self.render_settings_panel()
+            self.build_settings_surface()
+    
+    def get_explorer_rect(self):
+        """Return the screen rect of the rule explorer panel."""
+        width, height = self.screen.get_size()
+        return pygame.Rect(width // 2 - 300, height // 2 - 240, 600, 480)
+    
+    def refresh_explorer_surface(self):
+        """Redraw the rule explorer if its contents changed. Returns True if redrawn."""
+        key = (self.screen.get_size(), self.rule_explorer.version, self.rule_explorer.requested,
+               self.explorer_sort, self.explorer_scroll, self.game.rule_string,
+               self.COLOR_SIDEBAR_BG, tuple(self.theme_colors.values()))
+        if key == self.explorer_key:
+            return False
+        self.explorer_key = key
+        self.build_explorer_surface()
+        return True
+    
+    def build_explorer_surface(self):
+        """Draw the overlay and the sortable gallery of explored rules."""
+        width, height = self.screen.get_size()
+        if self.explorer_surface is None or self.explorer_surface.get_size() != (width, height):
+            self.explorer_surface = pygame.Surface((width, height), pygame.SRCALPHA)
+        surface = self.explorer_surface
+        surface.fill((0, 0, 0, 128))  # Semi-transparent black
+        text = self.text_cache.render
+        panel = self.get_explorer_rect()
+        pygame.draw.rect(surface, self.COLOR_SIDEBAR_BG, panel)
+        pygame.draw.rect(surface, (100, 100, 120), panel, 2)  # Border
+        surface.blit(text(self.font_title, "Rule Explorer", self.COLOR_TEXT_HIGHLIGHT), (panel.x + 20, panel.y + 15))
+        
+        # Close and explore buttons
+        self.explorer_buttons = {
+            "close": pygame.Rect(panel.right - 30, panel.y + 10, 20, 20),
+            "more": pygame.Rect(panel.right - 190, panel.y + 42, 150, 26),
+        }
+        explorer = self.rule_explorer
+        done = len(explorer.results)
+        surface.blit(text(self.font_small, f"{done} of {explorer.requested} random rules explored", self.COLOR_TEXT),
+                     (panel.x + 20, panel.y + 48))
+        
+        # Sort buttons
+        for i, sort in enumerate(RuleExplorer.SORT_KEYS):
+            self.explorer_buttons[sort] = pygame.Rect(panel.x + 20 + i * 110, panel.y + 78, 100, 24)
+        for action, rect in self.explorer_buttons.items():
+            active = action == self.explorer_sort
+            pygame.draw.rect(surface, self.COLOR_BUTTON_ACTIVE if active else self.COLOR_BUTTON, rect)
+            label = {"close": "X", "more": "Explore 256 more"}.get(action, f"Sort: {action.title()}")
+            label_surface = text(self.font_small, label, self.COLOR_TEXT)
+            surface.blit(label_surface, label_surface.get_rect(center=rect.center))
+        
+        # Gallery rows with a thumbnail of the first soup's final state
+        row_height = 68
+        top = panel.y + 112
+        visible = (panel.bottom - 10 - top) // row_height
+        results = explorer.sorted_results(self.explorer_sort)
+        self.explorer_scroll = min(self.explorer_scroll, max(0, len(results) - visible))
+        self.explorer_rows = []
+        cell_color = self.theme_colors["cell_adult"]
+        for i, result in enumerate(results[self.explorer_scroll:self.explorer_scroll + visible]):
+            row = pygame.Rect(panel.x + 10, top + i * row_height, panel.width - 20, row_height - 4)
+            self.explorer_rows.append((row, result["rule"]))
+            active = result["rule"] == self.game.rule_string
+            pygame.draw.rect(surface, self.COLOR_BUTTON_HIGHLIGHT if active else (45, 45, 50), row)
+            
+            size = result["size"]
+            bits = np.unpackbits(np.frombuffer(result["thumbnail"], dtype=np.uint8))[:size * size]
+            thumbnail = pygame.Surface((size, size))
+            pixels = np.zeros((size, size, 3), dtype=np.uint8)
+            pixels[bits.reshape(size, size).T.astype(bool)] = cell_color
+            pygame.surfarray.blit_array(thumbnail, pixels)
+            surface.blit(thumbnail, (row.x + 2, row.y + 2))
+            
+            details = result["class"]
+            if result["period"] and result["class"] == "stabilizes":
+                details += f" (period {result['period']})"
+            surface.blit(text(self.font_bold, result["rule"], self.COLOR_TEXT), (row.x + 80, row.y + 6))
+            surface.blit(text(self.font_small, details, self.COLOR_TEXT), (row.x + 80, row.y + 26))
+            stats = (f"Population {result['population']} | Growth x{result['growth']:.2f} | "
+                     f"Activity {result['activity'] * 100:.1f}%")
+            surface.blit(text(self.font_small, stats, self.COLOR_TEXT), (row.x + 80, row.y + 44))
+        
+        if not results:
+            message = "Exploring rules..." if explorer.requested else "No process pool available"
+            surface.blit(text(self.font, message, self.COLOR_TEXT), (panel.x + 20, top))
+        surface.blit(text(self.font_small, "Click a rule to apply it | Wheel: scroll | B/ESC: close", self.COLOR_TEXT),
+                     (panel.x + 20, panel.bottom - 22))
     
     def render_settings_panel(self):
         """Render the settings panel"""
+        self.screen.blit(self.settings_surface, (0, 0))
+    
+    def build_settings_surface(self):
+        """Draw the settings overlay and panel into a cached surface."""
+        width, height = self.screen.get_size()
+        
         # Update settings position in case window has been resized
         self.settings_rect = pygame.Rect(
-            self.screen.get_width() // 2 - 200,
-            self.screen.get_height() // 2 - 150,
+            width // 2 - 200,
+            height // 2 - 150,
             400, 300
         )
         
         # Draw semi-transparent overlay
-        overlay = pygame.Surface((self.screen.get_width(), self.screen.get_height()), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 128))  # Semi-transparent black
-        self.screen.blit(overlay, (0, 0))
+        if self.settings_surface is None or self.settings_surface.get_size() != (width, height):
+            self.settings_surface = pygame.Surface((width, height), pygame.SRCALPHA)
+        surface = self.settings_surface
+        surface.fill((0, 0, 0, 128))  # Semi-transparent black
+        text = self.text_cache.render
         
         # Draw settings panel
-        pygame.draw.rect(self.screen, self.COLOR_SIDEBAR_BG, self.settings_rect)
-        pygame.draw.rect(self.screen, (100, 100, 120), self.settings_rect, 2)  # Border
+        pygame.draw.rect(surface, self.COLOR_SIDEBAR_BG, self.settings_rect)
+        pygame.draw.rect(surface, (100, 100, 120), self.settings_rect, 2)  # Border
         
         # Draw title
-        title_text = self.font_title.render("Settings", True, self.COLOR_TEXT_HIGHLIGHT)
-        self.screen.blit(title_text, (self.settings_rect.x + 20, self.settings_rect.y + 20))
+        title_text = text(self.font_title, "Settings", self.COLOR_TEXT_HIGHLIGHT)
+        surface.blit(title_text, (self.settings_rect.x + 20, self.settings_rect.y + 20))
         
         # Draw close button
         close_btn = pygame.Rect(self.settings_rect.right - 30, self.settings_rect.y + 10, 20, 20)
-        pygame.draw.rect(self.screen, self.COLOR_BUTTON, close_btn)
-        self.screen.blit(self.font.render("X", True, self.COLOR_TEXT), (close_btn.x + 5, close_btn.y + 2))
+        pygame.draw.rect(surface, self.COLOR_BUTTON, close_btn)
+        surface.blit(text(self.font, "X", self.COLOR_TEXT), (close_btn.x + 5, close_btn.y + 2))
         
         # Draw color theme settings
-        theme_label = self.font_bold.render("Color Theme:", True, self.COLOR_TEXT)
-        self.screen.blit(theme_label, (self.settings_rect.x + 20, self.settings_rect.y + 60))
+        theme_label = text(self.font_bold, "Color Theme:", self.COLOR_TEXT)
+        surface.blit(theme_label, (self.settings_rect.x + 20, self.settings_rect.y + 60))
         
         # Create theme buttons
         theme_btn_y = self.settings_rect.y + 90
@@ -1741,13 +4897,13 @@ class GameOfLifeUI:
             
             # Highlight current theme
             if theme_name == self.current_theme:
-                pygame.draw.rect(self.screen, self.COLOR_BUTTON_HIGHLIGHT, btn_rect)
+                pygame.draw.rect(surface, self.COLOR_BUTTON_HIGHLIGHT, btn_rect)
             else:
-                pygame.draw.rect(self.screen, self.COLOR_BUTTON, btn_rect)
+                pygame.draw.rect(surface, self.COLOR_BUTTON, btn_rect)
             
             # Draw theme name
-            theme_text = self.font.render(theme_name, True, self.COLOR_TEXT)
-            self.screen.blit(theme_text, (btn_rect.x + 15, btn_rect.y + 5))
+            theme_text = text(self.font, theme_name, self.COLOR_TEXT)
+            surface.blit(theme_text, (btn_rect.x + 15, btn_rect.y + 5))
     
     def check_pattern_button_click(self, mouse_pos):
         """Check if a pattern button was clicked and handle selection.
@@ -1772,12 +4928,1935 @@ class GameOfLifeUI:
         return False
 
 
+class StatisticsTracker:
+    """Per-generation statistics kept in fixed-size NumPy ring buffers.
+    Samples are by-products of GameOfLife.step(), so no extra pass over the cells is needed."""
+    
+    COLUMNS = {
+        "generation": np.int64,
+        "population": np.int64,
+        "births": np.int64,
+        "deaths": np.int64,
+        "min_x": np.int64,
+        "min_y": np.int64,
+        "max_x": np.int64,
+        "max_y": np.int64,
+        "density": np.float64,  # Population divided by bounding box area
+        "active_tiles": np.int64,
+        "emitted": np.int64,  # Spaceships removed by the reaper so far
+    }
+    
+    def __init__(self, capacity=2048):
+        self.capacity = capacity
+        self.buffers = {name: np.zeros(capacity, dtype=dtype) for name, dtype in self.COLUMNS.items()}
+        self.count = 0  # Total number of samples recorded
+        self.version = 0  # Increases with every sample, for redrawing plots
+        self.writers = []  # Streams receiving every sample, see add_writer()
+    
+    def __len__(self):
+        return min(self.count, self.capacity)
+    
+    def record(self, generation, population, births, deaths, bounds, active_tiles, emitted=0):
+        """Store one generation's sample."""
+        min_x, min_y, max_x, max_y = bounds or (0, 0, -1, -1)
+        area = (max_x - min_x + 1) * (max_y - min_y + 1)
+        sample = {
+            "generation": generation,
+            "population": population,
+            "births": births,
+            "deaths": deaths,
+            "min_x": min_x,
+            "min_y": min_y,
+            "max_x": max_x,
+            "max_y": max_y,
+            "density": population / area if area > 0 else 0.0,
+            "active_tiles": active_tiles,
+            "emitted": emitted,
+        }
+        
+        slot = self.count % self.capacity
+        for name, value in sample.items():
+            self.buffers[name][slot] = value
+        self.count += 1
+        self.version += 1
+        
+        for writer in self.writers:
+            writer.write(sample)
+    
+    def series(self, name, last=None):
+        """Return a column's samples in chronological order (optionally only the last N)."""
+        size = len(self)
+        if last is not None:
+            size = min(size, last)
+        end = self.count % self.capacity
+        buffer = self.buffers[name]
+        if size <= end:
+            return buffer[end - size:end]
+        return np.concatenate((buffer[self.capacity - (size - end):], buffer[:end]))
+    
+    def clear(self):
+        """Forget all samples (streams keep what they already received)."""
+        self.count = 0
+        self.version += 1
+    
+    def add_writer(self, writer):
+        """Stream every following sample to a writer (see CsvStatisticsWriter)."""
+        self.writers.append(writer)
+    
+    def close(self):
+        """Flush and close all writers."""
+        for writer in self.writers:
+            writer.close()
+        self.writers = []
+
+
+class CsvStatisticsWriter:
+    """Streams statistics samples to a CSV file."""
+    
+    def __init__(self, path, flush_every=256):
+        self.file = open(path, "w", newline="")
+        self.flush_every = flush_every
+        self.pending = 0
+        self.file.write(",".join(StatisticsTracker.COLUMNS) + "\n")
+    
+    def write(self, sample):
+        self.file.write(",".join(str(sample[name]) for name in StatisticsTracker.COLUMNS) + "\n")
+        self.pending += 1
+        if self.pending >= self.flush_every:
+            self.file.flush()
+            self.pending = 0
+    
+    def close(self):
+        self.file.close()
+
+
+class ColumnarStatisticsWriter:
+    """Streams statistics samples into a directory with one raw little-endian
+    binary file per column plus a schema.json describing them.
+    Read a column back with np.fromfile(path, dtype)."""
+    
+    def __init__(self, directory, chunk_size=4096):
+        import json
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.chunk_size = chunk_size
+        self.chunks = {name: np.zeros(chunk_size, dtype=np.dtype(dtype).newbyteorder("<"))
+                       for name, dtype in StatisticsTracker.COLUMNS.items()}
+        self.size = 0  # Samples in the current chunk
+        self.files = {name: open(os.path.join(directory, f"{name}.bin"), "wb")
+                      for name in StatisticsTracker.COLUMNS}
+        schema = {name: {"file": f"{name}.bin", "dtype": np.dtype(dtype).newbyteorder("<").str}
+                  for name, dtype in StatisticsTracker.COLUMNS.items()}
+        with open(os.path.join(directory, "schema.json"), "w") as f:
+            json.dump({"columns": schema}, f, indent=2)
+    
+    def write(self, sample):
+        for name, value in sample.items():
+            self.chunks[name][self.size] = value
+        self.size += 1
+        if self.size == self.chunk_size:
+            self.flush()
+    
+    def flush(self):
+        """Append the buffered chunk to the column files."""
+        for name, chunk in self.chunks.items():
+            chunk[:self.size].tofile(self.files[name])
+            self.files[name].flush()
+        self.size = 0
+    
+    def close(self):
+        self.flush()
+        for f in self.files.values():
+            f.close()
+
+
+class _NullPhase:
+    """Context manager that does nothing, used while timing is disabled."""
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        return False
+
+
+class _Phase:
+    """Context manager timing one named phase for a PhaseTimer."""
+    
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+        self.start = 0
+    
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+    
+    def __exit__(self, *exc):
+        self.timer.add(self.name, self.start, time.perf_counter_ns())
+        return False
+
+
+class PhaseTimer:
+    """Scoped perf_counter_ns timers for the hot paths (stepping, rendering, ...).
+    
+    Use as `with timer.phase("name"):`. While disabled, phase() hands out a shared
+    do-nothing context manager, so instrumented code costs next to nothing."""
+    
+    NULL_PHASE = _NullPhase()
+    
+    def __init__(self, window=60, max_trace_events=200000):
+        self.enabled = False
+        self.phases = {}  # Name -> reusable _Phase
+        self.frame_totals = defaultdict(int)  # Nanoseconds per phase in the current frame
+        self.history = defaultdict(lambda: deque(maxlen=window))  # Per-frame totals per phase
+        self.window = window
+        self.ticks = defaultdict(lambda: deque(maxlen=window))  # Timestamps of frames, generations, ...
+        self.tracing = False
+        self.trace_events = deque(maxlen=max_trace_events)
+        self.profiler = None  # Running cProfile capture
+        self.profile_frames = 0
+        self.profile_path = None
+    
+    def phase(self, name):
+        """Return a context manager timing the enclosed code as `name`."""
+        if not self.enabled:
+            return self.NULL_PHASE
+        phase = self.phases.get(name)
+        if phase is None:
+            phase = self.phases[name] = _Phase(self, name)
+        return phase
+    
+    def add(self, name, start, end):
+        """Record one timed span of a phase."""
+        self.frame_totals[name] += end - start
+        if self.tracing:
+            self.trace_events.append((name, start, end))
+    
+    def tick(self, name):
+        """Record that an event (a frame, a generation) happened now."""
+        if self.enabled:
+            self.ticks[name].append(time.perf_counter_ns())
+    
+    def rate(self, name):
+        """Return how often tick(name) happened per second over the recent window."""
+        ticks = self.ticks[name]
+        if len(ticks) < 2 or time.perf_counter_ns() - ticks[-1] > 1_000_000_000:
+            return 0.0
+        return (len(ticks) - 1) * 1e9 / (ticks[-1] - ticks[0])
+    
+    def end_frame(self):
+        """Close the current frame's per-phase totals and advance a profile capture."""
+        if self.enabled:
+            for name in set(self.history) | set(self.frame_totals):
+                self.history[name].append(self.frame_totals.get(name, 0))
+            self.frame_totals.clear()
+            self.tick("frame")
+        
+        if self.profiler is not None:
+            self.profile_frames -= 1
+            if self.profile_frames <= 0:
+                self.finish_profile()
+    
+    def averages(self):
+        """Return {phase: average milliseconds per frame} over the recent window."""
+        return {name: sum(totals) / len(totals) / 1e6
+                for name, totals in sorted(self.history.items()) if totals}
+    
+    def set_enabled(self, enabled):
+        """Turn timing on or off, forgetting the collected rolling averages."""
+        self.enabled = enabled
+        self.frame_totals.clear()
+        self.history.clear()
+        self.ticks.clear()
+    
+    def start_trace(self):
+        """Start keeping every timed span for export_trace()."""
+        self.set_enabled(True)
+        self.tracing = True
+        self.trace_events.clear()
+    
+    def export_trace(self, path):
+        """Write the collected spans as Chrome trace-event JSON (chrome://tracing, Perfetto)."""
+        import json
+        pid = os.getpid()
+        events = [{"name": name, "ph": "X", "ts": start / 1000, "dur": (end - start) / 1000,
+                   "pid": pid, "tid": 0} for name, start, end in self.trace_events]
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        return len(events)
+    
+    def start_profile(self, frames, path):
+        """Run cProfile for the next `frames` frames and write the stats to `path`."""
+        import cProfile
+        if self.profiler is not None:
+            return
+        self.profiler = cProfile.Profile()
+        self.profile_frames = frames
+        self.profile_path = path
+        self.profiler.enable()
+    
+    def finish_profile(self):
+        """Stop a running cProfile capture and write it to disk."""
+        if self.profiler is None:
+            return
+        self.profiler.disable()
+        self.profiler.dump_stats(self.profile_path)
+        print(f"Profile of the last frames written to {self.profile_path}")
+        self.profiler = None
+
+
+# Rough CPython cost of one cell beyond its dict slot: the (x, y) tuple and its two ints
+CELL_OBJECT_BYTES = 56 + 2 * 28
+
+# Rough bytes per live cell in the sparse engine: the object above plus its dict and tile set entries
+SPARSE_CELL_BYTES = CELL_OBJECT_BYTES + 80
+
+
+def pack_cells(cells):
+    """Pack a {(x, y): age} dict into (N x 2 int64 coords, int32 ages) arrays."""
+    coords = np.array(list(cells), dtype=np.int64).reshape(-1, 2)
+    ages = np.fromiter(cells.values(), dtype=np.int32, count=len(cells))
+    return coords, ages
+
+
+def estimate_cells_bytes(cells):
+    """Estimate the memory held by a {(x, y): age} dict or a packed (coords, ages) snapshot."""
+    if isinstance(cells, tuple):
+        return sum(array.nbytes for array in cells)
+    return sys.getsizeof(cells) + len(cells) * CELL_OBJECT_BYTES
+
+
+def surface_bytes(surface):
+    """Return the pixel memory of a pygame surface (0 for None)."""
+    if surface is None:
+        return 0
+    return surface.get_pitch() * surface.get_height()
+
+
+def format_bytes(size):
+    """Format a byte count for display, e.g. 12.3 MB."""
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+class MemoryBudget:
+    """Memory and population limits and the actions taken when they are exceeded.
+    
+    Actions are tried in order until the estimated usage fits again:
+    "compact_history" stores undo snapshots as packed NumPy arrays,
+    "shrink_history" halves max_history, "drop_caches" clears rebuildable caches,
+    "compact_engine" moves the cells to the engine needing less memory (fixing
+    the engine choice) and "pause" asks the caller to stop the simulation with
+    a warning."""
+    
+    ACTIONS = ("compact_history", "shrink_history", "drop_caches", "compact_engine", "pause")
+    
+    def __init__(self, max_bytes=1024 * 1024 * 1024, max_population=None, actions=ACTIONS, check_every=16):
+        self.max_bytes = max_bytes
+        self.max_population = max_population
+        self.actions = tuple(actions)
+        self.check_every = check_every  # Generations between checks
+        self.last_check = None
+    
+    def due(self, generation):
+        """Return True if a check is due at this generation."""
+        if self.last_check is not None and abs(generation - self.last_check) < self.check_every:
+            return False
+        self.last_check = generation
+        return True
+    
+    def over_memory(self, usage):
+        """Return True if the estimated usage is over the memory budget."""
+        return self.max_bytes is not None and sum(usage.values()) > self.max_bytes
+    
+    def exceeded(self, usage, population):
+        """Return a warning if the usage or population is over budget, else None."""
+        if self.over_memory(usage):
+            return f"Memory budget exceeded: {format_bytes(sum(usage.values()))} of {format_bytes(self.max_bytes)}"
+        if self.max_population is not None and population > self.max_population:
+            return f"Population budget exceeded: {population} of {self.max_population} cells"
+        return None
+    
+    def enforce(self, game, measure=None, drop_caches=None):
+        """Apply the configured actions until the game fits the budget again.
+        `measure` returns the usage breakdown (game.memory_usage by default) and
+        `drop_caches` clears the caller's own caches.
+        Returns (usage, actions applied, warning if the caller should pause)."""
+        measure = measure or game.memory_usage
+        usage = measure()
+        applied = []
+        for action in self.actions:
+            # Only pausing helps against too many live cells
+            if not self.over_memory(usage):
+                break
+            if action == "compact_history":
+                if game.compact_snapshots:
+                    continue
+                game.compact_history()
+            elif action == "shrink_history":
+                if not game.max_history:
+                    continue
+                while game.max_history and self.over_memory(usage):
+                    game.max_history //= 2
+                    game.trim_history()
+                    usage = measure()
+            elif action == "drop_caches":
+                game.drop_caches()
+                if drop_caches:
+                    drop_caches()
+            elif action == "compact_engine":
+                estimates = {name: game.engine_bytes(name) for name in ENGINES}
+                compact = min(estimates, key=estimates.get)
+                if compact == game.engine.name:
+                    continue
+                game.set_engine(compact)
+            else:
+                continue
+            applied.append(action)
+            usage = measure()
+        
+        warning = self.exceeded(usage, game.population())
+        return usage, applied, warning if "pause" in self.actions else None
+
+
+class FrameGovernor:
+    """Keeps the render time of frames within a budget by lowering the quality.
+    
+    Each tier drops one more effect, roughly in order of cost per cell: the
+    glow of young cells, the pulse border of old cells, the grid coordinate
+    labels, the grid lines, and finally drawing every cell, which is replaced
+    by a density map. A tier is dropped once the smoothed render time has been
+    over budget for a few frames and restored once it has stayed under half
+    the budget for a while; restoring waits longer each time a restored tier
+    turns out too slow again, so the quality does not flicker."""
+    
+    EFFECTS = ("glow", "pulse", "labels", "grid", "cells")
+    TIERS = ("full", "no glow", "no pulse", "no labels", "no grid", "density")
+    DEGRADE_FRAMES = 3  # Frames over budget before dropping a tier
+    RESTORE_FRAMES = 60  # Frames under restore_ratio x budget before restoring a tier
+    MAX_RESTORE_FRAMES = 960
+    
+    def __init__(self, budget_ms=1000 / 60, restore_ratio=0.5):
+        self.budget_ms = budget_ms  # 0 or None keeps full quality
+        self.restore_ratio = restore_ratio
+        self.tier = 0  # Index into TIERS
+        self.average_ms = None  # Smoothed render time at the current tier
+        self.over = 0  # Consecutive frames over budget
+        self.under = 0  # Consecutive frames under the restore threshold
+        self.restore_frames = self.RESTORE_FRAMES
+        self.since_restore = None  # Frames since the last restore
+    
+    @property
+    def name(self):
+        """The name of the current tier."""
+        return self.TIERS[self.tier]
+    
+    def enabled(self, effect):
+        """Return True if the effect (see EFFECTS) is drawn at the current tier."""
+        return self.tier <= self.EFFECTS.index(effect)
+    
+    def record(self, frame_ms):
+        """Account one frame's render time. Returns True if the tier changed."""
+        if not self.budget_ms:
+            return False
+        if self.average_ms is None:
+            self.average_ms = frame_ms
+        else:
+            self.average_ms += 0.3 * (frame_ms - self.average_ms)
+        if self.since_restore is not None:
+            self.since_restore += 1
+        
+        if self.average_ms > self.budget_ms:
+            self.over, self.under = self.over + 1, 0
+            if self.over >= self.DEGRADE_FRAMES and self.tier < len(self.TIERS) - 1:
+                if self.since_restore is not None and self.since_restore < self.RESTORE_FRAMES:
+                    # The tier just restored was too slow - wait longer next time
+                    self.restore_frames = min(2 * self.restore_frames, self.MAX_RESTORE_FRAMES)
+                return self.set_tier(self.tier + 1)
+        elif self.average_ms < self.budget_ms * self.restore_ratio:
+            self.over, self.under = 0, self.under + 1
+            if self.under >= self.restore_frames and self.tier > 0:
+                self.since_restore = 0
+                return self.set_tier(self.tier - 1)
+        else:
+            self.over = self.under = 0
+        return False
+    
+    def set_tier(self, tier):
+        """Switch to a tier and start measuring it afresh. Returns True."""
+        self.tier = tier
+        self.average_ms = None
+        self.over = self.under = 0
+        return True
+
+
+def build_palette(theme):
+    """Return the palette of exported images as an N x 3 uint8 array: the grid line
+    color, then one entry per age class (see palette_indices). Age 0 is the background."""
+    colors = [theme["grid"], theme["bg"]]
+    colors += [age_color(theme, age) for age in range(1, 16)]  # New, young and adult cells
+    colors += [age_color(theme, 20 + residue) for residue in range(10)]  # Old cells by age % 10
+    return np.array(colors, dtype=np.uint8)
+
+
+def palette_indices(ages):
+    """Map an array of cell ages (0 = dead) to build_palette() indices."""
+    return (np.where(ages <= 15, ages, 16 + ages % 10) + 1).astype(np.uint8)
+
+
+def build_heat_colormap(theme, opacity=170):
+    """Return a 256 x 4 uint8 RGBA lookup table for ActivityHeatmap levels, running
+    from the theme's old cell color through its young and new cell colors to the
+    highlight color, and from transparent to the given opacity."""
+    stops = np.array([theme["cell_old_base"], theme["cell_adult"], theme["cell_young"],
+                      theme["cell_new"], theme["text_highlight"]], dtype=np.float32)
+    levels = np.linspace(0, len(stops) - 1, 256)
+    colormap = np.empty((256, 4), dtype=np.uint8)
+    for channel in range(3):
+        colormap[:, channel] = np.interp(levels, np.arange(len(stops)), stops[:, channel])
+    colormap[:, 3] = np.sqrt(np.linspace(0, 1, 256)) * opacity
+    colormap[0, 3] = 0  # Cells that never flipped stay untouched
+    return colormap
+
+
+class FrameRasterizer:
+    """Rasterizes generations into palette-index frames ([y, x] uint8) for export,
+    either at a fixed viewport or following the pattern as it moves and grows."""
+    
+    FOLLOW_MARGIN = 4  # Cells kept free around the pattern when following it
+    
+    def __init__(self, width, height, cell_size=4, viewport=None, grid=False):
+        self.width = width
+        self.height = height
+        self.cell_size = cell_size  # Zoom; following only ever zooms out from here
+        self.viewport = viewport  # (left, top) grid cell at the frame corner, None to follow
+        self.grid = grid  # Only drawn while cells are at least 3 pixels wide
+        self.center = (0, 0)  # Last followed pattern center
+        self.buffers = {}  # {cell size: (ages, block frame)} reused from frame to frame
+    
+    def view(self, game):
+        """Return (left, top, cell size) of the next frame."""
+        if self.viewport is not None:
+            return self.viewport[0], self.viewport[1], self.cell_size
+        bounds = game.get_bounds()
+        if bounds:
+            min_x, min_y, max_x, max_y = bounds
+            margin = 2 * self.FOLLOW_MARGIN
+            fit = min(self.width // (max_x - min_x + 1 + margin), self.height // (max_y - min_y + 1 + margin))
+            self.cell_size = max(1, min(self.cell_size, fit))
+            self.center = ((min_x + max_x + 1) / 2, (min_y + max_y + 1) / 2)
+        size = self.cell_size
+        return (math.floor(self.center[0] - self.width / size / 2),
+                math.floor(self.center[1] - self.height / size / 2), size)
+    
+    def render(self, game, out):
+        """Draw the current generation into `out`, an [height, width] uint8 array."""
+        left, top, size = self.view(game)
+        columns, rows = -(-self.width // size), -(-self.height // size)
+        if size not in self.buffers:
+            self.buffers[size] = (np.zeros((rows, columns), dtype=np.int32),
+                                  np.zeros((rows * size, columns * size), dtype=np.uint8))
+        ages, frame = self.buffers[size]
+        game.ages_in_rect(left, top, left + columns - 1, top + rows - 1, out=ages)
+        
+        # Every cell becomes a size x size block of its palette index
+        blocks = frame.reshape(rows, size, columns, size)
+        blocks[:] = palette_indices(ages)[:, None, :, None]
+        if self.grid and size >= 3:
+            # Grid lines along the top and left edge of the empty cells, like the window
+            empty = (ages == 0)[:, None, :, None]
+            np.copyto(blocks[:, :1], 0, where=empty)
+            np.copyto(blocks[:, :, :, :1], 0, where=empty)
+        out[:] = frame[:self.height, :self.width]
+
+
+def render_poster(game, path, cell_size=1, theme=None, grid=False, tile_size=256, margin=4):
+    """Write the whole universe as one indexed PNG, rasterizing it tile by tile and
+    streaming each finished band of tiles into the PNG. Peak memory is one band
+    (tile_size cells tall, full image width) however large the image is.
+    Returns the image size, or None if there are no live cells."""
+    bounds = game.get_bounds()
+    if bounds is None:
+        return None
+    min_x, min_y = bounds[0] - margin, bounds[1] - margin
+    max_x, max_y = bounds[2] + margin, bounds[3] + margin
+    width, height = (max_x - min_x + 1) * cell_size, (max_y - min_y + 1) * cell_size
+    if max(width, height) >= 1 << 31:
+        raise ValueError(f"A {width}x{height} image is too large for PNG")
+    
+    tile_pixels = tile_size * cell_size
+    rasterizer = FrameRasterizer(tile_pixels, tile_pixels, cell_size, viewport=(min_x, min_y), grid=grid)
+    tile = np.zeros((tile_pixels, tile_pixels), dtype=np.uint8)
+    band = np.zeros((tile_pixels, width), dtype=np.uint8)
+    writer = PngWriter(path, width, height, build_palette(theme or COLOR_THEMES["Default"]))
+    try:
+        for top in range(min_y, max_y + 1, tile_size):
+            rows = min(tile_size, max_y + 1 - top) * cell_size
+            for left in range(min_x, max_x + 1, tile_size):
+                x = (left - min_x) * cell_size
+                columns = min(tile_size, max_x + 1 - left) * cell_size
+                if not grid and not game.count_in_rect(left, top, left + tile_size - 1, top + tile_size - 1):
+                    band[:rows, x:x + columns] = 1  # Empty tile - just background
+                    continue
+                rasterizer.viewport = (left, top)
+                rasterizer.render(game, tile)
+                band[:rows, x:x + columns] = tile[:rows, :columns]
+            writer.write_rows(band[:rows])
+    finally:
+        writer.close()
+    return width, height
+
+
+def png_chunk(f, kind, data):
+    """Write one PNG chunk (length, type, data, CRC)."""
+    import struct
+    import zlib
+    f.write(struct.pack(">I", len(data)) + kind + data
+            + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF))
+
+
+def png_header(f, width, height, palette):
+    """Write the PNG signature and IHDR chunk of an 8-bit RGB or indexed image."""
+    import struct
+    f.write(b"\x89PNG\r\n\x1a\n")
+    color_type = 2 if palette is None else 3
+    png_chunk(f, b"IHDR", struct.pack(">IIBBBBB", width, height, 8, color_type, 0, 0, 0))
+
+
+class PngWriter:
+    """Writes a PNG image a band of rows at a time, so the whole image never has to be
+    in memory. Rows are [y, x] palette indices if a palette is given, else [y, x, 3] RGB."""
+    
+    CHUNK_SIZE = 1 << 16  # Compressed bytes collected per IDAT chunk
+    
+    def __init__(self, path, width, height, palette=None, level=6):
+        import zlib
+        self.file = open(path, "wb")
+        self.width = width
+        self.height = height
+        self.rows = 0  # Rows written so far
+        self.compressor = zlib.compressobj(level)
+        self.pending = []
+        self.pending_size = 0
+        self.scanlines = None  # Reused buffer of filter byte + row data
+        png_header(self.file, width, height, palette)
+        if palette is not None:
+            png_chunk(self.file, b"PLTE", np.asarray(palette, dtype=np.uint8).tobytes())
+    
+    def write_rows(self, rows):
+        """Append rows to the image."""
+        rows = np.asarray(rows, dtype=np.uint8).reshape(len(rows), -1)
+        if self.scanlines is None or len(self.scanlines) < len(rows):
+            self.scanlines = np.zeros((len(rows), rows.shape[1] + 1), dtype=np.uint8)  # Filter 0 (None)
+        scanlines = self.scanlines[:len(rows)]
+        scanlines[:, 1:] = rows
+        self.add(self.compressor.compress(scanlines.data))
+        self.rows += len(rows)
+    
+    def add(self, data):
+        """Collect compressed data, writing IDAT chunks as they fill up."""
+        if data:
+            self.pending.append(data)
+            self.pending_size += len(data)
+        if self.pending_size >= self.CHUNK_SIZE:
+            self.flush()
+    
+    def flush(self):
+        """Write the collected data as an IDAT chunk."""
+        if self.pending:
+            png_chunk(self.file, b"IDAT", b"".join(self.pending))
+            self.pending = []
+            self.pending_size = 0
+    
+    def close(self):
+        """Finish the image. Raises ValueError if rows are missing."""
+        self.add(self.compressor.flush())
+        self.flush()
+        png_chunk(self.file, b"IEND", b"")
+        self.file.close()
+        if self.rows != self.height:
+            raise ValueError(f"PNG has {self.rows} of {self.height} rows")
+
+
+class PngSequenceWriter:
+    """Writes every frame as a numbered indexed PNG file in a directory."""
+    
+    def __init__(self, directory, palette, level=6):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.palette = palette
+        self.level = level
+        self.frames = 0
+    
+    def write_frame(self, frame):
+        height, width = frame.shape
+        writer = PngWriter(os.path.join(self.directory, f"frame_{self.frames:06d}.png"),
+                           width, height, self.palette, self.level)
+        writer.write_rows(frame)
+        writer.close()
+        self.frames += 1
+    
+    def close(self):
+        pass
+
+
+class ApngWriter:
+    """Writes frames into one animated PNG. The frame count in the acTL chunk is
+    patched in when the file is closed, so frames can be streamed."""
+    
+    def __init__(self, path, palette, fps=30, level=6):
+        self.file = open(path, "wb")
+        self.palette = palette
+        self.fps = fps
+        self.level = level
+        self.frames = 0
+        self.sequence = 0  # Sequence number of the next fcTL/fdAT chunk
+        self.actl_offset = None
+        self.scanlines = None  # Reused buffer of filter byte + row data
+    
+    def write_frame(self, frame):
+        import struct
+        import zlib
+        height, width = frame.shape
+        if self.actl_offset is None:
+            png_header(self.file, width, height, self.palette)
+            self.actl_offset = self.file.tell()
+            png_chunk(self.file, b"acTL", struct.pack(">II", 0, 0))  # Frame count patched in close()
+            png_chunk(self.file, b"PLTE", np.asarray(self.palette, dtype=np.uint8).tobytes())
+            self.scanlines = np.zeros((height, width + 1), dtype=np.uint8)
+        
+        png_chunk(self.file, b"fcTL", struct.pack(">IIIIIHHBB", self.sequence, width, height,
+                                                  0, 0, 1, self.fps, 0, 0))
+        self.sequence += 1
+        self.scanlines[:, 1:] = frame
+        data = zlib.compress(self.scanlines.data, self.level)
+        if self.frames == 0:
+            png_chunk(self.file, b"IDAT", data)  # The first frame doubles as the still image
+        else:
+            png_chunk(self.file, b"fdAT", struct.pack(">I", self.sequence) + data)
+            self.sequence += 1
+        self.frames += 1
+    
+    def close(self):
+        import struct
+        if self.actl_offset is not None:
+            png_chunk(self.file, b"IEND", b"")
+            self.file.seek(self.actl_offset)
+            png_chunk(self.file, b"acTL", struct.pack(">II", self.frames, 0))
+        self.file.close()
+
+
+class GifWriter:
+    """Writes frames into an animated GIF, one frame at a time. Needs Pillow."""
+    
+    def __init__(self, path, palette, fps=30):
+        try:
+            from PIL import Image, GifImagePlugin
+        except ImportError:
+            raise RuntimeError("GIF export needs Pillow (pip install pillow); use .png for APNG")
+        self.image_module = Image
+        self.gif = GifImagePlugin
+        self.file = open(path, "wb")
+        self.palette = np.asarray(palette, dtype=np.uint8).tobytes()
+        self.duration = max(20, round(1000 / fps))  # GIF delays have 10 ms steps
+        self.frames = 0
+    
+    def write_frame(self, frame):
+        height, width = frame.shape
+        image = self.image_module.frombuffer("P", (width, height), frame.tobytes(), "raw", "P", 0, 1)
+        image.putpalette(self.palette)
+        if self.frames == 0:
+            header, _ = self.gif.getheader(image, info={"loop": 0})
+            for data in header:
+                self.file.write(data)
+        for data in self.gif.getdata(image, duration=self.duration):
+            self.file.write(data)
+        self.frames += 1
+    
+    def close(self):
+        self.file.write(b";")  # GIF trailer
+        self.file.close()
+
+
+def open_frame_writer(path, palette, fps=30):
+    """Pick the writer from the output path: *.gif, *.png/*.apng or a directory of PNGs."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".gif":
+        return GifWriter(path, palette, fps)
+    if extension in (".png", ".apng"):
+        return ApngWriter(path, palette, fps)
+    return PngSequenceWriter(path, palette)
+
+
+class FrameExporter:
+    """Hands rendered frames to a background encoder thread. Frames come from a small
+    pool of reused buffers, so a slow encoder blocks the producer instead of letting
+    frames pile up in memory."""
+    
+    def __init__(self, writer, width, height, queue_size=8):
+        import queue
+        import threading
+        self.writer = writer
+        self.free = queue.Queue()  # Buffers ready to be rendered into
+        for _ in range(queue_size + 2):
+            self.free.put(np.zeros((height, width), dtype=np.uint8))
+        self.frames = queue.Queue(maxsize=queue_size)  # Rendered frames waiting for the encoder
+        self.error = None
+        self.thread = threading.Thread(target=self.encode, name="frame-encoder", daemon=True)
+        self.thread.start()
+    
+    def buffer(self):
+        """Return a free frame buffer, waiting for the encoder if all are in use."""
+        return self.free.get()
+    
+    def submit(self, frame):
+        """Queue a rendered buffer for encoding."""
+        self.frames.put(frame)
+    
+    def encode(self):
+        """Encoder thread: write queued frames and return their buffers to the pool."""
+        while True:
+            frame = self.frames.get()
+            if frame is None:
+                break
+            if self.error is None:
+                try:
+                    self.writer.write_frame(frame)
+                except Exception as error:
+                    self.error = error  # Keep draining so the producer never blocks
+            self.free.put(frame)
+    
+    def close(self):
+        """Wait for the queued frames to be written and finish the file."""
+        self.frames.put(None)
+        self.thread.join()
+        self.writer.close()
+        if self.error is not None:
+            raise self.error
+
+def encode_varints(values):
+    """Encode non-negative integers as LEB128 varints (7 bits per byte, low bits first)."""
+    values = np.asarray(values, dtype=np.uint64).ravel()
+    if not len(values):
+        return b""
+    shifts = np.arange(0, 70, 7, dtype=np.uint64)
+    groups = (values[:, None] >> shifts) & np.uint64(0x7F)  # [value, 7-bit group]
+    lengths = np.maximum(1, 10 - np.argmax((values[:, None] >> shifts)[:, ::-1] != 0, axis=1))
+    lengths[values == 0] = 1
+    used = np.arange(10) < lengths[:, None]
+    groups[np.arange(10) < lengths[:, None] - 1] |= np.uint64(0x80)  # Continuation bits
+    return groups[used].astype(np.uint8).tobytes()
+
+
+def decode_varints(data, offset=0, count=None):
+    """Decode varints from bytes. Returns (values, offset after the last one)."""
+    values = []
+    value = shift = 0
+    while offset < len(data) and (count is None or len(values) < count):
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        shift += 7
+        if not byte & 0x80:
+            values.append(value)
+            value = shift = 0
+    return values, offset
+
+
+def encode_cells(cells):
+    """Encode cells as a varint count plus zigzag varint (dx, dy) steps between the
+    cells in row order, which keeps clustered patterns at about 2 bytes per cell."""
+    cells = np.asarray(cells, dtype=np.int64).reshape(-1, 2)
+    cells = cells[np.lexsort((cells[:, 0], cells[:, 1]))]
+    steps = np.diff(cells, axis=0, prepend=np.zeros((1, 2), dtype=np.int64)).ravel()
+    return encode_varints([len(cells)]) + encode_varints((steps << 1) ^ (steps >> 63))
+
+
+def decode_cells(data, offset=0):
+    """Decode encode_cells() data. Returns ([(x, y)], offset after the cells)."""
+    (count,), offset = decode_varints(data, offset, 1)
+    steps, offset = decode_varints(data, offset, 2 * count)
+    cells = []
+    x = y = 0
+    for i in range(count):
+        dx, dy = steps[2 * i], steps[2 * i + 1]
+        x += (dx >> 1) ^ -(dx & 1)
+        y += (dy >> 1) ^ -(dy & 1)
+        cells.append((x, y))
+    return cells, offset
+
+
+# State stream message kinds; the high bit marks a zlib-compressed body
+KEYFRAME = 1  # generation, live cells
+DELTA = 2  # generation, born cells, dead cells
+COMPRESSED = 0x80
+
+
+def decode_state_message(message):
+    """Decode a state stream message into (kind, generation, cell lists)."""
+    import zlib
+    kind, body = message[0], message[1:]
+    if kind & COMPRESSED:
+        kind, body = kind & ~COMPRESSED, zlib.decompress(body)
+    (generation,), offset = decode_varints(body, 0, 1)
+    lists = []
+    while offset < len(body):
+        cells, offset = decode_cells(body, offset)
+        lists.append(cells)
+    return kind, generation, lists
+
+
+VIEWER_HTML = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Game of Life viewer</title>
+<style>body{margin:0;background:#1e1e1e;color:#ddd;font:14px sans-serif}#s{position:fixed;left:8px;top:6px}</style>
+</head><body><div id="s">connecting...</div><canvas id="c"></canvas><script>
+const canvas = document.getElementById("c"), ctx = canvas.getContext("2d"), statusLine = document.getElementById("s");
+const cells = new Set();
+let generation = 0, received = 0, chain = Promise.resolve();
+function varints(bytes, state, count) {
+  const out = [];
+  while (out.length < count) {
+    let value = 0, scale = 1, byte;
+    do { byte = bytes[state.offset++]; value += (byte & 127) * scale; scale *= 128; } while (byte & 128);
+    out.push(value);
+  }
+  return out;
+}
+function readCells(bytes, state) {
+  const [count] = varints(bytes, state, 1), steps = varints(bytes, state, 2 * count), list = [];
+  let x = 0, y = 0;
+  for (let i = 0; i < count; i++) {
+    const dx = steps[2 * i], dy = steps[2 * i + 1];
+    x += dx % 2 ? -(dx + 1) / 2 : dx / 2;
+    y += dy % 2 ? -(dy + 1) / 2 : dy / 2;
+    list.push(x + "," + y);
+  }
+  return list;
+}
+async function apply(buffer) {
+  let kind = new Uint8Array(buffer)[0], body = buffer.slice(1);
+  if (kind & 128) {
+    kind &= 127;
+    body = await new Response(new Blob([body]).stream().pipeThrough(new DecompressionStream("deflate"))).arrayBuffer();
+  }
+  const bytes = new Uint8Array(body), state = {offset: 0};
+  [generation] = varints(bytes, state, 1);
+  if (kind === 1) { cells.clear(); readCells(bytes, state).forEach(c => cells.add(c)); }
+  else { readCells(bytes, state).forEach(c => cells.add(c)); readCells(bytes, state).forEach(c => cells.delete(c)); }
+  received += buffer.byteLength;
+  draw();
+}
+function draw() {
+  canvas.width = innerWidth; canvas.height = innerHeight;
+  let minX = Infinity, minY = Infinity, maxX = -Infinity, maxY = -Infinity;
+  const points = [...cells].map(c => c.split(",").map(Number));
+  for (const [x, y] of points) { minX = Math.min(minX, x); maxX = Math.max(maxX, x); minY = Math.min(minY, y); maxY = Math.max(maxY, y); }
+  const size = Math.max(1, Math.min(12, Math.floor(Math.min(canvas.width / (maxX - minX + 9), canvas.height / (maxY - minY + 9)))));
+  const left = (minX + maxX) / 2 - canvas.width / size / 2, top = (minY + maxY) / 2 - canvas.height / size / 2;
+  ctx.fillStyle = "#64a0ff";
+  for (const [x, y] of points) ctx.fillRect(Math.floor((x - left) * size), Math.floor((y - top) * size), size, size);
+  statusLine.textContent = `generation ${generation}, population ${cells.size}, ${(received / 1024).toFixed(0)} KiB received`;
+}
+const socket = new WebSocket(`ws://${location.host}/ws${location.search}`);
+socket.binaryType = "arraybuffer";
+socket.onmessage = event => { chain = chain.then(() => apply(event.data)); };
+socket.onclose = () => { statusLine.textContent += " (disconnected)"; };
+</script></body></html>
+"""
+
+
+class StateServer:
+    """Runs a game and streams its state over WebSocket to any number of viewers,
+    with a minimal HTML viewer on / and a JSON summary on /state.
+    A viewer gets a keyframe and then one birth/death delta per generation; a viewer
+    that falls behind skips ahead to a fresh keyframe of the latest generation."""
+    
+    WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+    SEND_BUFFER = 1 << 17  # Socket send buffer per viewer; a small one makes slow viewers skip sooner
+    
+    def __init__(self, game, host="127.0.0.1", port=8765, speed=10):
+        self.game = game
+        self.host = host
+        self.port = port
+        self.speed = speed  # Generations per second, 0 for as fast as possible
+        self.delta = None  # (generation, births, deaths) of the latest step
+        self.messages = {}  # {(kind, compress): (generation, encoded message)}
+        self.changed = None  # asyncio.Condition notified after every step
+        self.finished = False  # Set when the simulation has stopped
+        self.clients = 0
+    
+    def message(self, kind, compress):
+        """Return the encoded keyframe or delta of the current generation,
+        encoded only once however many viewers receive it."""
+        import zlib
+        generation = self.game.generation
+        cached = self.messages.get((kind, compress))
+        if cached and cached[0] == generation:
+            return cached[1]
+        body = encode_varints([generation])
+        if kind == KEYFRAME:
+            body += encode_cells(self.game.engine.pack()[0])
+        else:
+            body += encode_cells(self.delta[1]) + encode_cells(self.delta[2])
+        message = (bytes([kind | COMPRESSED]) + zlib.compress(body, 1) if compress
+                   else bytes([kind]) + body)
+        self.messages[(kind, compress)] = (generation, message)
+        return message
+    
+    async def simulate(self, generations=None):
+        """Step the game at the configured speed and wake up the viewers."""
+        import asyncio
+        while generations is None or self.game.generation < generations:
+            births, deaths = self.game.step()
+            self.delta = (self.game.generation, births, deaths)
+            async with self.changed:
+                self.changed.notify_all()
+            await asyncio.sleep(1 / self.speed if self.speed else 0)
+        self.finished = True
+        async with self.changed:
+            self.changed.notify_all()
+    
+    async def handle(self, reader, writer):
+        """Serve one HTTP request or WebSocket connection."""
+        import base64
+        import json
+        from urllib.parse import urlsplit, parse_qs
+        try:
+            request = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+            method, target = request[0].split(" ")[:2]
+            headers = dict(line.split(": ", 1) for line in request[1:] if ": " in line)
+            headers = {name.lower(): value for name, value in headers.items()}
+            url = urlsplit(target)
+            if url.path == "/ws" and headers.get("upgrade", "").lower() == "websocket":
+                accept = base64.b64encode(hashlib.sha1(
+                    (headers["sec-websocket-key"] + self.WEBSOCKET_GUID).encode()).digest()).decode()
+                writer.write(("HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\n"
+                              f"Connection: Upgrade\r\nSec-WebSocket-Accept: {accept}\r\n\r\n").encode())
+                compress = parse_qs(url.query).get("compress", ["0"])[0] not in ("0", "")
+                sock = writer.get_extra_info("socket")
+                if sock is not None:
+                    import socket
+                    sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self.SEND_BUFFER)
+                await self.stream(reader, writer, compress)
+                return
+            if url.path == "/":
+                body, content_type, status = VIEWER_HTML.encode(), "text/html; charset=utf-8", "200 OK"
+            elif url.path == "/state":
+                body = json.dumps({"generation": self.game.generation, "population": self.game.population(),
+                                   "bounds": self.game.get_bounds(), "rule": self.game.rule_string,
+                                   "viewers": self.clients}).encode()
+                content_type, status = "application/json", "200 OK"
+            else:
+                body, content_type, status = b"Not found", "text/plain", "404 Not Found"
+            writer.write(f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+                         f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+            await writer.drain()
+        except (OSError, ValueError, KeyError, EOFError, IndexError):
+            pass  # Malformed request or the peer went away
+        finally:
+            writer.close()
+    
+    async def stream(self, reader, writer, compress):
+        """Send state messages to one viewer until it disconnects."""
+        import asyncio
+        closed = asyncio.ensure_future(self.read_until_close(reader, writer))
+        self.clients += 1
+        sent = None  # Generation the viewer has
+        try:
+            while not closed.done():
+                async with self.changed:
+                    await self.changed.wait_for(lambda: self.game.generation != sent or closed.done()
+                                                or self.finished)
+                if closed.done():
+                    break
+                if self.game.generation == sent:  # Finished and up to date
+                    write_websocket_frame(writer, 8, (1000).to_bytes(2, "big"))
+                    await writer.drain()
+                    break
+                generation = self.game.generation
+                # Deltas only help a viewer that has the generation right before this one
+                up_to_date = sent is not None and self.delta and self.delta[0] == generation == sent + 1
+                write_websocket_frame(writer, 2, self.message(DELTA if up_to_date else KEYFRAME, compress))
+                await writer.drain()  # Waits while a slow viewer's buffer is full
+                sent = generation
+        except (OSError, ConnectionError):
+            pass
+        finally:
+            self.clients -= 1
+            closed.cancel()
+    
+    async def read_until_close(self, reader, writer):
+        """Answer pings and return when the viewer closes the connection."""
+        try:
+            while True:
+                opcode, payload = await read_websocket_frame(reader)
+                if opcode == 8:  # Close
+                    write_websocket_frame(writer, 8, payload[:2])
+                    return
+                if opcode == 9:  # Ping
+                    write_websocket_frame(writer, 10, payload)
+        except (OSError, EOFError, ConnectionError, ValueError):
+            return
+        finally:
+            async with self.changed:
+                self.changed.notify_all()
+    
+    async def serve(self, generations=None):
+        """Serve until the simulation reaches `generations` (forever if None)."""
+        import asyncio
+        self.changed = asyncio.Condition()
+        server = await asyncio.start_server(self.handle, self.host, self.port)
+        self.port = server.sockets[0].getsockname()[1]  # In case port 0 picked a free one
+        print(f"Serving generation {self.game.generation} on http://{self.host}:{self.port}/ "
+              f"(WebSocket stream on /ws, add ?compress=1 for zlib)")
+        async with server:
+            await self.simulate(generations)
+            # Let the viewers receive the last generation before shutting down
+            for _ in range(100):
+                if not self.clients:
+                    break
+                await asyncio.sleep(0.01)
+
+
+def write_websocket_frame(writer, opcode, payload, mask=False):
+    """Write one final WebSocket frame (clients must mask what they send)."""
+    length = len(payload)
+    header = bytes([0x80 | opcode])
+    mask_bit = 0x80 if mask else 0
+    if length < 126:
+        header += bytes([mask_bit | length])
+    elif length < 1 << 16:
+        header += bytes([mask_bit | 126]) + length.to_bytes(2, "big")
+    else:
+        header += bytes([mask_bit | 127]) + length.to_bytes(8, "big")
+    if mask:
+        key = os.urandom(4)
+        payload = (np.frombuffer(payload, dtype=np.uint8) ^ np.resize(np.frombuffer(key, dtype=np.uint8), length)).tobytes()
+        header += key
+    writer.write(header + payload)
+
+
+async def read_websocket_frame(reader):
+    """Read one WebSocket message. Returns (opcode, payload); fragments are joined."""
+    opcode = None
+    payload = b""
+    while True:
+        first, second = await reader.readexactly(2)
+        length = second & 0x7F
+        if length == 126:
+            length = int.from_bytes(await reader.readexactly(2), "big")
+        elif length == 127:
+            length = int.from_bytes(await reader.readexactly(8), "big")
+        key = await reader.readexactly(4) if second & 0x80 else None
+        data = await reader.readexactly(length)
+        if key:
+            data = (np.frombuffer(data, dtype=np.uint8) ^ np.resize(np.frombuffer(key, dtype=np.uint8), length)).tobytes()
+        if first & 0x0F:
+            opcode = first & 0x0F
+        payload += data
+        if first & 0x80:  # Final fragment
+            return opcode, payload
+
+
+class StateClient:
+    """Minimal Python viewer of a StateServer stream that keeps the live cells."""
+    
+    def __init__(self, host="127.0.0.1", port=8765, compress=False):
+        self.host = host
+        self.port = port
+        self.compress = compress
+        self.cells = set()
+        self.generation = None
+        self.keyframes = 0
+        self.deltas = 0
+        self.received = 0  # Message bytes
+        self.reader = self.writer = None
+    
+    async def connect(self):
+        """Open the WebSocket connection."""
+        import asyncio
+        import base64
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        key = base64.b64encode(os.urandom(16)).decode()
+        self.writer.write((f"GET /ws?compress={int(self.compress)} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n"
+                           f"Upgrade: websocket\r\nConnection: Upgrade\r\nSec-WebSocket-Key: {key}\r\n"
+                           "Sec-WebSocket-Version: 13\r\n\r\n").encode())
+        response = await self.reader.readuntil(b"\r\n\r\n")
+        if b" 101 " not in response.split(b"\r\n")[0]:
+            raise ConnectionError(response.split(b"\r\n")[0].decode("latin-1"))
+    
+    async def receive(self):
+        """Apply the next state message. Returns False once the server has closed."""
+        try:
+            opcode, message = await read_websocket_frame(self.reader)
+        except (EOFError, ConnectionError, OSError):
+            return False
+        if opcode != 2:
+            return opcode != 8
+        kind, self.generation, lists = decode_state_message(message)
+        self.received += len(message)
+        if kind == KEYFRAME:
+            self.cells = set(lists[0])
+            self.keyframes += 1
+        else:
+            self.cells.update(lists[0])
+            self.cells.difference_update(lists[1])
+            self.deltas += 1
+        return True
+    
+    async def close(self):
+        """Close the connection politely."""
+        write_websocket_frame(self.writer, 8, (1000).to_bytes(2, "big"), mask=True)
+        await self.writer.drain()
+        self.writer.close()
+
+def connect_socket(sock):
+    """Turn off Nagle's algorithm - the per-generation messages are small and latency bound."""
+    import socket
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return sock
+
+
+def send_message(sock, header, payload=b""):
+    """Send a JSON header plus a binary payload over a blocking socket."""
+    import json
+    import struct
+    head = json.dumps(header).encode()
+    sock.sendall(struct.pack(">II", len(head), len(payload)) + head + payload)
+
+
+def receive_message(sock):
+    """Receive one send_message() message. Returns (header, payload)."""
+    import json
+    import struct
+    head_size, payload_size = struct.unpack(">II", receive_exactly(sock, 8))
+    header = json.loads(receive_exactly(sock, head_size))
+    return header, receive_exactly(sock, payload_size)
+
+
+def receive_exactly(sock, size):
+    """Read exactly `size` bytes from a blocking socket."""
+    data = bytearray(size)
+    view = memoryview(data)
+    while size:
+        received = sock.recv_into(view, size)
+        if not received:
+            raise ConnectionError("Connection closed")
+        view = view[received:]
+        size -= received
+    return bytes(data)
+
+
+def pack_payload(coords, ages=None):
+    """Pack N x 2 coordinates (and ages) into little-endian bytes for send_message()."""
+    data = np.ascontiguousarray(coords, dtype="<i8").tobytes()
+    if ages is not None:
+        data += np.ascontiguousarray(ages, dtype="<i4").tobytes()
+    return data
+
+
+def unpack_payload(payload, count, with_ages=True):
+    """Inverse of pack_payload(). Returns (coords, ages or None)."""
+    coords = np.frombuffer(payload, dtype="<i8", count=2 * count).reshape(-1, 2).astype(np.int64)
+    if not with_ages:
+        return coords, None
+    return coords, np.frombuffer(payload, dtype="<i4", count=count, offset=16 * count).astype(np.int32)
+
+
+class DistributedWorker:
+    """One partition of a distributed simulation: a vertical strip of whole tile
+    columns x0 <= x < x1 (None for an open end), stepped with a local GameOfLife.
+    Each generation the worker trades its outermost columns with the neighboring
+    strips over TCP; it talks to the coordinator only between batches of steps."""
+    
+    INLINE_SEND = 1 << 15  # Borders up to this many bytes always fit in the socket buffer
+    
+    def __init__(self, coordinator, host="127.0.0.1"):
+        import socket
+        self.coordinator = connect_socket(socket.create_connection(coordinator))
+        self.listener = socket.create_server((host, 0))  # Where the left neighbor connects
+        self.game = None
+        self.x0 = self.x1 = None
+        self.left = self.right = None  # Sockets to the neighboring workers
+    
+    def run(self):
+        """Serve coordinator commands until told to quit."""
+        send_message(self.coordinator, {"type": "hello",
+                                        "peer": [self.coordinator.getsockname()[0], self.listener.getsockname()[1]]})
+        try:
+            while True:
+                header, payload = receive_message(self.coordinator)
+                command = header["type"]
+                if command == "quit":
+                    break
+                reply, data = getattr(self, "on_" + command)(header, payload)
+                send_message(self.coordinator, reply, data)
+        finally:
+            for sock in (self.left, self.right, self.listener, self.coordinator):
+                if sock is not None:
+                    sock.close()
+    
+    def on_setup(self, header, payload):
+        """Create the local game and connect to the neighbors."""
+        import socket
+        self.game = GameOfLife(header["rule"])
+        self.game.max_history = 0
+        self.game.set_engine(header["engine"])
+        self.x0, self.x1 = header["x0"], header["x1"]
+        # Connect to the right neighbor's listener first; the connection waits in its
+        # backlog, so every worker can then accept its left neighbor without deadlock
+        if header["right"]:
+            self.right = connect_socket(socket.create_connection(tuple(header["right"])))
+        if header["left"]:
+            self.left = connect_socket(self.listener.accept()[0])
+        return {"type": "ready"}, b""
+    
+    def on_load(self, header, payload):
+        """Add cells (coordinates plus ages) that belong to this strip."""
+        coords, ages = unpack_payload(payload, header["count"])
+        self.game.apply_changes(coords, ages, np.empty((0, 2), dtype=np.int64))
+        return self.status(), b""
+    
+    def on_step(self, header, payload):
+        """Advance the strip by a number of generations."""
+        start = time.perf_counter()
+        for _ in range(header["generations"]):
+            ghosts = self.exchange_borders()
+            game = self.game
+            if len(ghosts):
+                game.apply_changes(ghosts, 1, np.empty((0, 2), dtype=np.int64))
+            game.step()
+            self.trim()
+        return dict(self.status(), time=time.perf_counter() - start), b""
+    
+    def exchange_borders(self):
+        """Send the strip's outermost columns to the neighbors and return theirs."""
+        import threading
+        bounds = self.game.get_bounds()
+        senders = []
+        for sock, column in ((self.left, self.x0), (self.right, None if self.x1 is None else self.x1 - 1)):
+            if sock is None:
+                continue
+            cells = (self.game.region_coords(column, bounds[1], column, bounds[3]) if bounds
+                     else np.empty((0, 2), dtype=np.int64))
+            message = ({"type": "border", "count": len(cells)}, pack_payload(cells))
+            if len(message[1]) <= self.INLINE_SEND:
+                send_message(sock, *message)
+            else:
+                # Big borders are sent from a thread, so two neighbors sending to
+                # each other at once cannot both block on full socket buffers
+                sender = threading.Thread(target=send_message, args=(sock, *message))
+                sender.start()
+                senders.append(sender)
+        ghosts = [unpack_payload(payload, header["count"], with_ages=False)[0]
+                  for header, payload in (receive_message(sock) for sock in (self.left, self.right) if sock)]
+        for sender in senders:
+            sender.join()
+        return np.concatenate(ghosts) if ghosts else np.empty((0, 2), dtype=np.int64)
+    
+    def outside(self):
+        """Return the live cells outside the strip (border copies and stray births)."""
+        bounds = self.game.get_bounds()
+        if not bounds:
+            return np.empty((0, 2), dtype=np.int64)
+        min_x, min_y, max_x, max_y = bounds
+        parts = []
+        if self.x0 is not None and min_x < self.x0:
+            parts.append(self.game.region_coords(min_x, min_y, self.x0 - 1, max_y))
+        if self.x1 is not None and max_x >= self.x1:
+            parts.append(self.game.region_coords(self.x1, min_y, max_x, max_y))
+        return np.concatenate(parts) if parts else np.empty((0, 2), dtype=np.int64)
+    
+    def trim(self):
+        """Drop everything outside the strip. Returns the removed cells and ages."""
+        removed = self.outside()
+        ages = self.game.apply_changes(np.empty((0, 2), dtype=np.int64), 1, removed)
+        return removed, ages
+    
+    def on_histogram(self, header, payload):
+        """Report live cells per tile column, for rebalancing."""
+        coords = self.game.engine.pack()[0]
+        columns, counts = np.unique(coords[:, 0] >> TileIndex.TILE_SHIFT, return_counts=True)
+        return {"type": "histogram", "columns": columns.tolist(), "counts": counts.tolist()}, b""
+    
+    def on_resize(self, header, payload):
+        """Move the strip edges and hand back the cells that now belong elsewhere."""
+        self.x0, self.x1 = header["x0"], header["x1"]
+        removed, ages = self.trim()
+        return {"type": "moved", "count": len(removed)}, pack_payload(removed, ages)
+    
+    def on_gather(self, header, payload):
+        """Return all cells and ages of the strip."""
+        coords, ages = self.game.engine.pack()
+        return {"type": "cells", "count": len(coords)}, pack_payload(coords, ages)
+    
+    def status(self):
+        return {"type": "status", "population": self.game.population(), "generation": self.game.generation}
+
+
+class DistributedCoordinator:
+    """Splits the universe into vertical strips of whole tile columns, one per worker
+    process, and drives the workers over TCP. Workers may run on this or other
+    hosts; they exchange border columns with each other directly, so the coordinator
+    only loads, steps, gathers and rebalances."""
+    
+    REBALANCE_RATIO = 1.5  # Rebalance when a strip holds this much more than the average
+    MIN_REBALANCE_POPULATION = 1000  # Not worth moving cells around below this
+    
+    def __init__(self, count, rule_string="B3/S23", engine="auto", host="127.0.0.1", port=0):
+        import socket
+        self.count = count
+        self.rule_string = rule_string
+        self.engine = engine
+        self.listener = socket.create_server((host, port))
+        self.address = self.listener.getsockname()[:2]
+        self.workers = []  # Coordinator sockets, ordered left to right
+        self.processes = []  # Local worker processes started by start()
+        self.edges = []  # Strip i covers edges[i] <= x < edges[i + 1]; None is open-ended
+        self.populations = [0] * count
+        self.generation = 0
+        self.rebalances = 0
+    
+    def start(self, spawn=None):
+        """Start `spawn` local workers (default: all of them), wait until every worker
+        has connected, and link the neighbors."""
+        import subprocess
+        spawn = self.count if spawn is None else spawn
+        for _ in range(spawn):
+            self.processes.append(subprocess.Popen(
+                [sys.executable, os.path.abspath(__file__), "--worker", f"{self.address[0]}:{self.address[1]}"]))
+        peers = []
+        while len(self.workers) < self.count:
+            sock = connect_socket(self.listener.accept()[0])
+            header, _ = receive_message(sock)
+            self.workers.append(sock)
+            peers.append(header["peer"])
+        self.edges = [None] + [16 * i for i in range(1, self.count)] + [None]
+        for i, sock in enumerate(self.workers):
+            send_message(sock, {"type": "setup", "rule": self.rule_string, "engine": self.engine,
+                                "x0": self.edges[i], "x1": self.edges[i + 1],
+                                "left": peers[i - 1] if i else None,
+                                "right": peers[i + 1] if i + 1 < self.count else None})
+        self.collect()
+    
+    def collect(self):
+        """Receive one reply from every worker."""
+        replies = [receive_message(sock) for sock in self.workers]
+        for i, (header, _) in enumerate(replies):
+            if "population" in header:
+                self.populations[i] = header["population"]
+        return replies
+    
+    def strip_of(self, xs):
+        """Return the strip index of each x coordinate."""
+        return np.searchsorted(np.array(self.edges[1:-1], dtype=np.int64), xs, side="right")
+    
+    def load(self, coords, ages):
+        """Split cells (N x 2 coordinates, ages) among the strips. Call on an empty universe."""
+        coords = np.asarray(coords, dtype=np.int64).reshape(-1, 2)
+        ages = np.asarray(ages, dtype=np.int32)
+        self.set_edges(*np.unique(coords[:, 0] >> TileIndex.TILE_SHIFT, return_counts=True))
+        for i, sock in enumerate(self.workers):
+            send_message(sock, {"type": "resize", "x0": self.edges[i], "x1": self.edges[i + 1]})
+        self.collect()
+        self.distribute(coords, ages)
+    
+    def distribute(self, coords, ages):
+        """Send cells to the workers owning them."""
+        owners = self.strip_of(coords[:, 0])
+        for i, sock in enumerate(self.workers):
+            mine = owners == i
+            send_message(sock, {"type": "load", "count": int(mine.sum())}, pack_payload(coords[mine], ages[mine]))
+        self.collect()
+    
+    def step(self, generations=1, rebalance_every=32):
+        """Advance every strip, rebalancing between batches when needed.
+        Returns the seconds each worker spent stepping."""
+        times = [0.0] * self.count
+        while generations > 0:
+            batch = min(generations, rebalance_every)
+            for sock in self.workers:
+                send_message(sock, {"type": "step", "generations": batch})
+            for i, (header, _) in enumerate(self.collect()):
+                times[i] += header["time"]
+            generations -= batch
+            self.generation += batch
+            self.rebalance()
+        return times
+    
+    def set_edges(self, columns, counts):
+        """Place the strip edges on tile column boundaries so every strip gets about
+        the same number of live cells."""
+        edges = []
+        if len(columns):
+            cumulative = np.cumsum(counts)
+            for i in range(1, self.count):
+                column = int(columns[np.searchsorted(cumulative, cumulative[-1] * i / self.count)]) + 1
+                if edges:
+                    column = max(column, edges[-1] // 16 + 1)  # Strips stay at least one tile wide
+                edges.append(column * 16)
+        else:
+            edges = [16 * i for i in range(1, self.count)]
+        self.edges = [None] + edges + [None]
+    
+    def rebalance(self, force=False):
+        """Move strip edges when live cells have piled up in a few strips.
+        Returns True if the strips changed."""
+        total = sum(self.populations)
+        if not force and (total < self.MIN_REBALANCE_POPULATION
+                          or max(self.populations) <= self.REBALANCE_RATIO * total / self.count):
+            return False
+        for sock in self.workers:
+            send_message(sock, {"type": "histogram"})
+        histogram = defaultdict(int)
+        for header, _ in self.collect():
+            for column, count in zip(header["columns"], header["counts"]):
+                histogram[column] += count
+        columns = np.array(sorted(histogram), dtype=np.int64)
+        self.set_edges(columns, np.array([histogram[column] for column in columns.tolist()], dtype=np.int64))
+        
+        # Every worker hands back what it no longer owns; the coordinator re-deals it
+        for i, sock in enumerate(self.workers):
+            send_message(sock, {"type": "resize", "x0": self.edges[i], "x1": self.edges[i + 1]})
+        moved = [unpack_payload(payload, header["count"]) for header, payload in self.collect()]
+        coords = np.concatenate([coords for coords, ages in moved])
+        ages = np.concatenate([ages for coords, ages in moved])
+        self.distribute(coords, ages)
+        self.rebalances += 1
+        return True
+    
+    def gather(self):
+        """Return all live cells as (N x 2 coordinates, ages)."""
+        for sock in self.workers:
+            send_message(sock, {"type": "gather"})
+        parts = [unpack_payload(payload, header["count"]) for header, payload in self.collect()]
+        return (np.concatenate([coords for coords, ages in parts]),
+                np.concatenate([ages for coords, ages in parts]))
+    
+    def close(self):
+        """Stop the workers."""
+        for sock in self.workers:
+            try:
+                send_message(sock, {"type": "quit"})
+            except OSError:
+                pass
+            sock.close()
+        for process in self.processes:
+            process.wait()
+        self.listener.close()
+
+
+def create_headless_game(args):
+    """Set up a game from the --rule, --engine and --pattern options."""
+    game = GameOfLife(args.rule)
+    game.set_engine(args.engine)
+    game.max_history = 0  # Nobody will undo a headless run
+    for name in args.pattern or ([] if args.generate else ["Acorn"]):
+        if not game.add_pattern(name, 0, 0):
+            raise SystemExit(f"Unknown pattern: {name}")
+    for spec in args.generate or []:
+        kind, _, options = spec.partition(":")
+        params = {}
+        for option in filter(None, options.split(",")):
+            name, _, value = option.partition("=")
+            for convert in (int, float, str):
+                try:
+                    params[name] = convert(value)
+                    break
+                except ValueError:
+                    pass
+        try:
+            game.generate(kind, **params)
+        except (TypeError, ValueError) as error:
+            raise SystemExit(f"Cannot generate {spec}: {error}")
+    if args.reap is not None:
+        game.set_reaper(margin=args.reap)
+    return game
+
+
+def run_headless(args, budget=None):
+    """Run the simulation without a window, e.g. for long statistics runs."""
+    game = create_headless_game(args)
+    
+    if args.stats_csv:
+        game.statistics.add_writer(CsvStatisticsWriter(args.stats_csv))
+    if args.stats_dir:
+        game.statistics.add_writer(ColumnarStatisticsWriter(args.stats_dir))
+    if args.trace:
+        game.timer.start_trace()
+    if args.profile:
+        game.timer.start_profile(args.generations, args.profile)
+    
+    try:
+        for _ in range(args.generations):
+            game.step()
+            game.timer.end_frame()
+            if budget and budget.due(game.generation):
+                usage, applied, warning = budget.enforce(game)
+                if applied:
+                    print(f"Memory budget: applied {', '.join(applied)}")
+                if warning:
+                    print(f"{warning} - stopping")
+                    break
+    finally:
+        game.statistics.close()
+        game.timer.finish_profile()
+    
+    if args.trace:
+        count = game.timer.export_trace(args.trace)
+        print(f"Wrote {count} trace events to {args.trace}")
+    
+    print(f"Generation {game.generation}: population {game.population()}, {game.engine.name} engine")
+    if game.reaper:
+        print(f"Reaper: {game.reaper.describe()}")
+    usage = game.memory_usage()
+    print(f"Estimated memory: {format_bytes(sum(usage.values()))} ("
+          + ", ".join(f"{name} {format_bytes(size)}" for name, size in usage.items()) + ")")
+    return game
+
+
+def run_export(args):
+    """Simulate without a window and export every k-th generation as frames,
+    faster than real time and without the UI around the grid."""
+    game = create_headless_game(args)
+    try:
+        width, height = (int(value) for value in args.size.lower().split("x"))
+        viewport = tuple(int(value) for value in args.viewport.split(",")) if args.viewport else None
+    except ValueError:
+        raise SystemExit("Use --size WIDTHxHEIGHT and --viewport X,Y")
+    if args.theme not in COLOR_THEMES:
+        raise SystemExit(f"Unknown theme: {args.theme} (choose from {', '.join(COLOR_THEMES)})")
+    
+    rasterizer = FrameRasterizer(width, height, args.cell_size, viewport, args.grid)
+    try:
+        writer = open_frame_writer(args.export, build_palette(COLOR_THEMES[args.theme]), args.fps)
+    except RuntimeError as error:
+        raise SystemExit(str(error))
+    exporter = FrameExporter(writer, width, height)
+    start = time.perf_counter()
+    frames = 0
+    try:
+        for generation in range(args.generations + 1):
+            if generation % args.every == 0:
+                with game.timer.phase("export.rasterize"):
+                    frame = exporter.buffer()
+                    rasterizer.render(game, frame)
+                exporter.submit(frame)
+                frames += 1
+            if generation < args.generations:
+                game.step()
+    finally:
+        exporter.close()
+    
+    elapsed = time.perf_counter() - start
+    print(f"Wrote {frames} frames of {width}x{height} to {args.export} in {elapsed:.1f} s "
+          f"({frames / elapsed:.0f} frames/s, {args.generations / elapsed:.0f} generations/s)")
+    return game
+
+
+def run_poster(args):
+    """Simulate without a window, then write the final state as one large PNG."""
+    game = create_headless_game(args)
+    if args.theme not in COLOR_THEMES:
+        raise SystemExit(f"Unknown theme: {args.theme} (choose from {', '.join(COLOR_THEMES)})")
+    start = time.perf_counter()
+    for _ in range(args.generations):
+        game.step()
+    simulated = time.perf_counter()
+    size = render_poster(game, args.poster, args.cell_size, COLOR_THEMES[args.theme], args.grid)
+    if size is None:
+        raise SystemExit(f"Nothing left alive after {game.generation} generations")
+    print(f"Simulated {game.generation} generations in {simulated - start:.1f} s, wrote a "
+          f"{size[0]}x{size[1]} poster to {args.poster} in {time.perf_counter() - simulated:.1f} s")
+    return game
+
+
+def run_collision_search(args):
+    """Collide two library patterns at every offset and phase and print the
+    distinct outcomes, most interesting first."""
+    game = GameOfLife(args.rule)
+    names = args.collide
+    for name in names:
+        if name not in game.patterns:
+            raise SystemExit(f"Unknown pattern: {name}")
+    
+    search = CollisionSearch(args.rule, max_generations=args.generations)
+    start = time.perf_counter()
+    try:
+        results = search.search(game.patterns[names[0]], game.patterns[names[1]], args.radius,
+                                progress=lambda done, total: print(f"\r{done}/{total} collisions run",
+                                                                   end="", flush=True))
+    finally:
+        search.close()
+    
+    # One line per distinct outcome, showing its first (best ranked) configuration
+    outcomes = {}
+    for result in results:
+        outcomes.setdefault(result["outcome"], []).append(result)
+    print(f"\r{names[0]} + {names[1]}: {len(results)} configurations ({search.hits} from the index) "
+          f"in {time.perf_counter() - start:.1f} s, {len(outcomes)} distinct outcomes")
+    for group in list(outcomes.values())[:args.top]:
+        result = group[0]
+        products = " + ".join(result["products"]) or "-"
+        print(f"  {result['class']:<12} x{len(group):<4} phase {result['phase']} offset "
+              f"({result['dx']}, {result['dy']}), settles at gen {result['generation']}: {products}")
+    return results
+
+
+def run_server(args):
+    """Simulate headlessly and stream the state to viewers until interrupted."""
+    import asyncio
+    game = create_headless_game(args)
+    server = StateServer(game, args.host, args.serve, args.speed)
+    try:
+        asyncio.run(server.serve())
+    except KeyboardInterrupt:
+        pass
+
+
+def run_viewer(args):
+    """Connect to a state server and print what arrives."""
+    import asyncio
+    host, _, port = args.connect.rpartition(":")
+    
+    async def watch():
+        client = StateClient(host or "127.0.0.1", int(port), args.compress)
+        await client.connect()
+        try:
+            while client.keyframes + client.deltas < args.generations and await client.receive():
+                print(f"Generation {client.generation}: population {len(client.cells)} "
+                      f"({client.keyframes} keyframes, {client.deltas} deltas, {format_bytes(client.received)})")
+        finally:
+            await client.close()
+    
+    try:
+        asyncio.run(watch())
+    except KeyboardInterrupt:
+        pass
+
+
+def run_distributed(args):
+    """Run a pattern on several worker processes and optionally check the result
+    against a single-process run."""
+    game = create_headless_game(args)
+    coordinator = DistributedCoordinator(args.distributed, args.rule, args.engine, args.host, args.port)
+    print(f"Coordinator listening on {coordinator.address[0]}:{coordinator.address[1]}")
+    try:
+        coordinator.start(args.distributed if args.spawn is None else args.spawn)
+        coordinator.load(*game.engine.pack())
+        start = time.perf_counter()
+        times = coordinator.step(args.generations, args.rebalance_every)
+        elapsed = time.perf_counter() - start
+        coords, ages = coordinator.gather()
+    finally:
+        coordinator.close()
+    
+    print(f"Generation {coordinator.generation}: population {len(coords)} on {args.distributed} workers "
+          f"in {elapsed:.2f} s, {coordinator.rebalances} rebalances, strips "
+          + ", ".join(f"{population}" for population in coordinator.populations)
+          + " cells, busy " + ", ".join(f"{seconds:.2f}" for seconds in times) + " s")
+    if args.verify:
+        start = time.perf_counter()
+        for _ in range(args.generations):
+            game.step()
+        same = same_cells((coords, ages), game.engine.pack())
+        print(f"Single process: {time.perf_counter() - start:.2f} s, "
+              + ("identical cells and ages" if same else "MISMATCH"))
+        if not same:
+            sys.exit(1)
+
+
+def same_cells(cells, expected):
+    """Return True if two packed (coordinates, ages) snapshots hold the same cells
+    with the same ages, in any order."""
+    (coords, ages), (expected_coords, expected_ages) = cells, expected
+    order = np.lexsort((coords[:, 1], coords[:, 0]))
+    expected_order = np.lexsort((expected_coords[:, 1], expected_coords[:, 0]))
+    return (np.array_equal(coords[order], expected_coords[expected_order])
+            and np.array_equal(ages[order], expected_ages[expected_order]))
+
+
+# Seeded runs of --check-distributed: (workers, generations, library patterns, random_soup parameters)
+DISTRIBUTED_CHECKS = (
+    (2, 120, ["Glider Gun"], None),
+    (3, 150, [], {"width": 96, "height": 64, "density": 0.35, "seed": 1}),
+    (4, 200, ["Acorn"], {"width": 64, "height": 64, "density": 0.3, "seed": 7}),
+)
+
+
+def check_distributed(rule_string="B3/S23", engine="auto", rebalance_every=8):
+    """Run the DISTRIBUTED_CHECKS on local workers, forcing a rebalance halfway
+    through each, and compare them with single-process runs.
+    Returns a process exit status: 0 if every run matched, 1 if not."""
+    failures = 0
+    for workers, generations, patterns, soup in DISTRIBUTED_CHECKS:
+        game = GameOfLife(rule_string)
+        game.set_engine(engine)
+        game.max_history = 0
+        for name in patterns:
+            game.add_pattern(name, 0, 0)
+        if soup:
+            game.generate("soup", 40, 0, **soup)
+        coordinator = DistributedCoordinator(workers, rule_string, engine)
+        try:
+            coordinator.start()
+            coordinator.load(*game.engine.pack())
+            coordinator.step(generations // 2, rebalance_every)
+            coordinator.rebalance(force=True)
+            coordinator.step(generations - generations // 2, rebalance_every)
+            cells = coordinator.gather()
+        finally:
+            coordinator.close()
+        for _ in range(generations):
+            game.step()
+        same = same_cells(cells, game.engine.pack())
+        failures += not same
+        print(f"{workers} workers, {' + '.join(patterns + (['soup'] if soup else []))}, {generations} generations, "
+              f"{coordinator.rebalances} rebalances: " + ("identical" if same else "MISMATCH"))
+    return 1 if failures else 0
+
+
+def report_first_frame():
+    """Start the UI, draw the first frame and print how long each stage took
+    (the child side of --benchmark-startup)."""
+    import json
+    imported = time.perf_counter()
+    app = GameOfLifeUI()
+    initialized = time.perf_counter()
+    app.render()
+    shown = time.perf_counter()
+    print(json.dumps({
+        "wall": time.time(),  # Lets the parent include interpreter startup
+        "imports": imported - STARTUP_TIME,
+        "init": initialized - imported,
+        "first_frame": shown - initialized,
+    }))
+    pygame.quit()
+
+
+def benchmark_startup(runs, budget_ms):
+    """Launch fresh processes and report their time to first frame.
+    Returns a process exit status: 0 if the median is within budget_ms, 1 if not."""
+    import json
+    import subprocess
+    samples = []
+    for run in range(runs):
+        start = time.time()
+        output = subprocess.run([sys.executable, os.path.abspath(__file__), "--first-frame"],
+                                capture_output=True, text=True, check=True).stdout
+        sample = json.loads(output.strip().splitlines()[-1])
+        sample["total"] = sample["wall"] - start
+        samples.append(sample)
+        print(f"Run {run + 1}: first frame after {sample['total'] * 1000:.0f} ms "
+              f"(imports {sample['imports'] * 1000:.0f} ms, init {sample['init'] * 1000:.0f} ms, "
+              f"render {sample['first_frame'] * 1000:.0f} ms)")
+    
+    median = sorted(sample["total"] for sample in samples)[len(samples) // 2] * 1000
+    within = median <= budget_ms
+    print(f"Median time to first frame: {median:.0f} ms, budget {budget_ms:.0f} ms"
+          f" - {'OK' if within else 'OVER BUDGET'}")
+    return 0 if within else 1
+
+
+def main(argv=None):
+    """Parse the command line and start the UI or a headless run."""
+    import argparse
+    parser = argparse.ArgumentParser(description="Ultimate Game of Life")
+    parser.add_argument("--headless", action="store_true", help="run without a window")
+    parser.add_argument("--generations", type=int, default=1000, help="generations to run headless")
+    parser.add_argument("--pattern", action="append", help="library pattern to start from (repeatable)")
+    parser.add_argument("--generate", action="append", metavar="KIND:KEY=VALUE,...",
+                        help="add a generated universe (repeatable): soup:width=,height=,density=,seed= | "
+                             "guns:columns=,rows=,spacing= | fleet:count=,ship=,direction=,spacing=")
+    parser.add_argument("--rule", default="B3/S23", help="rule string, e.g. B36/S23")
+    parser.add_argument("--engine", choices=GameOfLife.ENGINE_MODES, default="auto", help="simulation engine")
+    parser.add_argument("--stats-csv", help="stream per-generation statistics to this CSV file")
+    parser.add_argument("--stats-dir", help="stream per-generation statistics to a columnar directory")
+    parser.add_argument("--trace", help="write per-phase timings as Chrome trace-event JSON")
+    parser.add_argument("--profile", help="write cProfile statistics of the whole run")
+    parser.add_argument("--memory-budget", type=float, default=1024, help="estimated memory budget in MB")
+    parser.add_argument("--population-budget", type=int, help="maximum number of live cells")
+    parser.add_argument("--frame-budget", type=float, default=1000 / 60,
+                        help="render time in ms per frame before effects are dropped (0: always full quality)")
+    parser.add_argument("--reap", type=int, nargs="?", const=64, metavar="MARGIN",
+                        help="remove spaceships escaping MARGIN cells (default 64) beyond the starting pattern")
+    parser.add_argument("--benchmark-startup", type=int, metavar="RUNS",
+                        help="launch the UI this many times and report the time to first frame")
+    parser.add_argument("--startup-budget", type=float, default=1000,
+                        help="time to first frame budget in ms for --benchmark-startup")
+    parser.add_argument("--first-frame", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--export", metavar="PATH",
+                        help="export frames headlessly: a directory of PNGs, an APNG (.png) or a GIF (.gif)")
+    parser.add_argument("--poster", metavar="PATH",
+                        help="simulate headlessly, then write the final state as one large PNG")
+    parser.add_argument("--collide", nargs=2, metavar=("A", "B"),
+                        help="collide two library patterns at every offset and phase")
+    parser.add_argument("--radius", type=int, default=8, help="offset range of --collide")
+    parser.add_argument("--top", type=int, default=20, help="distinct outcomes listed by --collide")
+    parser.add_argument("--serve", type=int, metavar="PORT",
+                        help="simulate headlessly and stream the state over HTTP/WebSocket")
+    parser.add_argument("--host", default="127.0.0.1", help="address --serve listens on")
+    parser.add_argument("--speed", type=float, default=10, help="generations per second of --serve (0: unlimited)")
+    parser.add_argument("--connect", metavar="HOST:PORT", help="watch a --serve stream from the terminal")
+    parser.add_argument("--compress", action="store_true", help="ask --serve for zlib-compressed messages")
+    parser.add_argument("--distributed", type=int, metavar="WORKERS",
+                        help="run headlessly on this many worker processes connected over TCP")
+    parser.add_argument("--spawn", type=int, help="workers --distributed starts locally (default: all)")
+    parser.add_argument("--port", type=int, default=0, help="port --distributed listens on for workers")
+    parser.add_argument("--rebalance-every", type=int, default=32, help="generations between rebalancing checks")
+    parser.add_argument("--verify", action="store_true", help="compare --distributed with a single-process run")
+    parser.add_argument("--worker", metavar="HOST:PORT", help="join a --distributed coordinator as a worker")
+    parser.add_argument("--check-distributed", action="store_true",
+                        help="run seeded patterns on 2-4 local workers with a forced rebalance and "
+                             "exit with status 1 unless they match single-process runs")
+    parser.add_argument("--every", type=int, default=1, help="export every k-th generation")
+    parser.add_argument("--size", default="640x480", help="exported frame size in pixels, WIDTHxHEIGHT")
+    parser.add_argument("--cell-size", type=int, default=4, help="cell size in pixels of exported frames and posters")
+    parser.add_argument("--viewport", help="fixed top-left grid cell X,Y of exported frames (default: follow)")
+    parser.add_argument("--fps", type=int, default=30, help="frame rate of exported animations")
+    parser.add_argument("--theme", default="Default", help="color theme of exported frames")
+    parser.add_argument("--grid", action="store_true", help="draw grid lines in exported frames")
+    args = parser.parse_args(argv)
+    budget = MemoryBudget(int(args.memory_budget * 1024 * 1024), args.population_budget)
+    
+    if args.benchmark_startup:
+        sys.exit(benchmark_startup(args.benchmark_startup, args.startup_budget))
+    elif args.first_frame:
+        report_first_frame()
+    elif args.export:
+        run_export(args)
+    elif args.poster:
+        run_poster(args)
+    elif args.collide:
+        run_collision_search(args)
+    elif args.serve is not None:
+        run_server(args)
+    elif args.connect:
+        run_viewer(args)
+    elif args.check_distributed:
+        sys.exit(check_distributed(args.rule, args.engine))
+    elif args.distributed:
+        run_distributed(args)
+    elif args.worker:
+        host, _, port = args.worker.rpartition(":")
+        DistributedWorker((host, int(port)), args.host).run()
+    elif args.headless:
+        run_headless(args, budget)
+    else:
+        app = GameOfLifeUI()
+        app.game.set_engine(args.engine)
+        app.memory_budget = budget
+        app.governor.budget_ms = args.frame_budget
+        app.run()
+
+
 # Additional classes would be defined here:
 # - PatternManager: For handling pattern library and operations
 # - RuleManager: For managing and creating custom rules
 # - FileHandler: For loading/saving patterns, settings, etc.
-# - StatisticsTracker: For tracking and visualizing simulation statistics
 
 if __name__ == "__main__":
-    app = GameOfLifeUI()
-    app.run()
+    main()